@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'university_api.settings')
+# ORM calls of an ASGI request run on a thread that ends with the request: a persistent
+# connection opened there would never be reused, only leaked
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
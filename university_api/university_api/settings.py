@@ -1,3 +1,4 @@
+from importlib.util import find_spec
 from pathlib import Path
 import os
 
@@ -18,17 +19,18 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'corsheaders',
     'university_app',
 ]
 
 MIDDLEWARE = [
     'university_app.middleware.CORSMiddleware',
+    'university_app.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'university_app.middleware.DatabaseRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -52,14 +54,71 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'university_api.wsgi.application'
 
-# Database
+# Database: a tuned SQLite file by default. Set DB_ENGINE (e.g. django.db.backends.postgresql)
+# plus DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT to run against a server database instead
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # Persistent connections, verified before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() in ('1', 'true', 'yes'),
     }
 }
 
+# SQLite: PRAGMAs applied to every new connection by the connection_created hook in
+# university_app/signals.py. WAL lets readers run alongside the writer; IMMEDIATE transactions take
+# the write lock up front, so busy_timeout can queue writers instead of failing lock upgrades
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'true').lower() in ('1', 'true', 'yes')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 10000))
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KIB', 64 * 1024)),
+    'temp_store': 'MEMORY',
+}
+if DB_ENGINE.endswith('sqlite3'):
+    if SQLITE_TUNING:
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+else:
+    DATABASES['default'].update({
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+    })
+    # PostgreSQL (psycopg 3) can pool connections in-process instead of keeping one per thread
+    if os.environ.get('DB_POOL_MAX_SIZE'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ['DB_POOL_MAX_SIZE']),
+            },
+        }
+
+# Read replica: safe-method requests read from DATABASES['replica'] unless the same user wrote
+# within DB_STICKY_SECONDS (read-your-writes). DB_REPLICA_NAME is a second SQLite file kept in sync by
+# the replication stand-in: DB_REPLICA_SYNC=request copies it in a background thread after every
+# successful write request, 'off' leaves it to `manage.py replicate_sqlite --interval N`.
+# For a server database set DB_REPLICA_HOST instead
+DB_STICKY_SECONDS = int(os.environ.get('DB_STICKY_SECONDS', 5))
+DB_REPLICA_SYNC = os.environ.get('DB_REPLICA_SYNC', 'request')
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['university_app.routing.PrimaryReplicaRouter']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -68,6 +127,31 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',},
 ]
 
+# Password hashing, preferred first: PASSWORD_HASHER is argon2 (needs argon2-cffi), bcrypt (needs
+# bcrypt) or pbkdf2. Hashes made by the others still verify and are re-hashed on the user's next login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2' if find_spec('argon2') else 'pbkdf2')
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'university_app.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'university_app.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+# Cost of new hashes; changing it re-hashes users on their next login. The Argon2 defaults are
+# OWASP's 19 MiB / 2 passes / 1 lane profile (Django's own: 100 MiB, 8 lanes)
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST_KIB = int(os.environ.get('ARGON2_MEMORY_COST_KIB', 19 * 1024))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 10))
+
+# Password checks run in a pool of LOGIN_HASH_WORKERS processes (0 = in the request thread). At most
+# LOGIN_QUEUE_SIZE token requests per server process are admitted at once; the rest get an immediate
+# 429 with Retry-After instead of waiting for the pool until they time out
+AUTHENTICATION_BACKENDS = ['university_app.backends.PooledModelBackend']
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', min(os.cpu_count() or 1, 4)))
+LOGIN_QUEUE_SIZE = int(os.environ.get('LOGIN_QUEUE_SIZE', 4 * max(LOGIN_HASH_WORKERS, 1)))
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -84,17 +168,96 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'university_app.authentication.RoleClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'university_app.pagination.KeysetPagination',
+    # Each view's declared query_filters and ?search= (university_app.filters)
+    'DEFAULT_FILTER_BACKENDS': (
+        'university_app.filters.DeclaredFilterBackend',
+        'university_app.filters.SearchFilterBackend',
+    ),
+}
+
+# Keyset pagination (?cursor=... / ?page_size=...); requests without either get a capped bare list
+PAGINATION_PAGE_SIZE = int(os.environ.get('PAGINATION_PAGE_SIZE', 50))
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 500))
+PAGINATION_COMPAT_MAX_RESULTS = int(os.environ.get('PAGINATION_COMPAT_MAX_RESULTS', 1000))
+
+# Access tokens carry role/profile/faculty claims so authorization needs no database lookups.
+# Tokens are checked against university_app.revocation; JWT_ROTATE_REFRESH_TOKENS issues a new refresh
+# token on every refresh and revokes the one presented
+SIMPLE_JWT = {
+    'AUTH_TOKEN_CLASSES': ('university_app.authentication.RoleAccessToken',),
+    'ROTATE_REFRESH_TOKENS': os.environ.get('JWT_ROTATE_REFRESH_TOKENS', 'false').lower() in ('1', 'true', 'yes'),
+    'TOKEN_OBTAIN_SERIALIZER': 'university_app.authentication.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'university_app.authentication.RoleTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'university_app.authentication.RoleTokenBlacklistSerializer',
+}
+# In-memory Bloom filter in front of the revocation tables: sized for this many revoked tokens/users
+# at this false-positive rate (about 180 KB per process); only positives query the database
+REVOCATION_BLOOM_CAPACITY = int(os.environ.get('REVOCATION_BLOOM_CAPACITY', 100_000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.environ.get('REVOCATION_BLOOM_ERROR_RATE', 0.001))
+# Seconds a process trusts its filter before pulling the revocations made by other processes;
+# the longest a token revoked elsewhere can still be accepted here
+REVOCATION_BLOOM_MAX_AGE = float(os.environ.get('REVOCATION_BLOOM_MAX_AGE', 5))
+
+# Cache: local-memory LRU by default; point CACHE_BACKEND/CACHE_LOCATION at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) when running several workers
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'university-api'),
+    }
+}
+if CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000))}
+
+# Versioned list-response cache for faculties, professors and the admin subject list
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+# Per-student /api/me/dashboard/ snapshots, dropped early when the student's grades or enrollments change
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))
+
+# Seconds to keep a user's resolved role/profile in the cache (0 = per-request memo only)
+ROLE_CACHE_TTL = int(os.environ.get('ROLE_CACHE_TTL', 0))
+
+# Grade at or above which /api/faculties/{id}/analytics/ counts a pass
+ANALYTICS_PASS_MARK = float(os.environ.get('ANALYTICS_PASS_MARK', 50))
+
+# Per-request query count / SQL time / render time as Server-Timing headers and JSON log lines
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Statements repeated this many times in one request are logged as likely N+1 queries
+INSTRUMENTATION_REPEAT_THRESHOLD = int(os.environ.get('INSTRUMENTATION_REPEAT_THRESHOLD', 5))
+# Views over their declared query_budgets: 'off', 'warn' (log) or 'raise' (QueryBudgetExceeded)
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'warn')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'university_app.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('INSTRUMENTATION_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
-# CORS
-CORS_ALLOW_CREDENTIALS = False
-CORS_ALLOW_ALL_ORIGINS = True
+# CORS (university_app.middleware.CORSMiddleware): header values are computed once at startup
+CORS_ALLOW_CREDENTIALS = os.environ.get('CORS_ALLOW_CREDENTIALS', 'false').lower() in ('1', 'true', 'yes')
+CORS_ALLOW_ALL_ORIGINS = os.environ.get('CORS_ALLOW_ALL_ORIGINS', 'true').lower() in ('1', 'true', 'yes')
+# Comma-separated, used when CORS_ALLOW_ALL_ORIGINS is off
+CORS_ALLOWED_ORIGINS = [o for o in os.environ.get('CORS_ALLOWED_ORIGINS', '').split(',') if o]
+# Seconds browsers may reuse a preflight; Chromium caps it at 7200, Firefox at 86400
+CORS_PREFLIGHT_MAX_AGE = int(os.environ.get('CORS_PREFLIGHT_MAX_AGE', 7200))
 CORS_ALLOW_HEADERS = [
     'accept',
     'accept-language',
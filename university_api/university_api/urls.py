@@ -16,16 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenBlacklistView, TokenRefreshView
+from university_app.views import TokenObtainView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('university_app.urls')),
     # DRF login/logout views for browsable API (SessionAuthentication)
     path('api-auth/', include('rest_framework.urls')),
-    path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/auth/token/', TokenObtainView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/token/revoke/', TokenBlacklistView.as_view(), name='token_revoke'),
 ]
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Faculty, Administrator, Professor, Student, Subject, Grade
+from .models import (
+	Faculty, Administrator, Professor, Student, Subject, Grade, SubjectGradeStats, StudentGradeStats, RevokedToken,
+	UserTokenRevocation,
+)
 
 @admin.register(Faculty)
 class FacultyAdmin(admin.ModelAdmin):
@@ -31,3 +34,23 @@ class GradeAdmin(admin.ModelAdmin):
 	list_display = ("student", "subject", "professor", "grade", "updated_at")
 	list_filter = ("subject", "professor")
 	search_fields = ("student__user__username", "subject__code")
+
+
+@admin.register(SubjectGradeStats)
+class SubjectGradeStatsAdmin(admin.ModelAdmin):
+	list_display = ("subject", "count", "minimum", "maximum", "updated_at")
+
+
+@admin.register(StudentGradeStats)
+class StudentGradeStatsAdmin(admin.ModelAdmin):
+	list_display = ("student", "count", "minimum", "maximum", "updated_at")
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+	list_display = ("jti", "revoked_at", "expires_at")
+
+
+@admin.register(UserTokenRevocation)
+class UserTokenRevocationAdmin(admin.ModelAdmin):
+	list_display = ("user_id", "revoked_at", "expires_at")
@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .models import Grade, Professor, Subject
+
+CHUNK_SIZE = 20000
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Column of the loaded array holding each grouping key (column 0 is the grade)
+GROUPINGS = {
+	"subject": 1,
+	"professor": 2,
+	"enrollment_year": 3,
+}
+COLUMNS = (Cast("grade", FloatField()), "subject_id", "professor_id", "student__enrollment_year")
+
+
+def pass_mark_default():
+	return float(getattr(settings, "ANALYTICS_PASS_MARK", 50))
+
+
+def parse_group_by(value):
+	groups = [g.strip() for g in (value or ",".join(GROUPINGS)).split(",") if g.strip()]
+	unknown = sorted(set(groups) - set(GROUPINGS))
+	if unknown:
+		raise ValueError(f"Unknown group_by {', '.join(unknown)}; choose from {', '.join(GROUPINGS)}")
+	return groups
+
+
+def parse_percentiles(value):
+	if not value:
+		return DEFAULT_PERCENTILES
+	try:
+		percentiles = tuple(float(p) for p in value.split(","))
+	except ValueError:
+		raise ValueError("percentiles must be comma-separated numbers")
+	if not all(0 <= p <= 100 for p in percentiles):
+		raise ValueError("percentiles must be between 0 and 100")
+	return percentiles
+
+
+def parse_pass_mark(value):
+	"""Pass mark as a finite float, or None for the default"""
+	if value is None or value == "":
+		return None
+	try:
+		pass_mark = float(value)
+	except (TypeError, ValueError):
+		raise ValueError("pass_mark must be a number")
+	if not math.isfinite(pass_mark):
+		raise ValueError("pass_mark must be a finite number")
+	return pass_mark
+
+
+def load_grades(queryset):
+	"""(n, 4) float64 array of the non-null grades of `queryset`: grade, subject, professor, enrollment year
+
+	The grade is cast to float in SQL, so no Decimal is ever built; missing keys load as NaN.
+	"""
+	rows = queryset.filter(grade__isnull=False).order_by().values_list(*COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+	return np.fromiter(rows, dtype=np.dtype((np.float64, len(COLUMNS))))
+
+
+def _round(values):
+	return np.round(values, 4).tolist()
+
+
+def describe(grades, percentiles, pass_mark):
+	"""Statistics of a 1-D grade array"""
+	if grades.size == 0:
+		return {"count": 0, "mean": None, "stddev": None, "min": None, "max": None, "pass_rate": None, "percentiles": {}}
+	values = np.percentile(grades, percentiles)
+	return {
+		"count": int(grades.size),
+		"mean": round(float(grades.mean()), 4),
+		"stddev": round(float(grades.std()), 4),
+		"min": float(grades.min()),
+		"max": float(grades.max()),
+		"pass_rate": round(float((grades >= pass_mark).mean()), 4),
+		"percentiles": {f"p{p:g}": v for p, v in zip(percentiles, _round(values))},
+	}
+
+
+def grouped(grades, keys, percentiles, pass_mark):
+	"""Per-key statistics of `grades` in one sort, without a Python loop over rows
+
+	Keys are -1 where missing. Percentiles use linear interpolation like np.percentile.
+	"""
+	if grades.size == 0:
+		return []
+	order = np.lexsort((grades, keys))
+	grades, keys = grades[order], keys[order]
+	unique, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+	means = np.add.reduceat(grades, starts) / counts
+	deviations = grades - np.repeat(means, counts)
+	stddevs = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+	pass_rates = np.add.reduceat((grades >= pass_mark).astype(np.int64), starts) / counts
+	positions = starts[:, None] + (counts[:, None] - 1) * (np.asarray(percentiles, dtype=np.float64) / 100)
+	lower = np.floor(positions).astype(np.int64)
+	upper = np.ceil(positions).astype(np.int64)
+	quantiles = grades[lower] + (grades[upper] - grades[lower]) * (positions - lower)
+	names = [f"p{p:g}" for p in percentiles]
+	return [
+		{
+			"key": None if key < 0 else key,
+			"count": count,
+			"mean": mean,
+			"stddev": stddev,
+			"min": low,
+			"max": high,
+			"pass_rate": rate,
+			"percentiles": dict(zip(names, q)),
+		}
+		for key, count, mean, stddev, low, high, rate, q in zip(
+			unique.tolist(), counts.tolist(), _round(means), _round(stddevs), grades[starts].tolist(),
+			grades[starts + counts - 1].tolist(), _round(pass_rates), _round(quantiles),
+		)
+	]
+
+
+def _labels(group, keys):
+	if group == "subject":
+		return dict(Subject.objects.filter(pk__in=keys).values_list("pk", "code"))
+	if group == "professor":
+		return dict(Professor.objects.filter(pk__in=keys).values_list("pk", "user__username"))
+	return {}
+
+
+def grade_analytics(queryset, group_by=tuple(GROUPINGS), percentiles=DEFAULT_PERCENTILES, pass_mark=None):
+	"""Overall and grouped grade statistics of `queryset`
+
+	Each group also carries `mean_delta` against the overall mean, which makes the
+	enrollment-year groups a cohort comparison.
+	"""
+	pass_mark = pass_mark_default() if pass_mark is None else pass_mark
+	data = load_grades(queryset)
+	grades = data[:, 0]
+	overall = describe(grades, percentiles, pass_mark)
+	result = {"pass_mark": pass_mark, "overall": overall}
+	for group in group_by:
+		keys = np.nan_to_num(data[:, GROUPINGS[group]], nan=-1).astype(np.int64)
+		rows = grouped(grades, keys, percentiles, pass_mark)
+		labels = _labels(group, [row["key"] for row in rows if row["key"] is not None])
+		for row in rows:
+			row["label"] = labels.get(row["key"], row["key"])
+			row["mean_delta"] = round(row["mean"] - overall["mean"], 4)
+		result[f"by_{group}"] = rows
+	return result
+
+
+def faculty_analytics(faculty, **options):
+	return {"faculty_id": faculty.pk, **grade_analytics(Grade.objects.filter(subject__faculty=faculty), **options)}
@@ -6,6 +6,8 @@ class UniversityAppConfig(AppConfig):
     name = 'university_app'
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         # Seed initial Faculty entries using post_migrate signal
         from django.db.models.signals import post_migrate
         from django.dispatch import receiver
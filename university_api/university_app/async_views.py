@@ -0,0 +1,132 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.db.models import aprefetch_related_objects
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import RoleClaimsJWTAuthentication, aauthenticate
+from .models import Subject
+from .roles import STUDENT, aresolve_role
+from .views import GradeViewSet, MeViewSet, SubjectViewSet, profile_payload
+
+
+def json_response(data, status=200, headers=None):
+	return HttpResponse(JSONRenderer().render(data), status=status, headers=headers, content_type="application/json")
+
+
+def viewset_for(viewset_class, request, action):
+	"""ViewSet instance set up as dispatch() would, to reuse its queryset, paginator and serializers"""
+	return viewset_class(request=request, action=action, args=(), kwargs={}, format_kwarg=None)
+
+
+async def collect(queryset):
+	return [row async for row in queryset]
+
+
+async def fetch_page(view, queryset, request):
+	"""One keyset page, then the queryset's prefetch lookups concurrently
+
+	The lookups must not depend on each other (they may share select_related prefixes).
+	"""
+	lookups = queryset._prefetch_related_lookups
+	rows = await view.paginator.apaginate_queryset(queryset.prefetch_related(None), request, view)
+	await asyncio.gather(*(aprefetch_related_objects(rows, lookup) for lookup in lookups))
+	return rows
+
+
+def paginated_response(paginator, data):
+	result = paginator.get_paginated_response(data)
+	return json_response(result.data, headers={h: result[h] for h in ("Link",) if result.has_header(h)})
+
+
+class AsyncReadView(View):
+	"""GET endpoint for the ASGI server: bearer-token auth, JSON out, ORM calls awaited
+
+	Same payload and visibility as the `action` of `viewset_class` it mirrors, without the
+	response cache, ETags or session authentication. The ViewSet's permission and throttle
+	checks run first (they must answer safe methods without the ORM, as the current ones do);
+	subclasses then implement `async read(request, role, view)`.
+	"""
+
+	http_method_names = ["get", "head", "options"]
+	query_budgets = {}
+	viewset_class = None
+	action = None
+
+	async def get(self, request, *args, **kwargs):
+		try:
+			authenticated = await aauthenticate(request)
+			if authenticated is None:
+				raise NotAuthenticated()
+			user = authenticated[0]
+			request = Request(request)
+			request.user = user
+			view = viewset_for(self.viewset_class, request, self.action)
+			view.check_permissions(request)
+			view.check_throttles(request)
+			return await self.read(request, await aresolve_role(user), view)
+		except APIException as exc:
+			return self.handle_exception(exc, request)
+
+	def handle_exception(self, exc, request):
+		"""Same status, body and headers as DRF's exception handler gives `exc`"""
+		headers = {}
+		if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+			headers["WWW-Authenticate"] = RoleClaimsJWTAuthentication().authenticate_header(request)
+		if getattr(exc, "wait", None):
+			headers["Retry-After"] = str(int(exc.wait))
+		detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+		return json_response(detail, status=exc.status_code, headers=headers)
+
+
+class ProfileView(AsyncReadView):
+	"""GET /api/async/me/profile/: MeViewSet.profile"""
+
+	query_budgets = {"get": 2}
+	viewset_class, action = MeViewSet, "profile"
+
+	async def read(self, request, role, view):
+		user, profile = request.user, role.profile
+		if profile is not None and profile.get_deferred_fields():
+			profile = await type(profile).objects.select_related("user", "faculty").filter(pk=profile.pk).afirst()
+		if profile is not None:
+			user = profile.user
+		elif not isinstance(user, User):
+			user = await User.objects.aget(pk=user.pk)
+		return json_response(profile_payload(user, role, profile))
+
+
+class SubjectListView(AsyncReadView):
+	"""GET /api/async/subjects/: SubjectViewSet.list, including `view=summary` and keyset pages"""
+
+	query_budgets = {"get": 6}
+	viewset_class, action = SubjectViewSet, "list"
+
+	async def read(self, request, role, view):
+		page = fetch_page(view, view.filter_queryset(view.get_queryset()), request)
+		context = {"request": request, "format": None, "view": view}
+		if role.role == STUDENT:
+			# The page and the student's enrollments are independent lookups
+			enrolled = Subject.students.through.objects.filter(student=role.profile).values_list("subject_id", flat=True)
+			rows, subject_ids = await asyncio.gather(page, collect(enrolled))
+			context["enrolled_subject_ids"] = set(subject_ids)
+		else:
+			rows = await page
+		data = view.get_serializer_class()(rows, many=True, context=context).data
+		return paginated_response(view.paginator, data)
+
+
+class GradeListView(AsyncReadView):
+	"""GET /api/async/grades/: GradeViewSet.list"""
+
+	query_budgets = {"get": 5}
+	viewset_class, action = GradeViewSet, "list"
+
+	async def read(self, request, role, view):
+		rows = await fetch_page(view, view.filter_queryset(view.get_queryset()), request)
+		data = view.get_serializer_class()(rows, many=True, context={"request": request, "format": None, "view": view}).data
+		return paginated_response(view.paginator, data)
@@ -0,0 +1,149 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import Administrator, Professor, Student
+from .revocation import revocations
+from .roles import ADMINISTRATOR, NO_ROLE, PROFESSOR, STUDENT, UserRole, remember_role, resolve_role
+
+ROLE_CLAIMS = ("role", "profile_id", "faculty_id", "is_superuser", "is_staff")
+
+PROFILE_MODELS = {
+	ADMINISTRATOR: Administrator,
+	PROFESSOR: Professor,
+	STUDENT: Student,
+}
+
+
+def add_role_claims(token, user):
+	role = resolve_role(user)
+	token["role"] = role.role
+	token["profile_id"] = role.profile.pk if role.profile is not None else None
+	token["faculty_id"] = role.profile.faculty_id if role.profile is not None else None
+	token["is_superuser"] = user.is_superuser
+	token["is_staff"] = user.is_staff
+
+
+class RevocableMixin:
+	"""Refuses tokens in the revocation store; blacklist() adds this one to it
+
+	simplejwt's token blacklist view calls blacklist(), so it works without simplejwt's
+	token_blacklist app and its outstanding-token table.
+	"""
+
+	def verify(self):
+		super().verify()
+		if revocations.is_revoked(self.payload):
+			raise TokenError("Token is revoked")
+
+	def blacklist(self):
+		revocations.revoke(self.payload)
+
+
+class RoleAccessToken(RevocableMixin, AccessToken):
+	pass
+
+
+class RoleRefreshToken(RevocableMixin, RefreshToken):
+	"""Refresh token whose access tokens carry role claims resolved at issue time
+
+	The claims are never stored on the refresh token itself, so every refresh
+	re-resolves them and role changes are picked up within one access lifetime.
+	"""
+
+	access_token_class = RoleAccessToken
+	no_copy_claims = RefreshToken.no_copy_claims + ROLE_CLAIMS
+
+	@classmethod
+	def for_user(cls, user):
+		token = super().for_user(user)
+		token.user = user
+		return token
+
+	@property
+	def access_token(self):
+		access = super().access_token
+		user = getattr(self, "user", None)
+		if user is None:
+			user = User.objects.filter(**{api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]}).first()
+		if user is not None:
+			add_role_claims(access, user)
+		return access
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+	token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+	token_class = RoleRefreshToken
+
+	def validate(self, attrs):
+		data = super().validate(attrs)
+		if api_settings.ROTATE_REFRESH_TOKENS:
+			# The presented token is spent once rotated (BLACKLIST_AFTER_ROTATION needs token_blacklist)
+			self.token_class(attrs["refresh"], verify=False).blacklist()
+		return data
+
+
+class RoleTokenBlacklistSerializer(TokenBlacklistSerializer):
+	token_class = RoleRefreshToken
+
+
+def profile_from_claims(token):
+	"""Profile instance built from claims; non-claimed fields are deferred and load on access"""
+	model = PROFILE_MODELS.get(token.get("role"))
+	if model is None or token.get("profile_id") is None:
+		return None
+	return model.from_db(
+		router.db_for_read(model),
+		["id", "user_id", "faculty_id"],
+		[token["profile_id"], int(token[api_settings.USER_ID_CLAIM]), token.get("faculty_id")],
+	)
+
+
+class RoleClaimsJWTAuthentication(JWTAuthentication):
+	"""Trusts the role claims of access tokens instead of loading the user and probing profiles
+
+	Tokens issued without role claims fall back to the database lookup.
+	"""
+
+	def get_user(self, validated_token):
+		if "role" not in validated_token:
+			return super().get_user(validated_token)
+		user = TokenUser(validated_token)
+		remember_role(user, UserRole(
+			validated_token.get("role", NO_ROLE),
+			profile_from_claims(validated_token),
+			bool(validated_token.get("is_superuser")),
+		))
+		return user
+
+
+async def aauthenticate(request):
+	"""(user, token) for the bearer token of a plain Django request, None without one
+
+	Validation is CPU-only unless the revocation filter has to be rebuilt or matches
+	the token; only tokens issued without role claims load the user from the
+	database. Raises AuthenticationFailed like RoleClaimsJWTAuthentication.
+	"""
+	authenticator = RoleClaimsJWTAuthentication()
+	header = authenticator.get_header(request)
+	raw_token = authenticator.get_raw_token(header) if header is not None else None
+	if raw_token is None:
+		return None
+	try:
+		token = authenticator.get_validated_token(raw_token)
+	except SynchronousOnlyOperation:
+		# The revocation check needs the database: validate again off the event loop
+		token = await sync_to_async(authenticator.get_validated_token)(raw_token)
+	if "role" in token:
+		return authenticator.get_user(token), token
+	return await sync_to_async(authenticator.get_user)(token), token
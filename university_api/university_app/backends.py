@@ -0,0 +1,108 @@
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from rest_framework.exceptions import Throttled
+
+from .hashers import verify
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hash_pool():
+	"""Process pool for password hashing, started on first use; None when LOGIN_HASH_WORKERS is 0"""
+	global _pool
+	workers = getattr(settings, "LOGIN_HASH_WORKERS", 0)
+	if workers <= 0:
+		return None
+	with _pool_lock:
+		if _pool is None:
+			# spawn, not fork: a forked copy of a threaded server can inherit locks held by other threads
+			_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+		return _pool
+
+
+def offload(fn, *args):
+	"""fn(*args) in the hash pool, or inline without one; a crashed pool is replaced on the next call"""
+	global _pool
+	pool = hash_pool()
+	if pool is None:
+		return fn(*args)
+	try:
+		return pool.submit(fn, *args).result()
+	except BrokenProcessPool:
+		with _pool_lock:
+			if _pool is pool:
+				_pool = None
+		return fn(*args)
+
+
+class LoginQueue:
+	"""Admission control for logins: at most LOGIN_QUEUE_SIZE in flight per process
+
+	Requests beyond that are refused at once with a Retry-After estimate (Throttled, 429)
+	instead of queueing behind the hash pool until the client times out.
+	"""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.in_flight = 0
+		# Moving average of admitted logins, for Retry-After
+		self.average = 0.1
+
+	@contextmanager
+	def admit(self):
+		with self.lock:
+			if self.in_flight >= getattr(settings, "LOGIN_QUEUE_SIZE", 16):
+				raise Throttled(wait=self.retry_after())
+			self.in_flight += 1
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			with self.lock:
+				self.in_flight -= 1
+				self.average = 0.8 * self.average + 0.2 * (time.perf_counter() - start)
+
+	def retry_after(self):
+		"""Seconds until the logins ahead have drained through the pool"""
+		workers = max(getattr(settings, "LOGIN_HASH_WORKERS", 0), 1)
+		return max(1, math.ceil(self.average * self.in_flight / workers))
+
+
+login_queue = LoginQueue()
+
+
+class PooledModelBackend(ModelBackend):
+	"""ModelBackend whose password check, and re-hash of outdated hashes, runs in the hash pool"""
+
+	def authenticate(self, request, username=None, password=None, **kwargs):
+		user_model = get_user_model()
+		if username is None:
+			username = kwargs.get(user_model.USERNAME_FIELD)
+		if username is None or password is None:
+			return None
+		try:
+			user = user_model._default_manager.get_by_natural_key(username)
+		except user_model.DoesNotExist:
+			# Hash anyway, so response times do not tell which usernames exist
+			offload(make_password, password)
+			return None
+		encoded = user.password
+		valid, upgraded = offload(verify, password, encoded)
+		if valid and upgraded:
+			# An update, not user.save(): a new hash must not bump the cached catalogue versions
+			user_model._default_manager.filter(pk=user.pk, password=encoded).update(password=upgraded)
+			user.password = upgraded
+		if valid and self.user_can_authenticate(user):
+			return user
+		return None
@@ -0,0 +1,128 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import response
+
+from .roles import resolve_role
+from .routing import replica_may_lag
+
+VERSION_KEY = "university:version:{}"
+RESPONSE_KEY = "university:response:{}:{}:{}:{}"
+STATS_KEY = "university:cache-stats:{}:{}"
+
+
+def get_cache():
+	return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def cache_is_shared():
+	"""False for per-process backends, whose version counters the other workers never see"""
+	return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def model_label(model):
+	return model._meta.label_lower
+
+
+def _fresh_version():
+	# Never restart at 1: an evicted counter must not revive entries cached under an old version
+	return time.time_ns()
+
+
+def get_versions(labels):
+	cache = get_cache()
+	keys = [VERSION_KEY.format(label) for label in labels]
+	versions = cache.get_many(keys)
+	for key in keys:
+		if key not in versions:
+			cache.add(key, _fresh_version(), None)
+			versions[key] = cache.get(key)
+	return [versions[key] for key in keys]
+
+
+def bump_versions(*models):
+	"""Invalidate every cached response depending on any of `models`"""
+	cache = get_cache()
+	for model in models:
+		key = VERSION_KEY.format(model_label(model))
+		try:
+			cache.incr(key)
+		except ValueError:
+			cache.set(key, _fresh_version(), None)
+
+
+def invalidate_labels(labels):
+	"""Invalidate entries keyed on the versions of `labels`, in one round trip
+
+	Dropping a counter is as good as bumping it: the next reader starts it afresh.
+	"""
+	get_cache().delete_many([VERSION_KEY.format(label) for label in labels])
+
+
+def record(view_name, outcome):
+	cache = get_cache()
+	key = STATS_KEY.format(view_name, outcome)
+	try:
+		cache.incr(key)
+	except ValueError:
+		if not cache.add(key, 1, None):
+			cache.incr(key)
+
+
+def cache_stats(views):
+	cache = get_cache()
+	stats = {}
+	for name in (view.__name__ for view in views):
+		hits = cache.get(STATS_KEY.format(name, "hit"), 0)
+		misses = cache.get(STATS_KEY.format(name, "miss"), 0)
+		total = hits + misses
+		stats[name] = {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 4) if total else None}
+	return stats
+
+
+class CachedListMixin:
+	"""Caches list payloads per role and query string, keyed on the versions of `cache_dependencies`
+
+	Versions are bumped by the model signals in signals.py, so a write to any
+	dependency makes every previously cached page unreachable.
+	"""
+
+	cache_dependencies = ()
+
+	def cache_role(self, request):
+		"""Role segment of the cache key, or None to bypass the cache"""
+		role = resolve_role(request.user)
+		return "administrator" if role.is_admin else role.role
+
+	def list_cache_key(self, request):
+		role = self.cache_role(request)
+		if role is None:
+			return None
+		labels = [model_label(model) for model in self.cache_dependencies]
+		versions = ".".join(str(v) for v in get_versions(labels))
+		query = hashlib.md5(urlencode(sorted(request.query_params.lists()), doseq=True).encode()).hexdigest()
+		return RESPONSE_KEY.format(type(self).__name__, role, versions, query)
+
+	def list(self, request, *args, **kwargs):
+		key = self.list_cache_key(request)
+		if key is None:
+			return super().list(request, *args, **kwargs)
+		cache = get_cache()
+		name = type(self).__name__
+		cached = cache.get(key)
+		if cached is not None:
+			record(name, "hit")
+			data, headers = cached
+			return response.Response(data, headers={**headers, "X-Cache": "HIT"})
+		record(name, "miss")
+		result = super().list(request, *args, **kwargs)
+		if result.status_code == 200 and not replica_may_lag(self.cache_dependencies):
+			headers = {h: result[h] for h in ("Link",) if result.has_header(h)}
+			cache.set(key, (result.data, headers), getattr(settings, "RESPONSE_CACHE_TTL", 300))
+		result["X-Cache"] = "MISS"
+		return result
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .caching import get_cache, get_versions, invalidate_labels, model_label
+from .models import Faculty, Grade, Professor, Student, Subject
+from .roles import STUDENT
+from .routing import replica_may_lag
+from .serializer import CompactGradeSerializer, CompactSubjectSerializer, StudentSerializer, UserSerializer
+
+DASHBOARD_KEY = "university:dashboard:{}:{}"
+# Faculty and professor names shown on every dashboard; the bulk loaders bump these as well.
+# The student's own rows invalidate only their snapshot (signals.py)
+DASHBOARD_DEPENDENCIES = (Faculty, Professor)
+# User columns on the dashboard: saves touching only others (e.g. last_login) keep the snapshot
+DASHBOARD_USER_FIELDS = frozenset(UserSerializer.Meta.fields)
+
+
+def student_label(student_id):
+	return f"dashboard:student:{student_id}"
+
+
+def invalidate_dashboards(student_ids):
+	"""Drop the cached dashboards of `student_ids` after their grades or enrollments changed
+
+	Again on commit, so a snapshot rebuilt from the rows before the commit is dropped too.
+	"""
+	labels = [student_label(student_id) for student_id in set(student_ids) if student_id is not None]
+	if labels:
+		invalidate_labels(labels)
+		transaction.on_commit(lambda: invalidate_labels(labels))
+
+
+def build_dashboard(student):
+	"""Profile, enrolled subjects and grades of `student` in three queries"""
+	student = Student.objects.select_related("user", "faculty").get(pk=student.pk)
+	subjects = Subject.objects.filter(students=student).select_related("faculty", "professor__user").order_by("code")
+	grades = Grade.objects.filter(student=student).order_by("subject_id")
+	return {
+		"user": UserSerializer(student.user).data,
+		"role": STUDENT,
+		"profile": StudentSerializer(student).data,
+		"subjects": CompactSubjectSerializer(subjects, many=True).data,
+		"grades": CompactGradeSerializer(grades, many=True).data,
+	}
+
+
+def student_dashboard(student):
+	"""(dashboard payload, served from the cache) for `student`
+
+	Snapshots are keyed on the student's own version, invalidated by signals.py when
+	their profile, grades or enrollments change, and on the versions of DASHBOARD_DEPENDENCIES.
+	"""
+	labels = [model_label(model) for model in DASHBOARD_DEPENDENCIES] + [student_label(student.pk)]
+	key = DASHBOARD_KEY.format(student.pk, ".".join(str(v) for v in get_versions(labels)))
+	cache = get_cache()
+	data = cache.get(key)
+	if data is not None:
+		return data, True
+	data = build_dashboard(student)
+	if not replica_may_lag((*DASHBOARD_DEPENDENCIES, Student, User, Subject, Grade)):
+		cache.set(key, data, getattr(settings, "DASHBOARD_CACHE_TTL", 300))
+	return data, False
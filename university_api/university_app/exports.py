@@ -0,0 +1,70 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+	"csv": "text/csv",
+	"ndjson": "application/x-ndjson",
+}
+
+GRADE_COLUMNS = (
+	("id", "id"),
+	("subject_id", "subject_id"),
+	("subject_code", "subject__code"),
+	("student_id", "student_id"),
+	("username", "student__user__username"),
+	("first_name", "student__user__first_name"),
+	("last_name", "student__user__last_name"),
+	("grade", "grade"),
+	("notes", "notes"),
+	("updated_at", "updated_at"),
+)
+
+ROSTER_COLUMNS = (
+	("student_id", "id"),
+	("username", "user__username"),
+	("first_name", "user__first_name"),
+	("last_name", "user__last_name"),
+	("email", "user__email"),
+	("faculty", "faculty__name"),
+	("enrollment_year", "enrollment_year"),
+)
+
+
+class _Echo:
+	"""File-like object whose write() hands the formatted line back to the generator"""
+
+	def write(self, value):
+		return value
+
+
+def _csv_lines(names, rows):
+	writer = csv.writer(_Echo())
+	yield writer.writerow(names)
+	for row in rows:
+		yield writer.writerow(row)
+
+
+def _ndjson_lines(names, rows):
+	encoder = DjangoJSONEncoder(separators=(",", ":"))
+	for row in rows:
+		yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+def stream_export(queryset, columns, output, filename):
+	"""Stream `queryset` as CSV/NDJSON straight from values_list(), without serializers"""
+	names = [name for name, _ in columns]
+	rows = queryset.values_list(*(path for _, path in columns)).iterator(chunk_size=CHUNK_SIZE)
+	lines = _ndjson_lines(names, rows) if output == "ndjson" else _csv_lines(names, rows)
+	response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[output])
+	response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+	return response
+
+
+def export_format(request):
+	"""Requested `?output=` format, or None if unsupported (defaults to CSV)"""
+	output = request.query_params.get("output", "csv")
+	return output if output in CONTENT_TYPES else None
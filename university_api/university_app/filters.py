@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def integer(raw):
+	"""int that fits an integer column; larger values would overflow in the database driver"""
+	value = int(raw)
+	low, high = connection.ops.integer_field_range("BigIntegerField")
+	if not low <= value <= high:
+		raise ValueError(raw)
+	return value
+
+
+def decimal(raw):
+	"""Finite Decimal: NaN and Infinity are not comparable to a column"""
+	value = Decimal(raw)
+	if not value.is_finite():
+		raise ValueError(raw)
+	return value
+
+
+class Filter:
+	"""Query parameter applied as `filter(<lookup>=parse(value))`"""
+
+	def __init__(self, lookup, parse=integer):
+		self.lookup = lookup
+		self.parse = parse
+
+	def apply(self, queryset, value):
+		return queryset.filter(**{self.lookup: value})
+
+
+class PrefixFilter(Filter):
+	"""Case-sensitive prefix match written as a range, so the column's index serves it
+
+	`__startswith` compiles to LIKE, which SQLite cannot answer from an ordinary index.
+	"""
+
+	def __init__(self, field):
+		super().__init__(field, str)
+
+	def apply(self, queryset, value):
+		return queryset.filter(**{f"{self.lookup}__gte": value, f"{self.lookup}__lt": value + "\U0010ffff"})
+
+
+class DeclaredFilterBackend(BaseFilterBackend):
+	"""Applies the view's `query_filters` ({query parameter: Filter}); unparsable values are a 400"""
+
+	def filter_queryset(self, request, queryset, view):
+		for param, declared in getattr(view, "query_filters", {}).items():
+			raw = request.query_params.get(param)
+			if raw is None or raw == "":
+				continue
+			try:
+				value = declared.parse(raw)
+			except (TypeError, ValueError, ArithmeticError):
+				raise ValidationError({"error": f"Invalid {param}: {raw}"})
+			queryset = declared.apply(queryset, value)
+		return queryset
+
+
+class SearchFilterBackend(BaseFilterBackend):
+	"""`?search=` through the view's `search_index` (search.py), joined on its `search_field`"""
+
+	search_param = "search"
+
+	def filter_queryset(self, request, queryset, view):
+		index = getattr(view, "search_index", None)
+		text = request.query_params.get(self.search_param, "").strip()
+		if index is None or not text:
+			return queryset
+		return queryset.filter(**{f"{view.search_field}__in": index.matching(text, queryset.db)})
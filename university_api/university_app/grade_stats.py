@@ -0,0 +1,173 @@
+import math
+from collections import defaultdict
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+
+from .models import HISTOGRAM_BUCKETS, HISTOGRAM_WIDTH, Grade, StudentGradeStats, SubjectGradeStats, empty_histogram
+
+
+class GradeChange(NamedTuple):
+	"""One grade row moving from `old` to `new` (None = absent or ungraded)"""
+	subject_id: int
+	student_id: int
+	old: Optional[Decimal]
+	new: Optional[Decimal]
+
+
+STAT_COLUMNS = ["count", "total", "total_squares", "minimum", "maximum", "histogram", "updated_at"]
+BATCH_SIZE = 1000
+
+SCOPES = (
+	(SubjectGradeStats, "subject_id"),
+	(StudentGradeStats, "student_id"),
+)
+
+
+def _decimal(value):
+	# Same quantization as the stored Grade.grade column
+	return None if value is None else Decimal(str(value)).quantize(Decimal("0.01"))
+
+
+def bucket(value):
+	return min(max(int(value // HISTOGRAM_WIDTH), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def _apply_values(row, removed, added):
+	"""Fold removals/additions into `row`; returns True if min/max must be recomputed from grades"""
+	stale_bounds = False
+	histogram = list(row.histogram)
+	for value in removed:
+		row.count -= 1
+		row.total -= value
+		row.total_squares -= value * value
+		histogram[bucket(value)] -= 1
+		if value == row.minimum or value == row.maximum:
+			stale_bounds = True
+	for value in added:
+		row.count += 1
+		row.total += value
+		row.total_squares += value * value
+		histogram[bucket(value)] += 1
+		if not stale_bounds:
+			row.minimum = value if row.minimum is None else min(row.minimum, value)
+			row.maximum = value if row.maximum is None else max(row.maximum, value)
+	row.histogram = histogram
+	if row.count == 0:
+		row.minimum = row.maximum = None
+		return False
+	return stale_bounds
+
+
+def apply_changes(changes):
+	"""Incrementally update subject and student statistics for a batch of grade changes
+
+	One locking read and one bulk write per scope, whatever the batch size; min/max
+	are re-read from Grade, in one grouped query, only for groups that lost their
+	current extreme value.
+	"""
+	changes = [
+		GradeChange(c.subject_id, c.student_id, _decimal(c.old), _decimal(c.new))
+		for c in changes
+	]
+	changes = [c for c in changes if c.old != c.new]
+	if not changes:
+		return
+	with transaction.atomic():
+		for model, key in SCOPES:
+			deltas = defaultdict(lambda: ([], []))
+			for change in changes:
+				removed, added = deltas[getattr(change, key)]
+				if change.old is not None:
+					removed.append(change.old)
+				if change.new is not None:
+					added.append(change.new)
+			rows = model.objects.select_for_update().in_bulk(list(deltas))
+			changed, stale = [], []
+			for pk, (removed, added) in deltas.items():
+				row = rows.get(pk)
+				if row is None:
+					if not added:
+						# Nothing to subtract from (e.g. cascade delete of the parent): leave it absent
+						continue
+					row = model(pk=pk, histogram=empty_histogram())
+				changed.append(row)
+				if _apply_values(row, removed, added):
+					stale.append(row)
+			if stale:
+				bounds = {
+					group[key]: (group["lo"], group["hi"])
+					for group in Grade.objects.filter(**{f"{key}__in": [row.pk for row in stale]}, grade__isnull=False)
+					.order_by()
+					.values(key)
+					.annotate(lo=Min("grade"), hi=Max("grade"))
+				}
+				for row in stale:
+					row.minimum, row.maximum = bounds.get(row.pk, (None, None))
+			# One INSERT .. ON CONFLICT for new and existing rows; bulk_update's CASE per row is far slower
+			model.objects.bulk_create(
+				changed,
+				update_conflicts=True,
+				unique_fields=[model._meta.pk.name],
+				update_fields=STAT_COLUMNS,
+				batch_size=BATCH_SIZE,
+			)
+
+
+def summarize(stats):
+	"""API representation of a stats row (or None)"""
+	if stats is None or stats.count == 0:
+		return {"count": 0, "mean": None, "stddev": None, "min": None, "max": None, "histogram": _histogram(empty_histogram())}
+	mean = stats.total / stats.count
+	variance = max(stats.total_squares / stats.count - mean * mean, Decimal(0))
+	return {
+		"count": stats.count,
+		"mean": round(float(mean), 4),
+		"stddev": round(math.sqrt(variance), 4),
+		"min": stats.minimum,
+		"max": stats.maximum,
+		"histogram": _histogram(stats.histogram),
+	}
+
+
+def _histogram(counts):
+	return [
+		{"from": i * HISTOGRAM_WIDTH, "to": (i + 1) * HISTOGRAM_WIDTH if i < HISTOGRAM_BUCKETS - 1 else None, "count": c}
+		for i, c in enumerate(counts)
+	]
+
+
+def compute_all(model, key):
+	"""Recompute every stats row of one scope with a single grouped aggregate query"""
+	buckets = {}
+	for i in range(HISTOGRAM_BUCKETS):
+		# Open-ended first and last buckets, matching bucket()
+		condition = Q()
+		if i > 0:
+			condition &= Q(grade__gte=i * HISTOGRAM_WIDTH)
+		if i < HISTOGRAM_BUCKETS - 1:
+			condition &= Q(grade__lt=(i + 1) * HISTOGRAM_WIDTH)
+		buckets[f"b{i}"] = Count("pk", filter=condition)
+	total_field = model._meta.get_field("total")
+	squares_field = model._meta.get_field("total_squares")
+	rows = (
+		Grade.objects.filter(grade__isnull=False).order_by().values(key)
+		.annotate(
+			count=Count("pk"),
+			total=Sum("grade", output_field=total_field),
+			total_squares=Sum(F("grade") * F("grade"), output_field=squares_field),
+			minimum=Min("grade"),
+			maximum=Max("grade"),
+			**buckets,
+		)
+	)
+	result = {}
+	for row in rows.iterator(chunk_size=5000):
+		histogram = [row[f"b{i}"] for i in range(HISTOGRAM_BUCKETS)]
+		result[row[key]] = model(
+			pk=row[key], count=row["count"], total=row["total"], total_squares=row["total_squares"],
+			minimum=row["minimum"], maximum=row["maximum"], histogram=histogram,
+		)
+	return result
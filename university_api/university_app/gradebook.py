@@ -0,0 +1,36 @@
+from .models import Grade, Subject
+
+ROSTER_FIELDS = ("student_id", "student__user__username", "student__user__first_name", "student__user__last_name")
+
+
+def gradebook_columns(subject):
+	"""Roster and grades of `subject` (a dict with id/code/title) as aligned columns
+
+	One query for the roster, one for the grades; every column holds one entry per
+	enrolled student, in roster order, with null where no grade has been given yet.
+	"""
+	roster = (
+		Subject.students.through.objects.filter(subject_id=subject["id"])
+		.order_by("student__user__last_name", "student__user__first_name", "student__user__username")
+		.values_list(*ROSTER_FIELDS)
+	)
+	ids, usernames, names = [], [], []
+	for student_id, username, first_name, last_name in roster:
+		ids.append(student_id)
+		usernames.append(username)
+		names.append(f"{first_name} {last_name}".strip() or username)
+	graded = {
+		student_id: (grade, notes)
+		for student_id, grade, notes in Grade.objects.filter(subject_id=subject["id"]).values_list("student_id", "grade", "notes")
+	}
+	missing = (None, None)
+	entries = [graded.get(student_id, missing) for student_id in ids]
+	return {
+		"subject": subject,
+		"student_ids": ids,
+		"usernames": usernames,
+		"names": names,
+		# Decimal strings, as GradeSerializer renders them
+		"grades": [None if grade is None else str(grade) for grade, _ in entries],
+		"notes": [notes for _, notes in entries],
+	}
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, BCryptSHA256PasswordHasher, check_password, make_password
+
+# Imported by the login process pool's workers: keep models (and the app registry) out of this module
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+	"""Argon2id with the ARGON2_* cost settings; same `argon2` algorithm, so Django's own hashes verify"""
+
+	@property
+	def time_cost(self):
+		return getattr(settings, "ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+	@property
+	def memory_cost(self):
+		return getattr(settings, "ARGON2_MEMORY_COST_KIB", Argon2PasswordHasher.memory_cost)
+
+	@property
+	def parallelism(self):
+		return getattr(settings, "ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+	"""bcrypt (SHA-256 pre-hashed) with BCRYPT_ROUNDS work factor"""
+
+	@property
+	def rounds(self):
+		return getattr(settings, "BCRYPT_ROUNDS", BCryptSHA256PasswordHasher.rounds)
+
+
+def verify(password, encoded):
+	"""(password matches `encoded`, new hash if `encoded` is outdated or not the preferred hasher, else None)"""
+	upgraded = []
+	valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+	return valid, upgraded[0] if upgraded else None
@@ -0,0 +1,66 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+_IN_LIST = re.compile(r"\((?:%s, )*%s\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+# Recorder of the request being served; context variables follow it into the async ORM's threads
+current_recorder = ContextVar("university_query_recorder", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+	"""A view action ran more queries than its `query_budgets` entry allows"""
+
+
+def fingerprint(sql):
+	"""Statement shape with parameter lists and inlined numbers folded, so N+1 repeats collapse"""
+	sql = _IN_LIST.sub("(...)", sql)
+	sql = _NUMBER.sub("?", sql)
+	return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+	"""connection.execute_wrapper collecting query count, SQL time and statement fingerprints for one request"""
+
+	def __init__(self):
+		self.count = 0
+		self.duration = 0.0
+		self.fingerprints = Counter()
+		self.endpoint = None
+		self.budget = None
+		self.render_started = None
+		self.render_duration = 0.0
+
+	def __call__(self, execute, sql, params, many, context):
+		start = time.perf_counter()
+		try:
+			return execute(sql, params, many, context)
+		finally:
+			self.duration += time.perf_counter() - start
+			self.count += 1
+			self.fingerprints[fingerprint(sql)] += 1
+
+	def repeated(self, threshold):
+		"""(fingerprint, count) of statements run at least `threshold` times: likely N+1 loops"""
+		return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+def record_queries(execute, sql, params, many, context):
+	"""Execute wrapper installed on every connection (signals.py), feeding current_recorder"""
+	recorder = current_recorder.get()
+	if recorder is None:
+		return execute(sql, params, many, context)
+	return recorder(execute, sql, params, many, context)
+
+
+def view_endpoint(view_func, method):
+	"""("View.action", declared query budget or None) for a resolved ViewSet or class-based view"""
+	cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+	if cls is None:
+		return getattr(view_func, "__name__", "view"), None
+	action = (getattr(view_func, "actions", None) or {}).get(method.lower(), method.lower())
+	return f"{cls.__name__}.{action}", getattr(cls, "query_budgets", {}).get(action)
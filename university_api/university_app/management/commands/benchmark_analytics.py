@@ -0,0 +1,102 @@
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from university_app.analytics import DEFAULT_PERCENTILES, faculty_analytics, pass_mark_default
+from university_app.models import Grade
+from university_app.synthetic import generate
+
+
+def _percentile(ordered, p):
+    position = (len(ordered) - 1) * p / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def naive_analytics(faculty, pass_mark):
+    """The per-instance ORM loop the vectorized module replaces"""
+    groups = {"subject": defaultdict(list), "professor": defaultdict(list), "enrollment_year": defaultdict(list)}
+    for grade in Grade.objects.filter(subject__faculty=faculty, grade__isnull=False).select_related("student"):
+        value = float(grade.grade)
+        groups["subject"][grade.subject_id].append(value)
+        groups["professor"][grade.professor_id].append(value)
+        groups["enrollment_year"][grade.student.enrollment_year].append(value)
+    result = {}
+    for name, buckets in groups.items():
+        rows = {}
+        for key, values in buckets.items():
+            values.sort()
+            mean = sum(values) / len(values)
+            rows[key] = {
+                "count": len(values),
+                "mean": mean,
+                "stddev": math.sqrt(sum((v - mean) ** 2 for v in values) / len(values)),
+                "pass_rate": sum(v >= pass_mark for v in values) / len(values),
+                "percentiles": [_percentile(values, p) for p in DEFAULT_PERCENTILES],
+            }
+        result[name] = rows
+    return result
+
+
+class Command(BaseCommand):
+    help = "Time vectorized faculty analytics against a naive ORM loop on a synthetic dataset (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grades", type=int, default=1_000_000)
+        parser.add_argument("--subjects", type=int, default=250)
+        parser.add_argument("--professors", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--skip-naive", action="store_true", help="Only time the vectorized path")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["grades"] < options["subjects"]:
+            raise CommandError("--grades must be at least --subjects")
+        with transaction.atomic():
+            start = time.perf_counter()
+            faculty = self.create_dataset(options)
+            self.stdout.write(f"dataset: {options['grades']:,} grades in {time.perf_counter() - start:.1f}s")
+
+            pass_mark = pass_mark_default()
+            start = time.perf_counter()
+            fast = faculty_analytics(faculty, pass_mark=pass_mark)
+            vectorized = time.perf_counter() - start
+            self.stdout.write(f"vectorized: {vectorized:.2f}s")
+            if not options["skip_naive"]:
+                start = time.perf_counter()
+                slow = naive_analytics(faculty, pass_mark)
+                naive = time.perf_counter() - start
+                self.stdout.write(f"naive ORM loop: {naive:.2f}s ({naive / vectorized:.1f}x slower)")
+                self.compare(fast, slow)
+            transaction.set_rollback(True)
+
+    def create_dataset(self, options):
+        # One faculty where every student takes every subject
+        per_subject = options["grades"] // options["subjects"]
+        dataset = generate(
+            faculties=1,
+            subjects=options["subjects"],
+            students=per_subject,
+            students_per_subject=per_subject,
+            professors=options["professors"],
+            admins=0,
+            grade_rate=1,
+            seed=options["seed"],
+            prefix=f"analytics{int(time.time())}",
+            batch_size=options["batch_size"],
+        )
+        return dataset.faculties[0]
+
+    def compare(self, fast, slow):
+        for name, rows in slow.items():
+            for row in fast[f"by_{name}"]:
+                expected = rows[row["key"]]
+                actual = [row["count"], row["mean"], row["stddev"], row["pass_rate"], *row["percentiles"].values()]
+                wanted = [expected["count"], expected["mean"], expected["stddev"], expected["pass_rate"], *expected["percentiles"]]
+                if not np.allclose(actual, wanted, atol=1e-3):
+                    raise CommandError(f"{name}={row['key']}: vectorized {actual} != naive {wanted}")
+        self.stdout.write(self.style.SUCCESS("results match"))
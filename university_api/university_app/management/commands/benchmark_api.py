@@ -0,0 +1,269 @@
+import itertools
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from university_app.authentication import RoleRefreshToken
+from university_app.caching import bump_versions
+from university_app.models import Faculty, Grade, Professor, Student, Subject
+from university_app.synthetic import generate
+from university_app.urls import router
+from university_app.views import SubjectViewSet
+
+ROLES = ("admin", "professor", "student")
+
+# Routes that require a query string: {param: viewset whose first visible object fills it}
+ROUTE_PARAMS = {
+    "grade-by-subject": {"subject_id": SubjectViewSet},
+    "grade-gradebook": {"subject_id": SubjectViewSet},
+}
+
+
+def grade_update(user):
+    """PATCH one of the professor's grades to a new value each time"""
+    grade = Grade.objects.filter(subject__professor__user=user).order_by("pk").values_list("pk", flat=True).first()
+    if grade is None:
+        return None
+    url = reverse("grade-detail", kwargs={"pk": grade})
+    return lambda i: (url, {"grade": f"{50 + i % 50}.00"})
+
+
+def grade_bulk(user):
+    """Re-grade the whole roster of one of the professor's subjects each time"""
+    subject = Subject.objects.filter(professor__user=user).order_by("pk").first()
+    students = list(subject.students.order_by("pk").values_list("pk", flat=True)) if subject else []
+    if not students:
+        return None
+    url = reverse("grade-bulk")
+    return lambda i: (url, {
+        "subject_id": subject.pk,
+        "grades": [{"student_id": pk, "grade": f"{(i + n) % 100}.00"} for n, pk in enumerate(students)],
+    })
+
+
+def enrollment(user):
+    """Enroll the student in a subject they are not in yet, a different one each time while they last"""
+    subjects = list(Subject.objects.exclude(students__user=user).order_by("pk").values_list("pk", flat=True)[:500])
+    if not subjects:
+        return None
+    return lambda i: (reverse("subject-enroll", kwargs={"pk": subjects[i % len(subjects)]}), {})
+
+
+# Write routes measured for one role each: (route name, method, role, request builder). A builder
+# takes the role's user and returns a function of the request number giving (url, body), or None.
+# POST grade-list cannot create a grade (GradeSerializer has `subject` read-only), so single-grade
+# writes are measured through PATCH.
+WRITE_ROUTES = (
+    ("grade-detail", "patch", "professor", grade_update),
+    ("grade-bulk", "post", "professor", grade_bulk),
+    ("subject-enroll", "post", "student", enrollment),
+)
+
+
+def sample_pk(viewset, action, user):
+    """Id of an object `user` can see through `viewset` for `action` (their own profile first), or None"""
+    view = viewset()
+    request = Request(APIRequestFactory().get("/"))
+    request.user = user
+    view.request, view.action, view.kwargs, view.format_kwarg = request, action, {}, None
+    queryset = view.get_queryset().order_by()
+    if any(field.name == "user" for field in queryset.model._meta.fields):
+        own = queryset.filter(user=user).values_list("pk", flat=True).first()
+        if own is not None:
+            return own
+    return queryset.values_list("pk", flat=True).first()
+
+
+def routes():
+    """(name, viewset, {http method: action}, url kwargs) for every route of the app router"""
+    for pattern in router.urls:
+        kwargs = list(pattern.pattern.regex.groupindex)
+        if "format" in kwargs:
+            continue
+        callback = pattern.callback
+        actions = getattr(callback, "actions", None) or {"get": "list"}
+        yield pattern.name, getattr(callback, "cls", None), actions, kwargs
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every GET route of the API per role, plus the grade and enrollment writes, on a synthetic "
+        "dataset (rolled back) and record p50/p95 latency, queries per request and peak memory as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="benchmark-api.json", help="JSON results file")
+        parser.add_argument("--baseline", help="Earlier results file to compare against")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 slowdown vs the baseline (0.2 = 20%%)")
+        parser.add_argument("--fail-on-regression", action="store_true")
+        parser.add_argument("--requests", type=int, default=20, help="Timed requests per route and role")
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--faculties", type=int, default=4)
+        parser.add_argument("--subjects", type=int, default=200)
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--students-per-subject", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+            dataset = generate(
+                faculties=options["faculties"],
+                subjects=options["subjects"],
+                students=options["students"],
+                students_per_subject=options["students_per_subject"],
+                seed=options["seed"],
+                prefix=f"bench{int(time.time())}",
+            )
+            results = []
+            for role in ROLES:
+                results.extend(self.run_role(role, getattr(dataset, role), options))
+            transaction.set_rollback(True)
+        # Cached responses were built from rolled-back rows: make them unreachable
+        bump_versions(Faculty, User, Professor, Student, Subject)
+
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "dataset": {
+                "faculties": len(dataset.faculties),
+                "professors": dataset.professors,
+                "students": dataset.students,
+                "subjects": dataset.subjects,
+                "enrollments": dataset.enrollments,
+                "grades": dataset.grades,
+            },
+            "requests": options["requests"],
+            "results": results,
+        }
+        with open(options["output"], "w") as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+        if options["baseline"]:
+            regressions = self.compare(report, options["baseline"], options["tolerance"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{regressions} routes regressed against {options['baseline']}")
+
+    def run_role(self, role, user, options):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+        self.stdout.write(f"\n{role}: {user.username}")
+        self.stdout.write(f"{'route':<28} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'peak KiB':>9}")
+        for name, viewset, actions, kwargs in routes():
+            result = {"role": role, "route": name}
+            if "get" not in actions:
+                result["skipped"] = f"no GET ({', '.join(sorted(actions)).upper()} only)"
+                yield result
+                continue
+            url_kwargs = {}
+            if "pk" in kwargs:
+                pk = sample_pk(viewset, actions["get"], user)
+                if pk is None:
+                    result["skipped"] = "no visible object"
+                    yield result
+                    continue
+                url_kwargs["pk"] = pk
+            url = reverse(name, kwargs=url_kwargs)
+            params = {key: sample_pk(source, "list", user) for key, source in ROUTE_PARAMS.get(name, {}).items()}
+            if params:
+                url = f"{url}?{urlencode(params)}"
+            result.update(url=url, **self.measure(lambda: self.fetch(client, url), options["requests"], options["warmup"]))
+            yield self.report_row(name, result)
+        for name, method, write_role, builder in WRITE_ROUTES:
+            if write_role != role:
+                continue
+            result = {"role": role, "route": f"{name} {method.upper()}"}
+            build = builder(user)
+            if build is None:
+                result["skipped"] = "nothing to write to"
+                yield result
+                continue
+            numbers = itertools.count()
+            result.update(url=build(0)[0], **self.measure(
+                lambda: self.send(client, method, *build(next(numbers))), options["requests"], options["warmup"]
+            ))
+            yield self.report_row(result["route"], result)
+
+    def report_row(self, name, result):
+        self.stdout.write(
+            f"{name:<28} {result['status']:>6} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+            f"{result['queries']:>8.1f} {result['peak_kib']:>9.0f}"
+        )
+        return result
+
+    def measure(self, request, count, warmup):
+        """Time `request` (a callable returning (status, X-Cache)) `count` times after `warmup` untimed calls"""
+        for _ in range(warmup):
+            request()
+        latencies = []
+        # The query log is a bounded deque: start every route from an empty one
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(count):
+                start = time.perf_counter()
+                status, cache = request()
+                latencies.append((time.perf_counter() - start) * 1000)
+        # Read it now: the next request clears the log again
+        queries = len(ctx.captured_queries) / count
+        # Separate pass: tracemalloc slows every allocation, so keep it out of the timings
+        tracemalloc.start()
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        cuts = statistics.quantiles(latencies, n=20, method="inclusive") if count > 1 else latencies * 19
+        return {
+            "status": status,
+            "cache": cache,
+            "p50_ms": round(cuts[9], 3),
+            "p95_ms": round(cuts[18], 3),
+            "queries": queries,
+            "peak_kib": round(peak / 1024, 1),
+        }
+
+    def fetch(self, client, url):
+        res = client.get(url)
+        if res.streaming:
+            # Exports do their work while streaming: drain the body
+            for _ in res.streaming_content:
+                pass
+        return res.status_code, res.get("X-Cache")
+
+    def send(self, client, method, url, body):
+        res = getattr(client, method)(url, body, format="json")
+        return res.status_code, res.get("X-Cache")
+
+    def compare(self, report, path, tolerance):
+        with open(path) as handle:
+            baseline = {(r["role"], r["route"]): r for r in json.load(handle)["results"] if "skipped" not in r}
+        regressions = 0
+        self.stdout.write(f"\nagainst {path}:")
+        for result in report["results"]:
+            before = baseline.get((result["role"], result["route"]))
+            if before is None or "skipped" in result:
+                continue
+            slower = result["p95_ms"] > before["p95_ms"] * (1 + tolerance)
+            more_queries = result["queries"] > before["queries"]
+            if slower or more_queries:
+                regressions += 1
+                self.stdout.write(self.style.WARNING(
+                    f"{result['role']:<10} {result['route']:<28} p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms, "
+                    f"queries {before['queries']:.1f} -> {result['queries']:.1f}"
+                ))
+        self.stdout.write(f"{regressions} regressions")
+        return regressions
@@ -0,0 +1,249 @@
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from university_app.authentication import RoleRefreshToken
+from university_app.synthetic import generate
+
+# Same workload for every mode: (server entry point, URL prefix of the read endpoints)
+MODES = {
+    "wsgi": ("wsgi", "/api/"),
+    "asgi-sync": ("asgi", "/api/"),
+    "asgi": ("asgi", "/api/async/"),
+}
+PATHS = ("me/profile/", "subjects/?page_size=20", "grades/?page_size=20")
+HOST = "testserver"
+
+
+def _percentile(values, n):
+    return round(statistics.quantiles(values, n=100, method="inclusive")[n - 1], 2) if len(values) > 1 else None
+
+
+class ThreadCounter:
+    """Peak number of threads started on top of those alive at entry, sampled in the background"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = self.peak = threading.active_count() + 1
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def started(self):
+        return self.peak - self.baseline
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the same read workload (me/profile, subject and grade pages, per role) to many slow clients "
+        "through the WSGI app with a fixed thread pool, the ASGI app with the sync views, and the ASGI app "
+        "with the async views; compare throughput, latency and server threads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=64, help="Concurrent clients")
+        parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+        parser.add_argument(
+            "--client-delay", type=float, default=500,
+            help="Milliseconds each client takes to receive a response (slow network)",
+        )
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+        parser.add_argument("--modes", default=",".join(MODES), help="Comma list of " + ", ".join(MODES))
+        parser.add_argument("--subjects", type=int, default=100)
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--worker", help="Internal: run one mode against DB_NAME")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            return self.run_worker(options["worker"], options)
+        if connection.vendor != "sqlite":
+            raise CommandError("The benchmark builds its dataset in a temporary SQLite file; DB_ENGINE is not SQLite")
+        modes = [m.strip() for m in options["modes"].split(",")]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        self.stdout.write(
+            f"{options['clients']} clients x {options['requests']} requests, "
+            f"{options['client_delay']:g} ms per response on the wire, {options['threads']} WSGI threads"
+        )
+        self.stdout.write(f"{'mode':<10} {'req/s':>8} {'p50':>9} {'p95':>9} {'errors':>7} {'server threads':>15}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in modes:
+                # Settings are read at startup, so each mode runs in its own process on its own copy
+                env = {
+                    **os.environ,
+                    "DB_NAME": os.path.join(tmp, f"{mode}.sqlite3"),
+                    # The async views have no response cache: keep the sync ones from answering from it
+                    "CACHE_BACKEND": "django.core.cache.backends.dummy.DummyCache",
+                }
+                if MODES[mode][0] == "asgi":
+                    env["DB_CONN_MAX_AGE"] = "0"
+                args = [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "benchmark_asgi", "--worker", mode]
+                for name in ("clients", "requests", "client_delay", "threads", "subjects", "students"):
+                    args += [f"--{name.replace('_', '-')}", str(options[name])]
+                done = subprocess.run(args, env=env, capture_output=True, text=True)
+                if done.returncode:
+                    raise CommandError(f"{mode} worker failed:\n{done.stderr}")
+                result = json.loads(done.stdout.strip().splitlines()[-1])
+                self.stdout.write(
+                    f"{mode:<10} {result['requests_per_s']:>8.1f} {result['p50_ms']:>7.1f}ms "
+                    f"{result['p95_ms']:>7.1f}ms {result['errors']:>7} {result['server_threads']:>15}"
+                )
+
+    def run_worker(self, mode, options):
+        call_command("migrate", verbosity=0)
+        dataset = generate(
+            faculties=2, subjects=options["subjects"], students=options["students"], admins=1, seed=0,
+        )
+        tokens = [str(RoleRefreshToken.for_user(getattr(dataset, role)).access_token) for role in ("admin", "professor", "student")]
+        connection.close()
+
+        server, prefix = MODES[mode]
+        # Every client walks the endpoints as a different role
+        workload = [
+            [(prefix + PATHS[(client + i) % len(PATHS)], tokens[client % len(tokens)]) for i in range(options["requests"])]
+            for client in range(options["clients"])
+        ]
+        delay = options["client_delay"] / 1000
+        with override_settings(ALLOWED_HOSTS=[HOST]), ThreadCounter() as threads:
+            start = time.perf_counter()
+            if server == "wsgi":
+                results = self.run_wsgi(workload, delay, options["threads"])
+            else:
+                results = asyncio.run(self.run_asgi(workload, delay))
+            elapsed = time.perf_counter() - start
+        latencies = [ms for status, ms in results if status == 200]
+        self.stdout.write(json.dumps({
+            "requests_per_s": len(results) / elapsed,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "errors": sum(1 for status, _ in results if status != 200),
+            # The WSGI clients are threads of this process too: its server threads are the fixed pool
+            "server_threads": options["threads"] if server == "wsgi" else threads.started,
+        }))
+
+    def run_wsgi(self, workload, delay, worker_threads):
+        """Each request holds one of `worker_threads` workers until its slow client has the whole body"""
+        from university_api.wsgi import application
+
+        workers = threading.BoundedSemaphore(worker_threads)
+        results, lock = [], threading.Lock()
+
+        def client(requests):
+            timings = []
+            for url, token in requests:
+                start = time.perf_counter()
+                with workers:
+                    status = []
+                    body = application(self.environ(url, token), lambda s, headers, exc_info=None: status.append(s))
+                    b"".join(body)
+                    time.sleep(delay)
+                    if hasattr(body, "close"):
+                        body.close()
+                timings.append((int(status[0].split()[0]), (time.perf_counter() - start) * 1000))
+            with lock:
+                results.extend(timings)
+
+        clients = [threading.Thread(target=client, args=(requests,)) for requests in workload]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        return results
+
+    async def run_asgi(self, workload, delay):
+        """Slow clients cost the ASGI app a pending coroutine, not a worker"""
+        from university_api.asgi import application
+
+        async def client(requests):
+            timings = []
+            for url, token in requests:
+                start = time.perf_counter()
+                status = await self.asgi_get(application, url, token, delay)
+                timings.append((status, (time.perf_counter() - start) * 1000))
+            return timings
+
+        per_client = await asyncio.gather(*(client(requests) for requests in workload))
+        return [timing for timings in per_client for timing in timings]
+
+    def environ(self, url, token):
+        parts = urlsplit(url)
+        return {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": parts.path,
+            "QUERY_STRING": parts.query,
+            "SERVER_NAME": HOST,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": HOST,
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+
+    async def asgi_get(self, application, url, token, delay):
+        parts = urlsplit(url)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "headers": [(b"host", HOST.encode()), (b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": (HOST, 80),
+        }
+        request_sent = False
+        status = None
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The client stays connected; the app cancels this once it has responded
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif not message.get("more_body"):
+                await asyncio.sleep(delay)
+
+        await application(scope, receive, send)
+        return status
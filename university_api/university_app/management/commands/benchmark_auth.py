@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from university_app.authentication import RoleRefreshToken
+from university_app.models import Faculty, Professor, Student, Subject
+
+
+class Command(BaseCommand):
+    help = "Compare queries and latency per request for DB-backed JWT auth vs role-claim tokens (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint and token kind")
+        parser.add_argument("--subjects", type=int, default=20, help="Subjects in the sample catalogue")
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+            users = self.create_sample(options["subjects"])
+            self.stdout.write(f"{'role':<10} {'endpoint':<18} {'tokens':<8} {'queries/req':>12} {'ms/req':>8}")
+            for role, user in users.items():
+                tokens = {
+                    "legacy": str(RefreshToken.for_user(user).access_token),
+                    "claims": str(RoleRefreshToken.for_user(user).access_token),
+                }
+                for url in ("/api/me/profile/", "/api/subjects/"):
+                    for kind, token in tokens.items():
+                        queries, elapsed = self.measure(token, url, options["requests"])
+                        self.stdout.write(f"{role:<10} {url:<18} {kind:<8} {queries:>12.1f} {elapsed:>8.2f}")
+            transaction.set_rollback(True)
+
+    def create_sample(self, subject_count):
+        suffix = f"bench{int(time.time())}"
+        faculty = Faculty.objects.create(name=f"Faculty {suffix}")
+        prof = Professor.objects.create(user=User.objects.create(username=f"prof_{suffix}"), faculty=faculty)
+        student = Student.objects.create(user=User.objects.create(username=f"stu_{suffix}"), faculty=faculty)
+        for i in range(subject_count):
+            subject = Subject.objects.create(code=f"{suffix}-{i}", title=f"Subject {i}", faculty=faculty, professor=prof)
+            if i % 2 == 0:
+                subject.students.add(student)
+        return {"professor": prof.user, "student": student.user}
+
+    def measure(self, token, url, count):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for _ in range(count):
+                res = client.get(url)
+                assert res.status_code == 200, res.status_code
+            elapsed = time.perf_counter() - start
+        return len(ctx.captured_queries) / count, elapsed * 1000 / count
@@ -0,0 +1,132 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from university_app.models import Grade, Subject, SubjectGradeStats
+from university_app.synthetic import generate
+
+MODES = {
+    "default": {"SQLITE_TUNING": "false"},
+    "tuned": {"SQLITE_TUNING": "true"},
+}
+
+
+def _p95(values):
+    return round(statistics.quantiles(values, n=20, method="inclusive")[18], 2) if len(values) > 1 else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Run parallel grade writers and readers against a fresh SQLite file with Django's default "
+        "connection settings and with the tuned PRAGMAs, and compare throughput, latency and lock errors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--modes", default=",".join(MODES), help="Comma list of " + ", ".join(MODES))
+        parser.add_argument("--worker", action="store_true", help="Internal: run one mode against DB_NAME")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            return self.run_worker(options)
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark compares SQLite configurations; DB_ENGINE is not SQLite")
+        modes = [m.strip() for m in options["modes"].split(",")]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        self.stdout.write(
+            f"{'mode':<8} {'writes/s':>9} {'reads/s':>9} {'write p95':>10} {'read p95':>9} {'lock errors':>12}"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in modes:
+                # Settings are read at startup, so each configuration runs in its own process
+                env = {**os.environ, **MODES[mode], "DB_NAME": os.path.join(tmp, f"{mode}.sqlite3")}
+                args = [
+                    sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "benchmark_concurrency", "--worker",
+                    "--writers", str(options["writers"]), "--readers", str(options["readers"]),
+                    "--seconds", str(options["seconds"]),
+                ]
+                done = subprocess.run(args, env=env, capture_output=True, text=True)
+                if done.returncode:
+                    raise CommandError(f"{mode} worker failed:\n{done.stderr}")
+                result = json.loads(done.stdout.strip().splitlines()[-1])
+                self.stdout.write(
+                    f"{mode:<8} {result['writes_per_s']:>9.1f} {result['reads_per_s']:>9.1f} "
+                    f"{result['write_p95_ms'] or 0:>8.1f}ms {result['read_p95_ms'] or 0:>7.1f}ms {result['lock_errors']:>12}"
+                )
+
+    def run_worker(self, options):
+        call_command("migrate", verbosity=0)
+        generate(faculties=1, subjects=20, students=400, students_per_subject=100, admins=0, grade_rate=0.5)
+        pairs = list(Subject.students.through.objects.values_list("subject_id", "student_id"))
+        connection.close()
+
+        stop = time.monotonic() + options["seconds"]
+        lock = threading.Lock()
+        stats = {"write": [], "read": [], "lock_errors": 0}
+
+        def run(kind, seed):
+            rng = random.Random(seed)
+            timings, errors = [], 0
+            try:
+                while time.monotonic() < stop:
+                    subject_id, student_id = rng.choice(pairs)
+                    start = time.perf_counter()
+                    try:
+                        if kind == "write":
+                            self.write(subject_id, student_id, rng)
+                        else:
+                            self.read(subject_id)
+                    except OperationalError as exc:
+                        if "locked" not in str(exc) and "busy" not in str(exc):
+                            raise
+                        errors += 1
+                        continue
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                stats[kind].extend(timings)
+                stats["lock_errors"] += errors
+
+        threads = [threading.Thread(target=run, args=("write", i)) for i in range(options["writers"])]
+        threads += [threading.Thread(target=run, args=("read", 1000 + i)) for i in range(options["readers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(json.dumps({
+            "writes_per_s": len(stats["write"]) / options["seconds"],
+            "reads_per_s": len(stats["read"]) / options["seconds"],
+            "write_p95_ms": _p95(stats["write"]),
+            "read_p95_ms": _p95(stats["read"]),
+            "lock_errors": stats["lock_errors"],
+        }))
+
+    def write(self, subject_id, student_id, rng):
+        # A professor saving one grade: upsert plus the statistics signal, in one transaction
+        with transaction.atomic():
+            grade = Grade.objects.filter(subject_id=subject_id, student_id=student_id).first()
+            if grade is None:
+                grade = Grade(subject_id=subject_id, student_id=student_id)
+            grade.grade = Decimal(f"{rng.uniform(0, 100):.2f}")
+            grade.save()
+
+    def read(self, subject_id):
+        list(Grade.objects.filter(subject_id=subject_id).select_related("student__user")[:50])
+        SubjectGradeStats.objects.filter(subject_id=subject_id).first()
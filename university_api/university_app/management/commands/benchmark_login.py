@@ -0,0 +1,149 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+# (settings environment, library the hasher needs)
+MODES = {
+    "pbkdf2-inline": ({"PASSWORD_HASHER": "pbkdf2", "LOGIN_HASH_WORKERS": "0"}, None),
+    "pbkdf2-pool": ({"PASSWORD_HASHER": "pbkdf2"}, None),
+    "argon2-pool": ({"PASSWORD_HASHER": "argon2"}, "argon2"),
+    "bcrypt-pool": ({"PASSWORD_HASHER": "bcrypt"}, "bcrypt"),
+}
+PASSWORD = "results-day"
+STORED = ("pbkdf2", "preferred")
+
+
+def _p95(values):
+    return round(statistics.quantiles(values, n=20, method="inclusive")[18], 2) if len(values) > 1 else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Log-in storm against /api/auth/token/ per hasher and pool configuration, with users stored as "
+        "PBKDF2 (first logins after switching hashers: verify, then re-hash) and on the preferred hasher "
+        "(steady state); reports logins/s, latency, 429s from the login queue and upgraded hashes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=16)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--workers", type=int, help="LOGIN_HASH_WORKERS for the pool modes (default: settings)")
+        parser.add_argument("--queue-size", type=int, help="LOGIN_QUEUE_SIZE (default: settings)")
+        parser.add_argument("--modes", default=",".join(MODES), help="Comma list of " + ", ".join(MODES))
+        parser.add_argument("--worker", action="store_true", help="Internal: run one mode against DB_NAME")
+        parser.add_argument("--stored", choices=STORED, default="pbkdf2", help="Internal: hasher of the stored passwords")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            return self.run_worker(options)
+        if connection.vendor != "sqlite":
+            raise CommandError("The benchmark builds its users in a temporary SQLite file; DB_ENGINE is not SQLite")
+        modes = [m.strip() for m in options["modes"].split(",")]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+        self.stdout.write(
+            f"{'mode':<14} {'stored':<10} {'logins/s':>9} {'p50':>9} {'p95':>9} {'429s':>6} {'failed':>7} {'rehashed':>9}"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in modes:
+                env, library = MODES[mode]
+                if library and not find_spec(library):
+                    self.stdout.write(f"{mode:<14} skipped: {library} is not installed")
+                    continue
+                env = {**os.environ, **env}
+                if options["workers"] is not None and env.get("LOGIN_HASH_WORKERS") != "0":
+                    env["LOGIN_HASH_WORKERS"] = str(options["workers"])
+                if options["queue_size"] is not None:
+                    env["LOGIN_QUEUE_SIZE"] = str(options["queue_size"])
+                for stored in STORED if env["PASSWORD_HASHER"] != "pbkdf2" else STORED[:1]:
+                    env["DB_NAME"] = os.path.join(tmp, f"{mode}-{stored}.sqlite3")
+                    result = self.run_mode(mode, stored, env, options)
+                    self.stdout.write(
+                        f"{mode:<14} {stored:<10} {result['logins_per_s']:>9.1f} {result['p50_ms'] or 0:>7.1f}ms "
+                        f"{result['p95_ms'] or 0:>7.1f}ms {result['throttled']:>6} {result['failed']:>7} {result['rehashed']:>9}"
+                    )
+
+    def run_mode(self, mode, stored, env, options):
+        # Settings are read at startup, so each configuration runs in its own process
+        args = [
+            sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "benchmark_login", "--worker",
+            "--stored", stored, "--clients", str(options["clients"]), "--seconds", str(options["seconds"]),
+            "--users", str(options["users"]),
+        ]
+        done = subprocess.run(args, env=env, capture_output=True, text=True)
+        if done.returncode:
+            raise CommandError(f"{mode} worker failed:\n{done.stderr}")
+        return json.loads(done.stdout.strip().splitlines()[-1])
+
+    def run_worker(self, options):
+        call_command("migrate", verbosity=0)
+        # One hash serves every user
+        encoded = make_password(PASSWORD, hasher="pbkdf2_sha256" if options["stored"] == "pbkdf2" else "default")
+        original = encoded.split("$", 1)[0]
+        users = User.objects.bulk_create(
+            User(username=f"login{i}", password=encoded) for i in range(options["users"])
+        )
+        connection.close()
+
+        stop = time.monotonic() + options["seconds"]
+        lock = threading.Lock()
+        stats = {"ok": [], "throttled": 0, "failed": 0}
+        url = reverse("token_obtain_pair")
+
+        def run(offset):
+            client, timings, throttled, failed = Client(), [], 0, 0
+            i = offset
+            try:
+                while time.monotonic() < stop:
+                    body = {"username": users[i % len(users)].username, "password": PASSWORD}
+                    i += options["clients"]
+                    start = time.perf_counter()
+                    res = client.post(url, body, content_type="application/json")
+                    if res.status_code == 200:
+                        timings.append((time.perf_counter() - start) * 1000)
+                    elif res.status_code == 429:
+                        # Back off as told, without sleeping past the end of the run
+                        throttled += 1
+                        time.sleep(max(0, min(float(res["Retry-After"]), stop - time.monotonic())))
+                    else:
+                        failed += 1
+            finally:
+                connection.close()
+            with lock:
+                stats["ok"].extend(timings)
+                stats["throttled"] += throttled
+                stats["failed"] += failed
+
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(options["clients"])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        preferred = get_hasher().algorithm
+        self.stdout.write(json.dumps({
+            "logins_per_s": len(stats["ok"]) / options["seconds"],
+            "p50_ms": round(statistics.median(stats["ok"]), 2) if stats["ok"] else None,
+            "p95_ms": _p95(stats["ok"]),
+            "throttled": stats["throttled"],
+            "failed": stats["failed"],
+            "rehashed": 0 if preferred == original else User.objects.filter(password__startswith=f"{preferred}$").count(),
+        }))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from university_app.revocation import revocations
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete revocation entries whose tokens have expired anyway, once or every --interval seconds; "
+        "the servers' Bloom filters are rebuilt without them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Keep compacting every N seconds until interrupted")
+
+    def handle(self, *args, **options):
+        while True:
+            tokens, users = revocations.compact()
+            self.stdout.write(f"compacted {tokens} revoked tokens, {users} user revocations")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from university_app.analytics import faculty_analytics, parse_group_by, parse_pass_mark, parse_percentiles
+from university_app.models import Faculty
+
+
+class Command(BaseCommand):
+    help = "Print faculty-wide grade statistics grouped by subject, professor and enrollment year"
+
+    def add_arguments(self, parser):
+        parser.add_argument("faculty", help="Faculty id or name")
+        parser.add_argument("--group-by", help="Comma list of subject,professor,enrollment_year (default: all)")
+        parser.add_argument("--percentiles", help="Comma list, e.g. 10,50,90")
+        parser.add_argument("--pass-mark")
+        parser.add_argument("--json", action="store_true", help="Print the API payload as JSON")
+
+    def handle(self, *args, **options):
+        lookup = {"pk": options["faculty"]} if options["faculty"].isdigit() else {"name": options["faculty"]}
+        faculty = Faculty.objects.filter(**lookup).first()
+        if faculty is None:
+            raise CommandError(f"Faculty {options['faculty']} does not exist")
+        try:
+            result = faculty_analytics(
+                faculty,
+                group_by=parse_group_by(options["group_by"]),
+                percentiles=parse_percentiles(options["percentiles"]),
+                pass_mark=parse_pass_mark(options["pass_mark"]),
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        self.stdout.write(f"{faculty.name} (pass mark {result['pass_mark']:g})")
+        self.write_rows("overall", [{"label": "all", **result["overall"]}])
+        for key, rows in result.items():
+            if key.startswith("by_"):
+                self.write_rows(key[3:], rows)
+
+    def write_rows(self, title, rows):
+        self.stdout.write(f"\n{title}")
+        self.stdout.write(f"{'group':<20} {'count':>8} {'mean':>8} {'stddev':>8} {'pass':>6}  percentiles")
+        for row in rows:
+            mean = "-" if row["mean"] is None else f"{row['mean']:.2f}"
+            stddev = "-" if row["stddev"] is None else f"{row['stddev']:.2f}"
+            rate = "-" if row["pass_rate"] is None else f"{row['pass_rate']:.0%}"
+            percentiles = " ".join(f"{k}={v:.1f}" for k, v in row["percentiles"].items())
+            self.stdout.write(f"{str(row['label']):<20} {row['count']:>8} {mean:>8} {stddev:>8} {rate:>6}  {percentiles}")
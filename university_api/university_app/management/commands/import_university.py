@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from university_app.caching import bump_versions
+from university_app.models import Faculty, Professor, Student, Subject
+from university_app.search import rebuild_search_indexes
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _hash(password):
+    # Empty password -> unusable password, like createsuperuser --noinput
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import professors, students, subjects and enrollments from CSV files. "
+        "Columns: users -> username,first_name,last_name,email,password,faculty,(enrollment_year|office); "
+        "subjects -> code,title,faculty,professor; enrollments -> subject,student. "
+        "Existing rows are skipped, so an interrupted import can simply be re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--professors", help="Professors CSV")
+        parser.add_argument("--students", help="Students CSV")
+        parser.add_argument("--subjects", help="Subjects CSV (professor column is a username)")
+        parser.add_argument("--enrollments", help="Enrollments CSV (subject code, student username)")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Password hashing processes (0 = hash in-process)")
+        parser.add_argument("--checkpoint", help="JSON file recording rows done per file, used to resume")
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.checkpoint_path = options["checkpoint"]
+        self.checkpoint = self.load_checkpoint()
+        self.faculties = dict(Faculty.objects.values_list("name", "id"))
+        self.workers = options["workers"]
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) if self.workers > 0 else None
+        try:
+            steps = (
+                ("professors", self.import_professors),
+                ("students", self.import_students),
+                ("subjects", self.import_subjects),
+                ("enrollments", self.import_enrollments),
+            )
+            for key, step in steps:
+                if options[key]:
+                    self.run(key, options[key], step)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+        # bulk_create sends no model signals: invalidate cached catalogue responses and re-index search explicitly
+        bump_versions(Faculty, User, Professor, Student, Subject)
+        rebuild_search_indexes()
+        self.stdout.write(self.style.SUCCESS("Import complete."))
+
+    def run(self, key, path, step):
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+        done = self.checkpoint.get(key, 0)
+        start, processed, written = time.perf_counter(), 0, 0
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            rows = islice(csv.DictReader(handle), done, None)
+            if done:
+                self.stdout.write(f"{key}: resuming after row {done}")
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    written += step(batch)
+                processed += len(batch)
+                self.save_checkpoint(key, done + processed)
+                rate = processed / max(time.perf_counter() - start, 1e-9)
+                self.stdout.write(f"{key}: {done + processed} rows read, {written} written ({rate:,.0f} rows/s)")
+        self.stdout.write(self.style.SUCCESS(f"{key}: done in {time.perf_counter() - start:.1f}s"))
+
+    def load_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as handle:
+                return json.load(handle)
+        return {}
+
+    def save_checkpoint(self, key, rows_done):
+        if not self.checkpoint_path:
+            return
+        self.checkpoint[key] = rows_done
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w") as handle:
+            json.dump(self.checkpoint, handle)
+        os.replace(tmp, self.checkpoint_path)
+
+    def faculty_id(self, name):
+        name = (name or "").strip()
+        if not name:
+            return None
+        if name not in self.faculties:
+            self.faculties[name] = Faculty.objects.get_or_create(name=name)[0].id
+        return self.faculties[name]
+
+    def hash_passwords(self, passwords):
+        if self.pool is None:
+            return [_hash(p) for p in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.pool.map(_hash, passwords, chunksize=chunksize))
+
+    def create_users(self, batch):
+        """Create missing users of `batch`, returning {username: user id} for every row"""
+        usernames = [row["username"].strip() for row in batch]
+        existing = dict(User.objects.filter(username__in=usernames).values_list("username", "id"))
+        new_rows = [row for row in batch if row["username"].strip() not in existing]
+        hashes = self.hash_passwords([row.get("password", "") for row in new_rows])
+        User.objects.bulk_create([
+            User(
+                username=row["username"].strip(),
+                first_name=row.get("first_name", ""),
+                last_name=row.get("last_name", ""),
+                email=row.get("email", ""),
+                password=password,
+            )
+            for row, password in zip(new_rows, hashes)
+        ], ignore_conflicts=True)
+        return dict(User.objects.filter(username__in=usernames).values_list("username", "id"))
+
+    def create_profiles(self, model, batch, extra):
+        user_ids = self.create_users(batch)
+        has_profile = set(model.objects.filter(user_id__in=user_ids.values()).values_list("user_id", flat=True))
+        profiles = []
+        for row in batch:
+            user_id = user_ids[row["username"].strip()]
+            if user_id in has_profile:
+                continue
+            has_profile.add(user_id)
+            profiles.append(model(user_id=user_id, faculty_id=self.faculty_id(row.get("faculty")), **extra(row)))
+        model.objects.bulk_create(profiles)
+        return len(profiles)
+
+    def import_professors(self, batch):
+        return self.create_profiles(Professor, batch, lambda row: {"office": row.get("office", "")})
+
+    def import_students(self, batch):
+        def extra(row):
+            year = (row.get("enrollment_year") or "").strip()
+            return {"enrollment_year": int(year) if year else None}
+
+        return self.create_profiles(Student, batch, extra)
+
+    def import_subjects(self, batch):
+        codes = [row["code"].strip() for row in batch]
+        existing = set(Subject.objects.filter(code__in=codes).values_list("code", flat=True))
+        usernames = {row.get("professor", "").strip() for row in batch} - {""}
+        professors = dict(Professor.objects.filter(user__username__in=usernames).values_list("user__username", "id"))
+        subjects = []
+        for row in batch:
+            code = row["code"].strip()
+            if code in existing:
+                continue
+            existing.add(code)
+            faculty_id = self.faculty_id(row.get("faculty"))
+            if faculty_id is None:
+                raise CommandError(f"Subject {code} has no faculty")
+            subjects.append(Subject(
+                code=code,
+                title=row.get("title", ""),
+                faculty_id=faculty_id,
+                professor_id=professors.get(row.get("professor", "").strip()),
+            ))
+        Subject.objects.bulk_create(subjects)
+        return len(subjects)
+
+    def import_enrollments(self, batch):
+        Enrollment = Subject.students.through
+        codes = {row["subject"].strip() for row in batch}
+        usernames = {row["student"].strip() for row in batch}
+        subjects = dict(Subject.objects.filter(code__in=codes).values_list("code", "id"))
+        students = dict(Student.objects.filter(user__username__in=usernames).values_list("user__username", "id"))
+        links, missing = [], 0
+        for row in batch:
+            subject_id = subjects.get(row["subject"].strip())
+            student_id = students.get(row["student"].strip())
+            if subject_id is None or student_id is None:
+                missing += 1
+                continue
+            links.append(Enrollment(subject_id=subject_id, student_id=student_id))
+        if missing:
+            self.stderr.write(f"enrollments: skipped {missing} rows with unknown subject or student")
+        Enrollment.objects.bulk_create(links, ignore_conflicts=True)
+        return len(links)
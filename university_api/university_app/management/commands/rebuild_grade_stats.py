@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from university_app.grade_stats import SCOPES, compute_all
+
+# SQLite sums DECIMAL columns as floats; ignore differences below this
+TOLERANCE = Decimal("0.01")
+
+
+def drifted(stored, computed):
+    if stored is None or computed is None:
+        return (stored or computed).count != 0
+    return (
+        stored.count != computed.count
+        or abs(stored.total - computed.total) > TOLERANCE
+        or abs(stored.total_squares - computed.total_squares) > TOLERANCE
+        or stored.minimum != computed.minimum
+        or stored.maximum != computed.maximum
+        or list(stored.histogram) != list(computed.histogram)
+    )
+
+
+class Command(BaseCommand):
+    help = "Recompute per-subject and per-student grade statistics from Grade and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report drift; exit non-zero if any is found")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total_drift = 0
+        for model, key in SCOPES:
+            computed = compute_all(model, key)
+            stored = model.objects.in_bulk()
+            keys = set(computed) | set(stored)
+            drift = [pk for pk in keys if drifted(stored.get(pk), computed.get(pk))]
+            total_drift += len(drift)
+            name = model._meta.verbose_name_plural
+            self.stdout.write(f"{name}: {len(computed)} groups, {len(drift)} drifted")
+            for pk in sorted(drift)[:20]:
+                self.stdout.write(f"  drift in {key}={pk}")
+            if not options["check"]:
+                with transaction.atomic():
+                    model.objects.all().delete()
+                    model.objects.bulk_create(computed.values(), batch_size=options["batch_size"])
+                self.stdout.write(self.style.SUCCESS(f"{name}: rebuilt"))
+        if options["check"] and total_drift:
+            raise CommandError(f"{total_drift} statistics rows drifted; run rebuild_grade_stats to repair")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from university_app.search import SEARCH_INDEXES, rebuild_search_indexes
+
+
+class Command(BaseCommand):
+    help = "Re-index every user name and subject for ?search= (after loading rows with bulk_create or raw SQL)"
+
+    def handle(self, *args, **options):
+        rebuild_search_indexes()
+        self.stdout.write(f"rebuilt {', '.join(index.table for index in SEARCH_INDEXES.values())}")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from university_app.routing import REPLICA_ALIAS, replica_configured, sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = "Replication stand-in: copy the primary SQLite database onto the replica file, once or every --interval seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Keep syncing every N seconds until interrupted")
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError("No replica database configured; set DB_REPLICA_NAME")
+        if connections[REPLICA_ALIAS].vendor != "sqlite":
+            raise CommandError("The replication stand-in only copies SQLite files")
+        while True:
+            start = time.perf_counter()
+            sync_sqlite_replica()
+            self.stdout.write(f"replica synced in {(time.perf_counter() - start) * 1000:.0f}ms")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
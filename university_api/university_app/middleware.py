@@ -1,19 +1,204 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .instrumentation import QueryBudgetExceeded, QueryRecorder, current_recorder, view_endpoint
+from .routing import aend_request, begin_request, end_request
+
+logger = logging.getLogger('university_app.instrumentation')
+
+
+class HybridMiddleware:
+    """Runs natively under both WSGI and ASGI: subclasses implement __call__ and __acall__
+
+    A sync-only middleware would make Django's ASGI handler hop to a thread for every request.
+    """
+
+    sync_capable = True
+    async_capable = True
 
-class CORSMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class CORSMiddleware(HybridMiddleware):
+    """The one CORS layer, first in MIDDLEWARE: preflights are answered before anything else runs
+
+    Header values are computed once from the CORS_* settings. With CORS_ALLOW_ALL_ORIGINS and
+    no credentials every cross-origin response gets the same `*` header; otherwise allowed
+    origins are echoed back with `Vary: Origin`. Access-Control-Max-Age lets browsers reuse a
+    preflight instead of sending one before every authenticated call.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        credentials = getattr(settings, 'CORS_ALLOW_CREDENTIALS', False)
+        self.allow_all = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False)
+        self.allowed_origins = frozenset(getattr(settings, 'CORS_ALLOWED_ORIGINS', ()))
+        # Browsers refuse `*` on credentialed requests: the origin is echoed instead
+        self.wildcard = self.allow_all and not credentials
+        self.response_headers = (('Access-Control-Allow-Origin', '*'),) if self.wildcard else ()
+        if credentials:
+            self.response_headers += (('Access-Control-Allow-Credentials', 'true'),)
+        self.preflight_headers = self.response_headers + (
+            ('Access-Control-Allow-Methods', ', '.join(getattr(settings, 'CORS_ALLOW_METHODS', ()))),
+            ('Access-Control-Allow-Headers', ', '.join(getattr(settings, 'CORS_ALLOW_HEADERS', ()))),
+            ('Access-Control-Max-Age', str(getattr(settings, 'CORS_PREFLIGHT_MAX_AGE', 0))),
+        )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        origin = request.META.get('HTTP_ORIGIN')
+        if self.is_preflight(request, origin):
+            return self.preflight(origin)
+        return self.add_headers(origin, self.get_response(request))
+
+    async def __acall__(self, request):
+        origin = request.META.get('HTTP_ORIGIN')
+        if self.is_preflight(request, origin):
+            return self.preflight(origin)
+        return self.add_headers(origin, await self.get_response(request))
+
+    def is_preflight(self, request, origin):
+        return origin is not None and request.method == 'OPTIONS' and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in request.META
+
+    def preflight(self, origin):
+        response = HttpResponse()
+        if self.origin_allowed(origin):
+            self.apply(origin, response, self.preflight_headers)
+        return response
+
+    def add_headers(self, origin, response):
+        if origin is not None and self.origin_allowed(origin):
+            self.apply(origin, response, self.response_headers)
+        return response
+
+    def origin_allowed(self, origin):
+        return self.allow_all or origin in self.allowed_origins
+
+    def apply(self, origin, response, headers):
+        for name, value in headers:
+            response[name] = value
+        if not self.wildcard:
+            response['Access-Control-Allow-Origin'] = origin
+            patch_vary_headers(response, ('Origin',))
+
+
+class InstrumentationMiddleware(HybridMiddleware):
+    """Query count, SQL time, repeated statements (N+1) and render time per view action
+
+    Reported as a Server-Timing header and one JSON log line per request. Views declare
+    `query_budgets = {action: max queries}`; QUERY_BUDGET_MODE "warn" logs overruns and
+    "raise" turns them into QueryBudgetExceeded, which fails the test that made the request.
+    Queries run while a streaming response is consumed happen after this middleware returns
+    and are not counted.
+    """
 
     def __call__(self, request):
-        # Handle OPTIONS preflight
-        if request.method == 'OPTIONS':
-            response = HttpResponse()
-        else:
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+        recorder = request._query_recorder = QueryRecorder()
+        start = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
             response = self.get_response(request)
-        
-        # Always add CORS headers
-        response['Access-Control-Allow-Origin'] = '*'
-        response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-        
+        finally:
+            current_recorder.reset(token)
+        self.report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+            return await self.get_response(request)
+        recorder = request._query_recorder = QueryRecorder()
+        start = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.report(request, response, recorder, time.perf_counter() - start)
         return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (JSON-encoded) after the view returns; time that step too
+        recorder = getattr(request, '_query_recorder', None)
+        if recorder is not None:
+            recorder.render_started = time.perf_counter()
+
+            def rendered(response):
+                recorder.render_duration = time.perf_counter() - recorder.render_started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, recorder, total):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            recorder.endpoint, recorder.budget = view_endpoint(match.func, request.method)
+        db, render = recorder.duration, recorder.render_duration
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db * 1000:.2f};desc="{recorder.count} queries"',
+            f'app;dur={max(total - db - render, 0) * 1000:.2f}',
+            f'render;dur={render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        repeated = recorder.repeated(getattr(settings, 'INSTRUMENTATION_REPEAT_THRESHOLD', 5))
+        payload = {
+            'endpoint': recorder.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db * 1000, 2),
+            'render_ms': round(render * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'repeated': [{'sql': sql[:300], 'count': count} for sql, count in repeated],
+        }
+        mode = getattr(settings, 'QUERY_BUDGET_MODE', 'warn')
+        over_budget = mode != 'off' and recorder.budget is not None and recorder.count > recorder.budget
+        payload['budget'] = recorder.budget
+        level = logging.WARNING if repeated or over_budget else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(payload), extra={'instrumentation': payload})
+        if over_budget and mode == 'raise':
+            raise QueryBudgetExceeded(
+                f'{recorder.endpoint} ran {recorder.count} queries, budget is {recorder.budget}: '
+                + '; '.join(f'{count}x {sql[:120]}' for sql, count in recorder.fingerprints.most_common(3))
+            )
+
+
+class DatabaseRoutingMiddleware(HybridMiddleware):
+    """Route the request's reads to the replica or the primary (see routing.PrimaryReplicaRouter)
+
+    Streaming bodies are consumed after this returns, so exports read from the primary.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token, result = begin_request(request), None
+        try:
+            result = self.get_response(request)
+            return result
+        finally:
+            end_request(token, request, result)
+
+    async def __acall__(self, request):
+        token, result = begin_request(request), None
+        try:
+            result = await self.get_response(request)
+            return result
+        finally:
+            await aend_request(token, request, result)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0002_grade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='administrator',
+            index=models.Index(fields=['created_at', 'id'], name='administrator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['created_at', 'id'], name='grade_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professor',
+            index=models.Index(fields=['created_at', 'id'], name='professor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at', 'id'], name='student_created_idx'),
+        ),
+    ]
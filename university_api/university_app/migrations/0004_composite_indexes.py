@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['professor', 'created_at', 'id'], name='grade_professor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='grade_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['professor', 'subject'], name='grade_professor_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['professor', 'code'], name='subject_professor_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['faculty', 'code'], name='subject_faculty_code_idx'),
+        ),
+    ]
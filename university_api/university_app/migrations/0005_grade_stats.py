@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:06
+
+import django.db.models.deletion
+import university_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentGradeStats',
+            fields=[
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('total_squares', models.DecimalField(decimal_places=4, default=0, max_digits=24)),
+                ('minimum', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('maximum', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('histogram', models.JSONField(default=university_app.models.empty_histogram)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grade_stats', serialize=False, to='university_app.student')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SubjectGradeStats',
+            fields=[
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('total_squares', models.DecimalField(decimal_places=4, default=0, max_digits=24)),
+                ('minimum', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('maximum', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('histogram', models.JSONField(default=university_app.models.empty_histogram)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grade_stats', serialize=False, to='university_app.subject')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+# FTS5 tables behind ?search= (university_app.search); rowid is the indexed row's primary key
+SEARCH_TABLES = {
+    'university_user_search': ('auth_user', ('username', 'first_name', 'last_name')),
+    'university_subject_search': ('university_app_subject', ('code', 'title')),
+}
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, (source, columns) in SEARCH_TABLES.items():
+        names = ', '.join(columns)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({names}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(f"INSERT INTO {table} (rowid, {names}) SELECT id, {names} FROM {source}")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f"DROP TABLE {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0006_token_revocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='administrator',
+            index=models.Index(fields=['faculty', 'created_at', 'id'], name='admin_faculty_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['subject', 'created_at', 'id'], name='grade_subject_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='professor',
+            index=models.Index(fields=['faculty', 'created_at', 'id'], name='professor_faculty_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['faculty', 'created_at', 'id'], name='student_faculty_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['enrollment_year', 'created_at', 'id'], name='student_year_created_idx'),
+        ),
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
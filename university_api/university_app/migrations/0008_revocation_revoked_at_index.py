@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0007_filter_indexes_and_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='revokedtoken',
+            name='revoked_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='usertokenrevocation',
+            name='revoked_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('university_app', '0008_revocation_revoked_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='studentgradestats',
+            options={'verbose_name_plural': 'student grade stats'},
+        ),
+        migrations.AlterModelOptions(
+            name='subjectgradestats',
+            options={'verbose_name_plural': 'subject grade stats'},
+        ),
+    ]
@@ -28,6 +28,12 @@ class BaseProfile(TimestampedModel):
 class Administrator(BaseProfile):
 	title = models.CharField(max_length=100, blank=True)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["created_at", "id"], name="administrator_created_idx"),
+			models.Index(fields=["faculty", "created_at", "id"], name="admin_faculty_created_idx"),
+		]
+
 	def __str__(self):
 		return f"Admin: {self.user.username}"
 
@@ -35,6 +41,12 @@ class Administrator(BaseProfile):
 class Professor(BaseProfile):
 	office = models.CharField(max_length=100, blank=True)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["created_at", "id"], name="professor_created_idx"),
+			models.Index(fields=["faculty", "created_at", "id"], name="professor_faculty_created_idx"),
+		]
+
 	def __str__(self):
 		return f"Professor: {self.user.get_full_name() or self.user.username}"
 
@@ -42,6 +54,13 @@ class Professor(BaseProfile):
 class Student(BaseProfile):
 	enrollment_year = models.PositiveIntegerField(null=True, blank=True)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["created_at", "id"], name="student_created_idx"),
+			models.Index(fields=["faculty", "created_at", "id"], name="student_faculty_created_idx"),
+			models.Index(fields=["enrollment_year", "created_at", "id"], name="student_year_created_idx"),
+		]
+
 	def __str__(self):
 		return f"Student: {self.user.get_full_name() or self.user.username}"
 
@@ -53,6 +72,12 @@ class Subject(TimestampedModel):
 	professor = models.ForeignKey(Professor, on_delete=models.SET_NULL, null=True, blank=True, related_name="subjects")
 	students = models.ManyToManyField(Student, blank=True, related_name="subjects")
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["professor", "code"], name="subject_professor_code_idx"),
+			models.Index(fields=["faculty", "code"], name="subject_faculty_code_idx"),
+		]
+
 	def __str__(self):
 		return f"{self.code} - {self.title}"
 
@@ -66,6 +91,87 @@ class Grade(TimestampedModel):
 
 	class Meta:
 		unique_together = ("subject", "student")
+		indexes = [
+			models.Index(fields=["created_at", "id"], name="grade_created_idx"),
+			models.Index(fields=["professor", "created_at", "id"], name="grade_professor_created_idx"),
+			models.Index(fields=["student", "created_at", "id"], name="grade_student_created_idx"),
+			models.Index(fields=["subject", "created_at", "id"], name="grade_subject_created_idx"),
+			models.Index(fields=["professor", "subject"], name="grade_professor_subject_idx"),
+		]
 
 	def __str__(self):
 		return f"{self.student.user.username} - {self.subject.code}: {self.grade or 'N/A'}"
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		# Remember the stored values so grade statistics can apply the exact delta on save
+		instance._loaded_values = dict(zip(field_names, values))
+		return instance
+
+
+HISTOGRAM_BUCKETS = 10
+HISTOGRAM_WIDTH = 10  # buckets [0, 10), [10, 20) ... [90, +inf)
+
+
+def empty_histogram():
+	return [0] * HISTOGRAM_BUCKETS
+
+
+class GradeStats(models.Model):
+	"""Running aggregate over non-null grades, maintained incrementally by grade_stats.apply_changes"""
+	count = models.PositiveIntegerField(default=0)
+	total = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+	total_squares = models.DecimalField(max_digits=24, decimal_places=4, default=0)
+	minimum = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+	maximum = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+	histogram = models.JSONField(default=empty_histogram)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		abstract = True
+
+
+class SubjectGradeStats(GradeStats):
+	subject = models.OneToOneField(Subject, on_delete=models.CASCADE, primary_key=True, related_name="grade_stats")
+
+	class Meta:
+		verbose_name_plural = "subject grade stats"
+
+	def __str__(self):
+		return f"Stats: {self.subject_id}"
+
+
+class StudentGradeStats(GradeStats):
+	student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name="grade_stats")
+
+	class Meta:
+		verbose_name_plural = "student grade stats"
+
+	def __str__(self):
+		return f"Stats: {self.student_id}"
+
+
+class RevokedToken(models.Model):
+	"""A revoked JWT, by `jti`; kept until the token expires anyway (manage.py compact_revocations)"""
+	jti = models.CharField(max_length=255, primary_key=True)
+	expires_at = models.DateTimeField(db_index=True)
+	# Indexed for the periodic pull of recent revocations into each process's filter
+	revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+	def __str__(self):
+		return f"Revoked: {self.jti}"
+
+
+class UserTokenRevocation(models.Model):
+	"""Every token of `user_id` issued up to `revoked_at` is revoked: one row however many were issued
+
+	A plain id, not a foreign key: the row has to outlive the user it revokes.
+	"""
+	user_id = models.PositiveBigIntegerField(primary_key=True)
+	revoked_at = models.DateTimeField(db_index=True)
+	# When the last token it can match expires
+	expires_at = models.DateTimeField(db_index=True)
+
+	def __str__(self):
+		return f"Revoked tokens of user {self.user_id}"
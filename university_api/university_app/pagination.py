@@ -0,0 +1,195 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+	"""Cursor pagination seeking on the view's indexed `keyset_ordering` columns.
+
+	Lists may pick another of the view's `ordering_options` ({name: columns}, each backed
+	by an index) with `?ordering=name`, or `-name` for descending.
+	Requests that pass neither `cursor` nor `page_size` get the legacy bare list,
+	capped at PAGINATION_COMPAT_MAX_RESULTS with a `Link: rel="next"` header when truncated.
+	"""
+
+	cursor_query_param = "cursor"
+	page_size_query_param = "page_size"
+	ordering_query_param = "ordering"
+	default_ordering = ("created_at", "id")
+	invalid_cursor_message = "Invalid cursor"
+
+	def paginate_queryset(self, queryset, request, view=None):
+		return self.paginate_rows(list(self.page_queryset(queryset, request, view)))
+
+	async def apaginate_queryset(self, queryset, request, view=None):
+		"""paginate_queryset() for async views: the page is fetched through the async ORM"""
+		return self.paginate_rows([row async for row in self.page_queryset(queryset, request, view)])
+
+	def page_queryset(self, queryset, request, view=None):
+		"""The ordered, sought and sliced queryset of the requested page (one extra row to detect more)"""
+		self.request = request
+		self.ordering = tuple(self.get_ordering(view))
+		self.compat = (
+			self.cursor_query_param not in request.query_params
+			and self.page_size_query_param not in request.query_params
+		)
+		self.page_size = self.get_page_size(request)
+		self.next_values = self.previous_values = None
+
+		values, reverse = self.decode_cursor(request, queryset.model)
+		# Re-encoded as they came in when the page is empty
+		self.cursor_values = None if values is None else [self.cursor_value(value) for value in values]
+		self.cursor_reverse = reverse
+		ordering = self.reversed_ordering() if reverse else self.ordering
+		queryset = queryset.order_by(*ordering)
+		if values is not None:
+			queryset = queryset.filter(self.seek_filter(ordering, values))
+		return queryset[:self.page_size + 1]
+
+	def paginate_rows(self, rows):
+		values, reverse = self.cursor_values, self.cursor_reverse
+		has_more = len(rows) > self.page_size
+		rows = rows[:self.page_size]
+		if reverse:
+			rows.reverse()
+
+		if rows:
+			first, last = self.position(rows[0]), self.position(rows[-1])
+			if reverse:
+				self.next_values = last
+				self.previous_values = first if has_more else None
+			else:
+				self.next_values = last if has_more else None
+				self.previous_values = first if values is not None else None
+		elif values is not None:
+			# Paged past either end: offer the way back
+			if reverse:
+				self.next_values = values
+			else:
+				self.previous_values = values
+		return rows
+
+	def get_ordering(self, view):
+		requested = None
+		if getattr(view, "action", None) == "list":
+			requested = view.request.query_params.get(self.ordering_query_param)
+		if requested:
+			return self.requested_ordering(view, requested)
+		if hasattr(view, "get_keyset_ordering"):
+			return view.get_keyset_ordering()
+		return getattr(view, "keyset_ordering", self.default_ordering)
+
+	def requested_ordering(self, view, requested):
+		options = getattr(view, "ordering_options", {})
+		name = requested.removeprefix("-")
+		if name not in options:
+			allowed = ", ".join(options) or "none"
+			raise ValidationError({"error": f"Unknown ordering {name!r}; indexed orderings: {allowed}"})
+		if requested.startswith("-"):
+			return tuple(f[1:] if f.startswith("-") else f"-{f}" for f in options[name])
+		return options[name]
+
+	def get_page_size(self, request):
+		max_size = self.max_page_size = getattr(settings, "PAGINATION_MAX_PAGE_SIZE", 500)
+		if self.compat:
+			return getattr(settings, "PAGINATION_COMPAT_MAX_RESULTS", 1000)
+		try:
+			size = int(request.query_params[self.page_size_query_param])
+		except (KeyError, ValueError):
+			return getattr(settings, "PAGINATION_PAGE_SIZE", 50)
+		return max(1, min(size, max_size))
+
+	def get_paginated_response(self, data):
+		if self.compat:
+			headers = {}
+			next_url = self.get_next_link()
+			if next_url:
+				headers["Link"] = f'<{next_url}>; rel="next"'
+			return Response(data, headers=headers)
+		return Response({
+			"next": self.get_next_link(),
+			"previous": self.get_previous_link(),
+			"results": data,
+		})
+
+	def get_paginated_response_schema(self, schema):
+		return {
+			"type": "object",
+			"required": ["results"],
+			"properties": {
+				"next": {"type": "string", "nullable": True, "format": "uri"},
+				"previous": {"type": "string", "nullable": True, "format": "uri"},
+				"results": schema,
+			},
+		}
+
+	def get_next_link(self):
+		if self.next_values is None:
+			return None
+		return self.encode_cursor(self.next_values, reverse=False)
+
+	def get_previous_link(self):
+		if self.previous_values is None:
+			return None
+		return self.encode_cursor(self.previous_values, reverse=True)
+
+	def reversed_ordering(self):
+		return tuple(f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering)
+
+	def seek_filter(self, ordering, values):
+		"""Row-value comparison `(a, b, ...) > (x, y, ...)` expanded into Q objects"""
+		condition = Q()
+		for i in reversed(range(len(ordering))):
+			field = ordering[i].lstrip("-")
+			lookup = "lt" if ordering[i].startswith("-") else "gt"
+			step = Q(**{f"{field}__{lookup}": values[i]})
+			if i < len(ordering) - 1:
+				step |= Q(**{field: values[i]}) & condition
+			condition = step
+		return condition
+
+	def cursor_value(self, value):
+		if hasattr(value, "isoformat"):
+			return value.isoformat()
+		if value is not None and not isinstance(value, (int, float, str, bool)):
+			return str(value)
+		return value
+
+	def position(self, instance):
+		return [self.cursor_value(getattr(instance, field.lstrip("-"))) for field in self.ordering]
+
+	def decode_cursor(self, request, model):
+		"""(values of the ordering columns, reverse) from the cursor, each checked by its model field"""
+		encoded = request.query_params.get(self.cursor_query_param)
+		if not encoded:
+			return None, False
+		try:
+			payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+			values, reverse = payload["v"], bool(payload.get("r"))
+			if not isinstance(values, list) or len(values) != len(self.ordering):
+				raise NotFound(self.invalid_cursor_message)
+			values = [
+				model._meta.get_field(field.lstrip("-")).to_python(value)
+				for field, value in zip(self.ordering, values)
+			]
+		except (TypeError, ValueError, KeyError, binascii.Error, UnicodeEncodeError, DjangoValidationError):
+			raise NotFound(self.invalid_cursor_message)
+		return values, reverse
+
+	def encode_cursor(self, values, reverse):
+		payload = {"v": values}
+		if reverse:
+			payload["r"] = 1
+		encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("ascii")).decode("ascii")
+		url = self.request.build_absolute_uri()
+		if self.compat:
+			url = replace_query_param(url, self.page_size_query_param, self.max_page_size)
+		return replace_query_param(url, self.cursor_query_param, encoded)
@@ -1,8 +1,10 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .roles import resolve_role
+
 
 def is_admin_user(user):
-    return user.is_superuser or hasattr(user, "administrator_profile")
+    return resolve_role(user).is_admin
 
 
 class IsAdminOrReadOnly(BasePermission):
@@ -0,0 +1,171 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .caching import bump_versions, get_versions, model_label
+from .instrumentation import current_recorder
+from .models import RevokedToken, UserTokenRevocation
+
+JTI_KEY = "jti:{}"
+USER_KEY = "user:{}"
+
+
+class BloomFilter:
+	"""Set of strings in a bit array: false positives at about `error_rate`, never false negatives"""
+
+	def __init__(self, capacity, error_rate):
+		capacity = max(capacity, 1)
+		self.capacity = capacity
+		self.count = 0
+		self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+		self.hashes = max(1, round(self.size / capacity * math.log(2)))
+		self.bits = bytearray((self.size + 7) // 8)
+
+	def positions(self, key):
+		# Double hashing: k probes from one 128-bit digest
+		digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+		first, step = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+		return ((first + i * step) % self.size for i in range(self.hashes))
+
+	def add(self, key):
+		self.count += 1
+		for position in self.positions(key):
+			self.bits[position >> 3] |= 1 << (position & 7)
+
+	def __contains__(self, key):
+		return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+def token_lifetime():
+	"""Longest time a token can stay valid, hence how long a revocation has to be kept"""
+	return max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+
+
+class RevocationStore:
+	"""Revoked token ids and per-user cutoffs, with an in-memory Bloom filter in front
+
+	Each process keeps a filter of the unexpired entries, so the common case - a token
+	that was never revoked - is answered without a query; filter hits are confirmed
+	against the primary database. Revocations made here are added to the filter at once;
+	those made by other processes are pulled in every REVOCATION_BLOOM_MAX_AGE seconds,
+	whether or not the cache is shared. The filter is rebuilt from scratch after a
+	compaction (which bumps the shared revocation version) or once it is full.
+	"""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.bloom = None
+		self.version = None
+		self.checked = None
+		self.since = None
+
+	def max_age(self):
+		return getattr(settings, "REVOCATION_BLOOM_MAX_AGE", 5)
+
+	def current(self):
+		version = get_versions([model_label(RevokedToken)])[0]
+		if self.fresh(version):
+			return self.bloom
+		with self.lock:
+			if not self.fresh(version):
+				# Once per process and interval: not part of the query budget of the request it lands in
+				suspended = current_recorder.set(None)
+				try:
+					self.refresh(version)
+				finally:
+					current_recorder.reset(suspended)
+		return self.bloom
+
+	def fresh(self, version):
+		return self.bloom is not None and self.version == version and time.monotonic() - self.checked < self.max_age()
+
+	def refresh(self, version):
+		checked, now = time.monotonic(), timezone.now()
+		if self.bloom is None or self.version != version or self.bloom.count >= self.bloom.capacity:
+			self.bloom = self.build(now)
+		else:
+			for key in self.keys(now, self.since):
+				self.bloom.add(key)
+		# Overlap the next pull by a full interval: clocks of the revoking processes may be a little behind
+		self.version, self.checked, self.since = version, checked, now - timedelta(seconds=self.max_age())
+
+	def keys(self, now, since=None):
+		jtis = RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__gt=now)
+		users = UserTokenRevocation.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__gt=now)
+		if since is not None:
+			jtis, users = jtis.filter(revoked_at__gte=since), users.filter(revoked_at__gte=since)
+		return [JTI_KEY.format(jti) for jti in jtis.values_list("jti", flat=True).iterator()] + [
+			USER_KEY.format(user_id) for user_id in users.values_list("user_id", flat=True)
+		]
+
+	def build(self, now):
+		keys = self.keys(now)
+		# Headroom for the revocations made before the next rebuild
+		bloom = BloomFilter(
+			max(2 * len(keys), getattr(settings, "REVOCATION_BLOOM_CAPACITY", 100_000)),
+			getattr(settings, "REVOCATION_BLOOM_ERROR_RATE", 0.001),
+		)
+		for key in keys:
+			bloom.add(key)
+		return bloom
+
+	def remember(self, key):
+		"""Add a revocation made by this process to its filter, without waiting for the next pull"""
+		if self.bloom is not None:
+			self.bloom.add(key)
+
+	def is_revoked(self, payload):
+		bloom = self.current()
+		jti = payload.get(api_settings.JTI_CLAIM)
+		if JTI_KEY.format(jti) in bloom and RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(jti=jti).exists():
+			return True
+		user_id = payload.get(api_settings.USER_ID_CLAIM)
+		if USER_KEY.format(user_id) not in bloom:
+			return False
+		revoked_at = (
+			UserTokenRevocation.objects.using(DEFAULT_DB_ALIAS)
+			.filter(user_id=user_id)
+			.values_list("revoked_at", flat=True)
+			.first()
+		)
+		# iat has whole seconds: a token issued within the revocation's second counts as revoked
+		return revoked_at is not None and payload.get("iat", 0) <= revoked_at.timestamp()
+
+	def revoke(self, payload):
+		"""Revoke one token; revoking it again is a no-op"""
+		RevokedToken.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+			[RevokedToken(jti=payload[api_settings.JTI_CLAIM], expires_at=datetime_from_epoch(payload["exp"]))],
+			ignore_conflicts=True,
+		)
+		self.remember(JTI_KEY.format(payload[api_settings.JTI_CLAIM]))
+
+	def revoke_user(self, user_id):
+		"""Revoke every token issued to `user_id` so far, as a single upsert"""
+		now = timezone.now()
+		UserTokenRevocation.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+			[UserTokenRevocation(user_id=user_id, revoked_at=now, expires_at=now + token_lifetime())],
+			update_conflicts=True,
+			unique_fields=["user_id"],
+			update_fields=["revoked_at", "expires_at"],
+		)
+		self.remember(USER_KEY.format(user_id))
+
+	def compact(self, now=None):
+		"""Delete the entries of tokens that have expired anyway; (tokens, users) removed"""
+		now = now or timezone.now()
+		tokens = RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__lte=now).delete()[0]
+		users = UserTokenRevocation.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__lte=now).delete()[0]
+		if tokens or users:
+			bump_versions(RevokedToken)
+		return tokens, users
+
+
+revocations = RevocationStore()
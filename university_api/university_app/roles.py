@@ -0,0 +1,116 @@
+from typing import NamedTuple, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import models
+
+ADMINISTRATOR = "administrator"
+PROFESSOR = "professor"
+STUDENT = "student"
+NO_ROLE = "user"
+
+# Checked in priority order, matching the historical get_user_role probes
+PROFILE_RELATIONS = (
+	(ADMINISTRATOR, "administrator_profile"),
+	(PROFESSOR, "professor_profile"),
+	(STUDENT, "student_profile"),
+)
+
+_MEMO_ATTR = "_university_role"
+
+
+class UserRole(NamedTuple):
+	role: str
+	profile: Optional[models.Model]
+	is_superuser: bool = False
+
+	@property
+	def is_admin(self):
+		return self.is_superuser or self.role == ADMINISTRATOR
+
+	@property
+	def is_staff_role(self):
+		"""Professor or admin (may write grades)"""
+		return self.is_admin or self.role == PROFESSOR
+
+
+def role_cache_key(user_id):
+	return f"university:role:{user_id}"
+
+
+def invalidate_role(user_id):
+	cache.delete(role_cache_key(user_id))
+
+
+def _prime(user, profiles):
+	"""Fill the reverse one-to-one caches so `user.student_profile` & co. never query again"""
+	for _, relation in PROFILE_RELATIONS:
+		profile = profiles.get(relation)
+		User._meta.get_field(relation).set_cached_value(user, profile)
+		if profile is not None:
+			profile._meta.get_field("user").set_cached_value(profile, user)
+
+
+def _load_profiles(user):
+	relations = [relation for _, relation in PROFILE_RELATIONS]
+	ttl = getattr(settings, "ROLE_CACHE_TTL", 0)
+	if ttl:
+		profiles = cache.get(role_cache_key(user.pk))
+		if profiles is not None:
+			return profiles
+	loaded = User.objects.select_related(*(f"{r}__faculty" for r in relations)).filter(pk=user.pk).first()
+	profiles = {}
+	if loaded is not None:
+		for relation in relations:
+			profiles[relation] = getattr(loaded, relation, None)
+	if ttl:
+		cache.set(role_cache_key(user.pk), profiles, ttl)
+	return profiles
+
+
+def remember_role(user, role):
+	user.__dict__[_MEMO_ATTR] = role
+
+
+def resolve_role(user):
+	"""Role and profile of `user`, loaded in one query and memoized for the request's user object"""
+	if user is None or not user.is_authenticated:
+		return UserRole(NO_ROLE, None)
+	memo = user.__dict__.get(_MEMO_ATTR)
+	if memo is not None:
+		return memo
+	profiles = _load_profiles(user)
+	_prime(user, profiles)
+	memo = UserRole(NO_ROLE, None, user.is_superuser)
+	for role, relation in PROFILE_RELATIONS:
+		if profiles.get(relation) is not None:
+			memo = UserRole(role, profiles[relation], user.is_superuser)
+			break
+	remember_role(user, memo)
+	return memo
+
+
+def role_profile(user, role):
+	"""`user`'s profile for `role`, which need not be their primary one, or None
+
+	A user may hold several profiles (an administrator who also studies); capability
+	checks ask for the one they need instead of comparing the primary role.
+	"""
+	resolved = resolve_role(user)
+	if resolved.role == role:
+		return resolved.profile
+	relation = dict(PROFILE_RELATIONS)[role]
+	if isinstance(user, User):
+		# Reverse caches primed by resolve_role(): no query
+		return getattr(user, relation, None)
+	# Token-claims users only carry their primary role
+	return User._meta.get_field(relation).related_model.objects.filter(user_id=user.pk).first()
+
+
+async def aresolve_role(user):
+	"""resolve_role() for async views; memoized roles (token claims) need no thread hop"""
+	if user is not None and user.is_authenticated and _MEMO_ATTR in user.__dict__:
+		return user.__dict__[_MEMO_ATTR]
+	return await sync_to_async(resolve_role)(user)
@@ -0,0 +1,212 @@
+import logging
+import sqlite3
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = "replica"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_KEY = "university:primary-until:{}"
+LAST_WRITE_KEY = "university:last-write:{}"
+
+
+class RoutingState:
+	"""Where the current request reads from; `written` collects the labels of the models it wrote"""
+
+	__slots__ = ("replica", "written")
+
+	def __init__(self, replica):
+		self.replica = replica
+		self.written = set()
+
+
+_state = ContextVar("university_db_routing", default=None)
+
+
+def get_cache():
+	# Same alias as caching.get_cache(); not imported from there because caching depends on this module
+	return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def replica_configured():
+	return REPLICA_ALIAS in connections.settings
+
+
+def sticky_seconds():
+	return getattr(settings, "DB_STICKY_SECONDS", 5)
+
+
+def written_labels(model):
+	"""Labels a write to `model` changes; an m2m through table counts as both of its ends"""
+	if model._meta.auto_created:
+		return {field.related_model._meta.label_lower for field in model._meta.fields if field.is_relation}
+	return {model._meta.label_lower}
+
+
+def request_user_id(request):
+	"""Id of the calling user, or None if anonymous
+
+	DRF authenticates inside the view, after routing has been decided, so a bearer
+	token is decoded here (signature and expiry only, without the revocation lookup).
+	"""
+	user = getattr(request, "user", None)
+	if user is not None and user.is_authenticated:
+		return user.pk
+	authentication = JWTAuthentication()
+	header = authentication.get_header(request)
+	raw = header and authentication.get_raw_token(header)
+	if not raw:
+		return None
+	try:
+		return AccessToken(raw).get(api_settings.USER_ID_CLAIM)
+	except TokenError:
+		return None
+
+
+def begin_request(request):
+	"""Decide where `request` reads from; returns the token for end_request()"""
+	replica = False
+	if request.method in SAFE_METHODS and replica_configured():
+		user_id = request_user_id(request)
+		# Read-your-writes: a user who just wrote keeps reading the primary for a while
+		replica = user_id is None or get_cache().get(STICKY_KEY.format(user_id)) is None
+	return _state.set(RoutingState(replica))
+
+
+def record_write(request, labels):
+	"""Pin the writing user to the primary, flag `labels` as possibly lagging, schedule a replica sync"""
+	if not replica_configured():
+		return
+	cache = get_cache()
+	user_id = request_user_id(request)
+	entries = {LAST_WRITE_KEY.format(label): 1 for label in labels}
+	if user_id is not None:
+		entries[STICKY_KEY.format(user_id)] = 1
+	cache.set_many(entries, sticky_seconds())
+	if getattr(settings, "DB_REPLICA_SYNC", "off") == "request":
+		replica_sync.schedule()
+
+
+def completed_writes(response):
+	"""Labels written by the current request, if it wrote anything and succeeded"""
+	state = _state.get()
+	if state is None or not state.written or response is None or response.status_code >= 400:
+		return None
+	return state.written
+
+
+def end_request(token, request, response):
+	try:
+		labels = completed_writes(response)
+		if labels:
+			record_write(request, labels)
+	finally:
+		_state.reset(token)
+
+
+async def aend_request(token, request, response):
+	"""end_request() for async middleware: the write bookkeeping runs off the event loop"""
+	try:
+		labels = completed_writes(response)
+		if labels:
+			await sync_to_async(record_write)(request, labels)
+	finally:
+		# Reset in the context that set it, not in the sync_to_async copy
+		_state.reset(token)
+
+
+def reading_from_replica():
+	state = _state.get()
+	return state is not None and state.replica and not state.written
+
+
+def replica_may_lag(models):
+	"""True while this request reads from the replica and someone wrote one of `models` within the stickiness window
+
+	The replica may not have caught up yet, so responses built now must not be cached under
+	the (already bumped) version counters.
+	"""
+	if not reading_from_replica():
+		return False
+	return bool(get_cache().get_many([LAST_WRITE_KEY.format(model._meta.label_lower) for model in models]))
+
+
+class PrimaryReplicaRouter:
+	"""Reads of safe-method requests go to the replica alias, everything else to the primary
+
+	Outside a request (commands, shell, signals of background jobs), inside a transaction
+	and after the request's first write, reads stay on the primary.
+	"""
+
+	def db_for_read(self, model, **hints):
+		instance = hints.get("instance")
+		if instance is not None and instance._state.db:
+			return instance._state.db
+		if reading_from_replica() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+			return REPLICA_ALIAS
+		return DEFAULT_DB_ALIAS
+
+	def db_for_write(self, model, **hints):
+		state = _state.get()
+		if state is not None:
+			state.written.update(written_labels(model))
+		return DEFAULT_DB_ALIAS
+
+	def allow_relation(self, obj1, obj2, **hints):
+		return True
+
+	def allow_migrate(self, db, app_label, model_name=None, **hints):
+		# The replica receives the schema through replication
+		return db != REPLICA_ALIAS
+
+
+def sync_sqlite_replica():
+	"""Replication stand-in for local setups: copy the primary SQLite file onto the replica"""
+	primary = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"])
+	replica = sqlite3.connect(settings.DATABASES[REPLICA_ALIAS]["NAME"])
+	try:
+		primary.backup(replica)
+	finally:
+		primary.close()
+		replica.close()
+
+
+class ReplicaSync:
+	"""Runs sync_sqlite_replica() in a daemon thread, off the request path
+
+	Writes arriving while a copy is running coalesce into a single follow-up copy.
+	"""
+
+	def __init__(self):
+		self.pending = threading.Event()
+		self.lock = threading.Lock()
+		self.thread = None
+
+	def schedule(self):
+		self.pending.set()
+		with self.lock:
+			if self.thread is None or not self.thread.is_alive():
+				self.thread = threading.Thread(target=self.run, name="replica-sync", daemon=True)
+				self.thread.start()
+
+	def run(self):
+		while True:
+			self.pending.wait()
+			self.pending.clear()
+			try:
+				sync_sqlite_replica()
+			except sqlite3.Error:
+				logger.exception("replica sync failed")
+
+
+replica_sync = ReplicaSync()
@@ -0,0 +1,85 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Subject
+
+TERM = re.compile(r"\w+")
+
+
+def search_terms(text):
+	return TERM.findall(text.lower())
+
+
+class SearchIndex:
+	"""FTS5 table over `columns` of `model`, rowid = primary key (created by migration 0007)
+
+	Kept in sync by the model signals in signals.py; bulk loaders, which send none,
+	call rebuild(). Databases other than SQLite have no table: matching falls back
+	to prefix lookups on the model's columns.
+	"""
+
+	def __init__(self, table, model, columns):
+		self.table = table
+		self.model = model
+		self.columns = columns
+
+	def enabled(self, using):
+		return connections[using].vendor == "sqlite"
+
+	def matching(self, text, using=DEFAULT_DB_ALIAS):
+		"""Primary keys of the rows with a word starting with every term of `text`, as a subquery"""
+		terms = search_terms(text)
+		if not terms:
+			return self.model.objects.none().values("pk")
+		if self.enabled(using):
+			# Terms are \w+ only, so quoting them cannot break out of the FTS5 expression
+			expression = " ".join(f'"{term}"*' for term in terms)
+			return RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [expression])
+		condition = Q()
+		for term in terms:
+			condition &= reduce(or_, (Q(**{f"{column}__istartswith": term}) for column in self.columns))
+		return self.model.objects.filter(condition).values("pk")
+
+	def index(self, instances, using=DEFAULT_DB_ALIAS):
+		if not self.enabled(using):
+			return
+		columns = ", ".join(self.columns)
+		placeholders = ", ".join(["%s"] * (len(self.columns) + 1))
+		rows = [(obj.pk, *(getattr(obj, column) for column in self.columns)) for obj in instances]
+		with connections[using].cursor() as cursor:
+			cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [row[:1] for row in rows])
+			cursor.executemany(f"INSERT INTO {self.table} (rowid, {columns}) VALUES ({placeholders})", rows)
+
+	def remove(self, pks, using=DEFAULT_DB_ALIAS):
+		if not self.enabled(using):
+			return
+		with connections[using].cursor() as cursor:
+			cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in pks])
+
+	def rebuild(self, using=DEFAULT_DB_ALIAS):
+		"""Re-index every row in two statements"""
+		if not self.enabled(using):
+			return
+		columns = ", ".join(self.columns)
+		with connections[using].cursor() as cursor:
+			cursor.execute(f"DELETE FROM {self.table}")
+			cursor.execute(
+				f"INSERT INTO {self.table} (rowid, {columns}) SELECT {self.model._meta.pk.column}, {columns} "
+				f"FROM {self.model._meta.db_table}"
+			)
+
+
+USER_SEARCH = SearchIndex("university_user_search", User, ("username", "first_name", "last_name"))
+SUBJECT_SEARCH = SearchIndex("university_subject_search", Subject, ("code", "title"))
+SEARCH_INDEXES = {User: USER_SEARCH, Subject: SUBJECT_SEARCH}
+
+
+def rebuild_search_indexes(using=DEFAULT_DB_ALIAS):
+	for index in SEARCH_INDEXES.values():
+		index.rebuild(using)
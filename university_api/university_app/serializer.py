@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Faculty, Administrator, Professor, Student, Subject, Grade
+from .roles import STUDENT, resolve_role
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -54,7 +55,28 @@ class GradeSerializer(serializers.ModelSerializer):
         read_only_fields = ["subject", "created_at", "updated_at"]
 
 
-class SubjectSerializer(serializers.ModelSerializer):
+class EnrolledFlagMixin:
+    def get_enrolled(self, obj):
+        enrolled_ids = self.context.get("enrolled_subject_ids")
+        if enrolled_ids is not None:
+            return obj.pk in enrolled_ids
+        request = self.context.get("request")
+        if not request or not request.user:
+            return False
+        role = resolve_role(request.user)
+        if role.role != STUDENT:
+            return False
+        return obj.students.filter(pk=role.profile.pk).exists()
+
+
+class BulkGradeRowSerializer(serializers.Serializer):
+    """One `{student_id, grade, notes}` entry of a bulk grade upload"""
+    student_id = serializers.IntegerField()
+    grade = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True, required=False, default=None)
+    notes = serializers.CharField(allow_blank=True, required=False, default="")
+
+
+class SubjectSerializer(EnrolledFlagMixin, serializers.ModelSerializer):
     faculty = FacultySerializer(read_only=True)
     professor = ProfessorSerializer(read_only=True)
     students = StudentSerializer(many=True, read_only=True)
@@ -64,15 +86,35 @@ class SubjectSerializer(serializers.ModelSerializer):
         model = Subject
         fields = ["id", "code", "title", "faculty", "professor", "students", "enrolled"]
 
-    def get_enrolled(self, obj):
-        request = self.context.get("request")
-        if not request or not request.user or not request.user.is_authenticated:
-            return False
-        user = request.user
-        if hasattr(user, "student_profile"):
-            try:
-                stu = user.student_profile
-                return obj.students.filter(pk=stu.pk).exists()
-            except Student.DoesNotExist:
-                return False
-        return False
+
+class CompactSubjectSerializer(serializers.ModelSerializer):
+    """Subject without its roster; the professor as `{id, name}` (select_related professor__user)"""
+    faculty = FacultySerializer(read_only=True)
+    professor = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Subject
+        fields = ["id", "code", "title", "faculty", "professor"]
+
+    def get_professor(self, obj):
+        prof = obj.professor
+        if prof is None:
+            return None
+        return {"id": prof.pk, "name": prof.user.get_full_name() or prof.user.username}
+
+
+class SubjectSummarySerializer(EnrolledFlagMixin, CompactSubjectSerializer):
+    """Compact list row: counts instead of the nested roster (expects a `student_count` annotation)"""
+    student_count = serializers.IntegerField(read_only=True)
+    enrolled = serializers.SerializerMethodField()
+
+    class Meta(CompactSubjectSerializer.Meta):
+        fields = CompactSubjectSerializer.Meta.fields + ["student_count", "enrolled"]
+
+
+class CompactGradeSerializer(serializers.ModelSerializer):
+    """Grade of a known student: subject id instead of the nested student"""
+
+    class Meta:
+        model = Grade
+        fields = ["id", "subject", "grade", "notes", "updated_at"]
@@ -0,0 +1,158 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_versions
+from .dashboard import DASHBOARD_USER_FIELDS, invalidate_dashboards
+from .grade_stats import GradeChange, apply_changes
+from .instrumentation import record_queries
+from .models import Administrator, Faculty, Grade, Professor, Student, Subject
+from .revocation import revocations
+from .search import SEARCH_INDEXES
+from .roles import invalidate_role
+
+
+@receiver(post_save, sender=Administrator)
+@receiver(post_save, sender=Professor)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Administrator)
+@receiver(post_delete, sender=Professor)
+@receiver(post_delete, sender=Student)
+def invalidate_cached_role(sender, instance, **kwargs):
+	invalidate_role(instance.user_id)
+
+
+@receiver(post_delete, sender=Administrator)
+@receiver(post_delete, sender=Professor)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=User)
+def revoke_user_tokens(sender, instance, **kwargs):
+	# Access tokens claim the removed role until they expire: cut them all off at once
+	revocations.revoke_user(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def revoke_deactivated_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+	# Role-claim tokens authenticate without loading the user, so is_active is never checked on them
+	if not created and not instance.is_active and (update_fields is None or "is_active" in update_fields):
+		revocations.revoke_user(instance.pk)
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_save, sender=Professor)
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Faculty)
+@receiver(post_delete, sender=Professor)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=User)
+def bump_catalogue_version(sender, **kwargs):
+	bump_versions(sender)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=User)
+def index_for_search(sender, instance, using, update_fields=None, **kwargs):
+	index = SEARCH_INDEXES[sender]
+	# e.g. last_login updates leave the indexed names alone
+	if update_fields is None or set(update_fields) & set(index.columns):
+		index.index([instance], using)
+
+
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=User)
+def remove_from_search(sender, instance, using, **kwargs):
+	SEARCH_INDEXES[sender].remove([instance.pk], using)
+
+
+@receiver(m2m_changed, sender=Subject.students.through)
+def bump_enrollment_version(sender, action, **kwargs):
+	if action in ("post_add", "post_remove", "post_clear"):
+		bump_versions(Subject)
+
+
+@receiver(m2m_changed, sender=Subject.students.through)
+def invalidate_enrollment_dashboards(sender, instance, action, reverse, pk_set, **kwargs):
+	# reverse: student.subjects changed, so `instance` is the student
+	if action in ("post_add", "post_remove"):
+		invalidate_dashboards([instance.pk] if reverse else pk_set)
+	elif action == "pre_clear":
+		instance._cleared_student_ids = [instance.pk] if reverse else list(instance.students.values_list("pk", flat=True))
+	elif action == "post_clear":
+		invalidate_dashboards(getattr(instance, "_cleared_student_ids", []))
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=User)
+def invalidate_profile_dashboards(sender, instance, created, update_fields=None, **kwargs):
+	# A new student has no snapshot yet
+	if created:
+		return
+	if sender is Student:
+		invalidate_dashboards([instance.pk])
+	elif update_fields is None or set(update_fields) & DASHBOARD_USER_FIELDS:
+		invalidate_dashboards(Student.objects.filter(user_id=instance.pk).values_list("pk", flat=True))
+		# Professor names appear on the dashboards of every enrolled student
+		if Professor.objects.filter(user_id=instance.pk).exists():
+			bump_versions(Professor)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(pre_delete, sender=Subject)
+def invalidate_enrolled_dashboards(sender, instance, created=False, **kwargs):
+	# Dashboards list the code, title and professor of every enrolled subject
+	if not created:
+		invalidate_dashboards(Subject.students.through.objects.filter(subject=instance).values_list("student_id", flat=True))
+
+
+STAT_FIELDS = {"subject_id", "student_id", "grade"}
+
+
+@receiver(pre_save, sender=Grade)
+def remember_stored_grade(sender, instance, **kwargs):
+	# Rows not loaded through from_db (or loaded with .only()) need one read to know the old value
+	if instance.pk is not None and not STAT_FIELDS <= getattr(instance, "_loaded_values", {}).keys():
+		instance._loaded_values = Grade.objects.filter(pk=instance.pk).values(*STAT_FIELDS).first() or {}
+
+
+@receiver(post_save, sender=Grade)
+def update_grade_stats_on_save(sender, instance, created, **kwargs):
+	old = {} if created else getattr(instance, "_loaded_values", {})
+	if old and (old["subject_id"], old["student_id"]) != (instance.subject_id, instance.student_id):
+		changes = [
+			GradeChange(old["subject_id"], old["student_id"], old["grade"], None),
+			GradeChange(instance.subject_id, instance.student_id, None, instance.grade),
+		]
+	else:
+		changes = [GradeChange(instance.subject_id, instance.student_id, old.get("grade"), instance.grade)]
+	apply_changes(changes)
+	invalidate_dashboards(change.student_id for change in changes)
+	instance._loaded_values = {"subject_id": instance.subject_id, "student_id": instance.student_id, "grade": instance.grade}
+
+
+@receiver(post_delete, sender=Grade)
+def update_grade_stats_on_delete(sender, instance, **kwargs):
+	stored = getattr(instance, "_loaded_values", {})
+	student_id = stored.get("student_id", instance.student_id)
+	apply_changes([GradeChange(stored.get("subject_id", instance.subject_id), student_id, stored.get("grade", instance.grade), None)])
+	invalidate_dashboards([student_id])
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+	if connection.vendor != "sqlite" or not getattr(settings, "SQLITE_TUNING", False):
+		return
+	# Straight on the DB-API connection: no execute wrappers or query log for setup statements
+	for name, value in settings.SQLITE_PRAGMAS.items():
+		connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+	# Fires again on reconnect; the wrapper list belongs to the long-lived connection object
+	if record_queries not in connection.execute_wrappers:
+		connection.execute_wrappers.insert(0, record_queries)
@@ -0,0 +1,139 @@
+import random
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .caching import bump_versions
+from .grade_stats import GradeChange, apply_changes
+from .models import Administrator, Faculty, Grade, Professor, Student, Subject
+from .search import rebuild_search_indexes
+
+
+class Dataset(NamedTuple):
+	"""What generate() created: the faculties, row counts and one representative user per role"""
+	faculties: list
+	professors: int
+	students: int
+	subjects: int
+	enrollments: int
+	grades: int
+	admin: User
+	professor: User
+	student: User
+
+
+def _profiles(model, prefix, count, faculties, password, extra, batch_size):
+	users = User.objects.bulk_create(
+		[
+			User(username=f"{prefix}{i}", first_name=prefix.rstrip("_").title(), last_name=str(i), password=password)
+			for i in range(count)
+		],
+		batch_size=batch_size,
+	)
+	return model.objects.bulk_create(
+		[model(user=user, faculty=faculties[i % len(faculties)], **extra(i)) for i, user in enumerate(users)],
+		batch_size=batch_size,
+	)
+
+
+def generate(
+	faculties=4,
+	subjects=200,
+	students=2000,
+	students_per_subject=30,
+	professors=None,
+	admins=2,
+	grade_rate=0.8,
+	seed=0,
+	prefix="syn",
+	password="synthetic",
+	batch_size=5000,
+):
+	"""Deterministically create a university of the given size with bulk_create
+
+	Subjects, professors and students are spread round-robin over the faculties;
+	each subject enrolls `students_per_subject` students of its own faculty and a
+	`grade_rate` share of those enrollments get a grade. The same `seed` always
+	yields the same rows. Everyone shares `password`, hashed once.
+	"""
+	rng = random.Random(seed)
+	professors = professors or max(1, subjects // 4)
+	hashed = make_password(password)
+	with transaction.atomic():
+		faculty_rows = Faculty.objects.bulk_create([Faculty(name=f"{prefix} Faculty {i}") for i in range(faculties)])
+		admin_rows = _profiles(
+			Administrator, f"{prefix}_admin_", admins, faculty_rows, hashed, lambda i: {"title": "Administrator"}, batch_size
+		)
+		User.objects.filter(pk__in=[a.user_id for a in admin_rows]).update(is_staff=True, is_superuser=True)
+		professor_rows = _profiles(
+			Professor, f"{prefix}_prof_", professors, faculty_rows, hashed, lambda i: {"office": f"R-{i}"}, batch_size
+		)
+		student_rows = _profiles(
+			Student, f"{prefix}_stu_", students, faculty_rows, hashed,
+			lambda i: {"enrollment_year": rng.randint(2018, 2025)}, batch_size,
+		)
+
+		by_faculty = {}
+		for row in professor_rows + student_rows:
+			by_faculty.setdefault((type(row), row.faculty_id), []).append(row)
+		subject_rows = []
+		for i in range(subjects):
+			faculty = faculty_rows[i % faculties]
+			teachers = by_faculty.get((Professor, faculty.pk), [None])
+			subject_rows.append(Subject(
+				code=f"{prefix.upper()}{i:05d}",
+				title=f"Synthetic subject {i}",
+				faculty=faculty,
+				professor=teachers[(i // faculties) % len(teachers)],
+			))
+		Subject.objects.bulk_create(subject_rows, batch_size=batch_size)
+
+		Enrollment = Subject.students.through
+		enrollments, grades, changes = [], [], []
+		enrollment_count = grade_count = 0
+		sample_student = None
+		for subject in subject_rows:
+			pool = by_faculty.get((Student, subject.faculty_id), [])
+			# Each subject has its own difficulty so per-subject statistics differ
+			mean = rng.uniform(45, 80)
+			for student in rng.sample(pool, min(students_per_subject, len(pool))):
+				enrollments.append(Enrollment(subject_id=subject.pk, student_id=student.pk))
+				sample_student = sample_student or student
+				if rng.random() < grade_rate:
+					value = Decimal(f"{min(max(rng.gauss(mean, 15), 0), 100):.2f}")
+					grades.append(Grade(subject=subject, student=student, professor=subject.professor, grade=value))
+					changes.append(GradeChange(subject.pk, student.pk, None, value))
+			if len(enrollments) >= batch_size:
+				enrollment_count += _flush(Enrollment, enrollments, batch_size)
+				grade_count += _flush(Grade, grades, batch_size)
+				apply_changes(changes)
+				changes.clear()
+		enrollment_count += _flush(Enrollment, enrollments, batch_size)
+		grade_count += _flush(Grade, grades, batch_size)
+		apply_changes(changes)
+
+	# bulk_create sends no model signals: invalidate cached catalogue responses and re-index search explicitly
+	bump_versions(Faculty, User, Professor, Student, Subject)
+	rebuild_search_indexes()
+	sample_subject = next((s for s in subject_rows if s.professor is not None), None)
+	return Dataset(
+		faculties=faculty_rows,
+		professors=len(professor_rows),
+		students=len(student_rows),
+		subjects=len(subject_rows),
+		enrollments=enrollment_count,
+		grades=grade_count,
+		admin=User.objects.get(pk=admin_rows[0].user_id) if admin_rows else None,
+		professor=sample_subject.professor.user if sample_subject else None,
+		student=sample_student.user if sample_student else None,
+	)
+
+
+def _flush(model, rows, batch_size):
+	model.objects.bulk_create(rows, batch_size=batch_size)
+	count = len(rows)
+	rows.clear()
+	return count
@@ -1,12 +1,60 @@
+import base64
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
-from rest_framework.test import APITestCase
-from rest_framework import status
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework import permissions, status
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.contrib.auth.models import User
-from .models import Faculty, Professor, Student, Subject, Administrator
+from .backends import login_queue, offload
+from .caching import get_cache, get_versions, model_label
+from .hashers import verify
+from .instrumentation import QueryBudgetExceeded
+from .models import Faculty, Professor, Student, Subject, Administrator, Grade, StudentGradeStats, SubjectGradeStats, RevokedToken
+from .pagination import KeysetPagination
+from .revocation import revocations
+from .roles import PROFESSOR, STUDENT, resolve_role
+from .search import rebuild_search_indexes
+from .routing import PrimaryReplicaRouter, begin_request, end_request, replica_may_lag
+from .synthetic import generate
+from .views import (
+	AdministratorViewSet,
+	FacultyViewSet,
+	GradeViewSet,
+	ProfessorViewSet,
+	StudentViewSet,
+	SubjectViewSet,
+)
 
 
+@override_settings(QUERY_BUDGET_MODE="raise")
 class UniversityAPITests(APITestCase):
 	def setUp(self):
+		get_cache().clear()
+		revocations.current()
 		self.cs = Faculty.objects.create(name="CS")
 		self.admin_user = User.objects.create_user(username="adminu", password="pass")
 		self.admin_user.is_staff = True
@@ -68,3 +116,895 @@ class UniversityAPITests(APITestCase):
 		res = self.client.get("/api/faculties/")
 		self.assertEqual(res.status_code, 200)
 
+	def test_keyset_pagination(self):
+		Subject.objects.create(code="CS2", title="CS 2", faculty=self.cs, professor=self.prof)
+		Subject.objects.create(code="CS3", title="CS 3", faculty=self.cs, professor=self.prof)
+		token = self.jwt_for("adminu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		# no paging params: legacy bare list
+		res = self.client.get("/api/subjects/")
+		self.assertEqual([s["code"] for s in res.data], ["CS1", "CS2", "CS3"])
+
+		res = self.client.get("/api/subjects/", {"page_size": 2})
+		self.assertEqual([s["code"] for s in res.data["results"]], ["CS1", "CS2"])
+		self.assertIsNone(res.data["previous"])
+		res = self.client.get(res.data["next"])
+		self.assertEqual([s["code"] for s in res.data["results"]], ["CS3"])
+		self.assertIsNone(res.data["next"])
+		res = self.client.get(res.data["previous"])
+		self.assertEqual([s["code"] for s in res.data["results"]], ["CS1", "CS2"])
+
+		res = self.client.get("/api/subjects/", {"cursor": "garbage"})
+		self.assertEqual(res.status_code, 404)
+
+		# Crafted cursors are checked against the ordering fields
+		def cursor(*values):
+			return base64.urlsafe_b64encode(json.dumps({"v": values}).encode()).decode()
+
+		for path, values in (("grades", ["notadate", 1]), ("grades", [None, "x"]), ("subjects", ["CS1", {"a": 1}])):
+			self.assertEqual(self.client.get(f"/api/{path}/", {"cursor": cursor(*values)}).status_code, 404, values)
+		res = self.client.get("/api/grades/", {"cursor": cursor("2999-01-01T00:00:00+00:00", 1)})
+		self.assertEqual((res.status_code, res.data["results"]), (200, []))
+		self.assertIn("cursor=", res.data["previous"])
+
+	def test_subject_list_query_count_is_constant(self):
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		def list_queries():
+			with CaptureQueriesContext(connection) as ctx:
+				res = self.client.get("/api/subjects/")
+			self.assertEqual(res.status_code, 200)
+			return len(ctx.captured_queries), res.data
+
+		baseline, _ = list_queries()
+		for i in range(10):
+			Subject.objects.create(code=f"X{i}", title="Extra", faculty=self.cs, professor=self.prof)
+		queries, data = list_queries()
+		self.assertEqual(queries, baseline)
+		self.assertEqual(len(data), 11)
+		self.assertEqual([s["enrolled"] for s in data if s["code"] == "CS1"], [True])
+		self.assertFalse(any(s["enrolled"] for s in data if s["code"] != "CS1"))
+
+	def test_subject_summary_and_roster(self):
+		other = User.objects.create_user(username="stu2", first_name="Grace", last_name="Hopper")
+		self.subj.students.add(Student.objects.create(user=other, faculty=self.cs))
+		self.prof_user.first_name, self.prof_user.last_name = "Ada", "Lovelace"
+		self.prof_user.save()
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		res = self.client.get("/api/subjects/", {"view": "summary"})
+		row = res.data[0]
+		self.assertNotIn("students", row)
+		self.assertEqual(row["student_count"], 2)
+		self.assertEqual(row["professor"], {"id": self.prof.id, "name": "Ada Lovelace"})
+		self.assertTrue(row["enrolled"])
+
+		res = self.client.get(f"/api/subjects/{self.subj.id}/students/", {"page_size": 1})
+		self.assertEqual([s["user"]["username"] for s in res.data["results"]], ["stuu"])
+		res = self.client.get(res.data["next"])
+		self.assertEqual([s["user"]["username"] for s in res.data["results"]], ["stu2"])
+
+	def test_role_resolution_is_one_query_and_memoized(self):
+		user = User.objects.get(pk=self.stu_user.pk)
+		with self.assertNumQueries(1):
+			role = resolve_role(user)
+			self.assertEqual(role.role, STUDENT)
+			self.assertEqual(role.profile, self.stu)
+			self.assertFalse(hasattr(user, "professor_profile"))
+			self.assertEqual(user.student_profile.faculty, self.cs)
+			resolve_role(user)
+		self.assertEqual(resolve_role(User.objects.get(pk=self.prof_user.pk)).role, PROFESSOR)
+		self.assertTrue(resolve_role(User.objects.get(pk=self.admin_user.pk)).is_admin)
+
+	def test_role_claims_skip_auth_queries(self):
+		legacy = str(RefreshToken.for_user(self.stu_user).access_token)
+		claims = self.jwt_for("stuu")
+		self.assertEqual(AccessToken(claims)["role"], "student")
+		self.assertEqual(AccessToken(claims)["profile_id"], self.stu.id)
+
+		def count(token, url):
+			self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+			with CaptureQueriesContext(connection) as ctx:
+				res = self.client.get(url)
+			self.assertEqual(res.status_code, 200)
+			return len(ctx.captured_queries), res.data
+
+		legacy_queries, legacy_data = count(legacy, "/api/subjects/")
+		claims_queries, claims_data = count(claims, "/api/subjects/")
+		self.assertEqual(claims_data, legacy_data)
+		self.assertEqual(legacy_queries - claims_queries, 2)
+
+		queries, data = count(claims, "/api/me/profile/")
+		self.assertEqual(queries, 1)
+		self.assertEqual(data["user"]["username"], "stuu")
+		self.assertEqual(data["profile"]["enrollment_year"], 2025)
+
+	def test_refresh_reissues_role_claims(self):
+		User.objects.create_user(username="newbie", password="pass")
+		res = self.client.post(reverse("token_obtain_pair"), {"username": "newbie", "password": "pass"}, format="json")
+		self.assertEqual(AccessToken(res.data["access"])["role"], "user")
+		self.assertNotIn("role", RefreshToken(res.data["refresh"]))
+
+		Student.objects.create(user=User.objects.get(username="newbie"), faculty=self.cs)
+		res = self.client.post(reverse("token_refresh"), {"refresh": res.data["refresh"]}, format="json")
+		self.assertEqual(AccessToken(res.data["access"])["role"], "student")
+		self.assertEqual(AccessToken(res.data["access"])["faculty_id"], self.cs.id)
+
+	def test_bulk_grade_upsert(self):
+		stu2 = Student.objects.create(user=User.objects.create_user(username="stu2"), faculty=self.cs)
+		outsider = Student.objects.create(user=User.objects.create_user(username="stu3"), faculty=self.cs)
+		self.subj.students.add(stu2)
+		Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade=50)
+		token = self.jwt_for("profu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		res = self.client.post("/api/grades/bulk/", {"subject_id": self.subj.id, "grades": [
+			{"student_id": self.stu.id, "grade": "91.50", "notes": "updated"},
+			{"student_id": stu2.id, "grade": "77"},
+			{"student_id": outsider.id, "grade": "60"},
+			{"student_id": stu2.id, "grade": "10"},
+			{"student_id": self.stu.id, "grade": "not a number"},
+		]}, format="json")
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(sorted(res.data["saved"]), sorted([self.stu.id, stu2.id]))
+		self.assertEqual([e["index"] for e in res.data["errors"]], [2, 3, 4])
+		self.assertEqual(Grade.objects.get(subject=self.subj, student=self.stu).notes, "updated")
+		self.assertEqual(str(Grade.objects.get(subject=self.subj, student=stu2).grade), "77.00")
+		self.assertFalse(Grade.objects.filter(student=outsider).exists())
+
+		other = Subject.objects.create(code="OTHER", title="Other", faculty=self.cs)
+		res = self.client.post("/api/grades/bulk/", {"subject_id": other.id, "grades": []}, format="json")
+		self.assertEqual(res.status_code, 404)
+		for subject_id in ("abc", [self.subj.id]):
+			res = self.client.post("/api/grades/bulk/", {"subject_id": subject_id, "grades": []}, format="json")
+			self.assertEqual(res.status_code, 400, subject_id)
+
+	def test_bulk_enroll_and_unenroll(self):
+		new = [Student.objects.create(user=User.objects.create_user(username=f"bulk{i}"), faculty=self.cs) for i in range(3)]
+		token = self.jwt_for("adminu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		url = f"/api/subjects/{self.subj.id}/bulk_add_students/"
+
+		res = self.client.post(url, {"student_ids": [self.stu.id, new[0].id, new[1].id, 99999]}, format="json")
+		self.assertEqual(res.data, {"added": [new[0].id, new[1].id], "already_present": [self.stu.id], "missing": [99999]})
+
+		upload = SimpleUploadedFile("intake.csv", f"student_id,name\n{new[2].id},x\n{new[0].id},y\n".encode())
+		res = self.client.post(url, {"file": upload}, format="multipart")
+		self.assertEqual(res.data["added"], [new[2].id])
+		self.assertEqual(self.subj.students.count(), 4)
+		for content in (b"\xff\xfe1\n", b'"' + b"1" * 200_000 + b'"\n'):
+			res = self.client.post(url, {"file": SimpleUploadedFile("intake.csv", content)}, format="multipart")
+			self.assertEqual(res.status_code, 400)
+
+		res = self.client.post(f"/api/subjects/{self.subj.id}/bulk_remove_students/", {"student_ids": [new[0].id, new[1].id]}, format="json")
+		self.assertEqual(res.data["removed"], [new[0].id, new[1].id])
+		self.assertEqual(self.subj.students.count(), 2)
+
+		token = self.jwt_for("profu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		res = self.client.post(url, {"student_ids": [new[0].id]}, format="json")
+		self.assertEqual(res.status_code, 403)
+
+	def test_secondary_profiles_grant_their_capabilities(self):
+		# An administrator who also studies enrolls as a student, through the claims path and the database path
+		extra = Student.objects.create(user=self.admin_user, faculty=self.cs)
+		for token in (self.jwt_for("adminu"), str(AccessToken.for_user(self.admin_user))):
+			self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+			self.assertEqual(self.client.post(f"/api/subjects/{self.subj.id}/enroll/").status_code, 200)
+			self.assertIn(extra, self.subj.students.all())
+			self.assertEqual(self.client.post(f"/api/subjects/{self.subj.id}/unenroll/").status_code, 200)
+			self.assertEqual(self.client.get("/api/grades/by_subject/", {"subject_id": self.subj.id}).status_code, 200)
+
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jwt_for('profu')}")
+		self.assertEqual(self.client.post(f"/api/subjects/{self.subj.id}/enroll/").status_code, 403)
+		self.assertEqual(self.client.get("/api/grades/by_subject/", {"subject_id": "x"}).status_code, 400)
+
+	def test_streaming_exports(self):
+		Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade="88.50", notes="a, b")
+		token = self.jwt_for("profu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		res = self.client.get("/api/grades/export/", {"subject_id": self.subj.id})
+		self.assertTrue(res.streaming)
+		lines = b"".join(res.streaming_content).decode().splitlines()
+		self.assertEqual(lines[0].split(",")[:4], ["id", "subject_id", "subject_code", "student_id"])
+		self.assertIn('88.50,"a, b"', lines[1])
+
+		self.assertEqual(res["Content-Disposition"], f'attachment; filename="grades-subject-{self.subj.id}.csv"')
+		for params in ({"subject_id": "1x"}, {"faculty_id": '1"; filename="evil.exe'}):
+			self.assertEqual(self.client.get("/api/grades/export/", params).status_code, 400, params)
+		self.assertEqual(self.client.get("/api/subjects/CS1/roster_export/").status_code, 400)
+
+		res = self.client.get("/api/grades/export/", {"output": "ndjson"})
+		rows = [json.loads(line) for line in b"".join(res.streaming_content).decode().splitlines()]
+		self.assertEqual([(r["username"], r["grade"]) for r in rows], [("stuu", "88.50")])
+
+		res = self.client.get(f"/api/subjects/{self.subj.id}/roster_export/")
+		lines = b"".join(res.streaming_content).decode().splitlines()
+		self.assertEqual(len(lines), 2)
+		self.assertTrue(lines[1].startswith(f"{self.stu.id},stuu,"))
+
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		res = self.client.get(f"/api/subjects/{self.subj.id}/roster_export/")
+		self.assertEqual(res.status_code, 403)
+
+	def test_versioned_list_cache(self):
+		token = self.jwt_for("adminu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		res = self.client.get("/api/faculties/")
+		self.assertEqual(res["X-Cache"], "MISS")
+		# The ETag checks the table unless the version counters are shared by every worker
+		with self.assertNumQueries(1):
+			res = self.client.get("/api/faculties/")
+		with mock.patch("university_app.conditional.cache_is_shared", return_value=True), self.assertNumQueries(0):
+			res = self.client.get("/api/faculties/")
+		self.assertEqual(res["X-Cache"], "HIT")
+		self.assertEqual([f["name"] for f in res.data], ["CS"])
+
+		Faculty.objects.create(name="Math")
+		res = self.client.get("/api/faculties/")
+		self.assertEqual(res["X-Cache"], "MISS")
+		self.assertEqual([f["name"] for f in res.data], ["CS", "Math"])
+
+		# enrollment changes invalidate the admin subject list
+		self.client.get("/api/subjects/")
+		self.subj.students.remove(self.stu)
+		res = self.client.get("/api/subjects/")
+		self.assertEqual(res["X-Cache"], "MISS")
+		self.assertEqual(res.data[0]["students"], [])
+
+		res = self.client.get("/api/cache/stats/")
+		self.assertEqual(res.data["FacultyViewSet"], {"hits": 2, "misses": 2, "hit_rate": 0.5})
+
+		# per-user subject lists are never shared
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		res = self.client.get("/api/subjects/")
+		self.assertFalse(res.has_header("X-Cache"))
+
+	def test_conditional_get(self):
+		grade = Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade=70)
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		res = self.client.get("/api/grades/")
+		etag = res["ETag"]
+		self.assertTrue(res.has_header("Last-Modified"))
+		with self.assertNumQueries(1):
+			res = self.client.get("/api/grades/", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 304)
+		self.assertFalse(res.content)
+
+		grade.grade = 80
+		grade.save()
+		res = self.client.get("/api/grades/", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+
+		res = self.client.get(f"/api/grades/{grade.id}/")
+		detail_etag = res["ETag"]
+		self.assertEqual(self.client.get(f"/api/grades/{grade.id}/", HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+		self.assertEqual(self.client.get("/api/grades/abc/").status_code, 404)
+
+		# nested data changes (enrollment) invalidate the subject list validator
+		res = self.client.get("/api/subjects/")
+		self.subj.students.remove(self.stu)
+		res = self.client.get("/api/subjects/", HTTP_IF_NONE_MATCH=res["ETag"])
+		self.assertEqual(res.status_code, 200)
+
+		# A write whose version bump this process never saw (another worker's local cache) still shows
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jwt_for('adminu')}")
+		etag = self.client.get("/api/faculties/")["ETag"]
+		Faculty.objects.update(updated_at=timezone.now() + timedelta(seconds=1))
+		self.assertEqual(self.client.get("/api/faculties/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_grade_stats_are_maintained_incrementally(self):
+		stu2 = Student.objects.create(user=User.objects.create_user(username="stu2", password="pass"), faculty=self.cs)
+		self.subj.students.add(stu2)
+		grade = Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade=40)
+		Grade.objects.create(subject=self.subj, student=stu2, professor=self.prof, grade=100)
+		grade.grade = 60
+		grade.save()
+
+		token = self.jwt_for("profu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		res = self.client.get(f"/api/subjects/{self.subj.id}/stats/")
+		self.assertEqual((res.data["count"], res.data["mean"], res.data["stddev"]), (2, 80.0, 20.0))
+		self.assertEqual((res.data["min"], res.data["max"]), (60, 100))
+		self.assertEqual(res.data["histogram"][6]["count"], 1)
+		self.assertEqual(res.data["histogram"][9], {"from": 90, "to": None, "count": 1})
+
+		# bulk upsert removes the current maximum: bounds are re-read
+		self.client.post("/api/grades/bulk/", {"subject_id": self.subj.id, "grades": [{"student_id": stu2.id, "grade": "50"}]}, format="json")
+		grade.delete()
+		res = self.client.get(f"/api/subjects/{self.subj.id}/stats/")
+		self.assertEqual((res.data["count"], res.data["min"], res.data["max"]), (1, 50, 50))
+
+		# Re-grading a roster re-reads the bounds of every stale row in one grouped query per scope
+		roster = [Student.objects.create(user=User.objects.create_user(username=f"r{i}"), faculty=self.cs) for i in range(4)]
+		self.subj.students.add(*roster)
+		rows = [{"student_id": student.id, "grade": str(90 + i)} for i, student in enumerate(roster)]
+		self.client.post("/api/grades/bulk/", {"subject_id": self.subj.id, "grades": rows}, format="json")
+		with CaptureQueriesContext(connection) as queries:
+			res = self.client.post("/api/grades/bulk/", {"subject_id": self.subj.id, "grades": [{**row, "grade": "10"} for row in rows]}, format="json")
+		self.assertEqual(len(res.data["saved"]), 4)
+		self.assertEqual(sum('MIN("university_app_grade"."grade")' in q["sql"] for q in queries.captured_queries), 2)
+		self.assertEqual(StudentGradeStats.objects.get(student=roster[3]).maximum, 10)
+		self.assertEqual(SubjectGradeStats.objects.get(subject=self.subj).maximum, 50)
+
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		self.assertEqual(self.client.get(f"/api/students/{self.stu.id}/transcript-summary/").data["count"], 0)
+		self.assertEqual(self.client.get(f"/api/students/{stu2.id}/transcript-summary/").status_code, 403)
+
+		out = io.StringIO()
+		call_command("rebuild_grade_stats", "--check", stdout=out)
+		self.assertIn("0 drifted", out.getvalue())
+		self.assertNotIn("statss", out.getvalue())
+		SubjectGradeStats.objects.update(count=7)
+		with self.assertRaises(CommandError):
+			call_command("rebuild_grade_stats", "--check", stdout=io.StringIO())
+		call_command("rebuild_grade_stats", stdout=io.StringIO())
+		self.assertEqual(SubjectGradeStats.objects.get(subject=self.subj).count, 5)
+
+	def test_faculty_grade_analytics(self):
+		other = Subject.objects.create(code="CS2", title="Other", faculty=self.cs)
+		for i, value in enumerate([40, 60, 80, 100]):
+			student = Student.objects.create(user=User.objects.create_user(username=f"a{i}"), faculty=self.cs, enrollment_year=2020 + i % 2)
+			Grade.objects.create(subject=self.subj, student=student, professor=self.prof, grade=value)
+		Grade.objects.create(subject=other, student=self.stu, grade=30)
+		Grade.objects.create(subject=other, student=Student.objects.create(user=User.objects.create_user(username="nograde")))
+
+		token = self.jwt_for("stuu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		self.assertEqual(self.client.get(f"/api/faculties/{self.cs.id}/analytics/").status_code, 403)
+
+		token = self.jwt_for("adminu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		res = self.client.get(f"/api/faculties/{self.cs.id}/analytics/", {"percentiles": "50"})
+		self.assertEqual((res.data["overall"]["count"], res.data["overall"]["mean"]), (5, 62.0))
+		subject = {row["label"]: row for row in res.data["by_subject"]}["CS1"]
+		self.assertEqual((subject["count"], subject["mean"], subject["min"], subject["max"]), (4, 70.0, 40.0, 100.0))
+		self.assertEqual((subject["pass_rate"], subject["percentiles"], subject["mean_delta"]), (0.75, {"p50": 70.0}, 8.0))
+		self.assertEqual(subject["stddev"], 22.3607)
+		professors = {row["key"]: row["count"] for row in res.data["by_professor"]}
+		self.assertEqual(professors, {self.prof.id: 4, None: 1})
+		years = {row["key"]: row["mean"] for row in res.data["by_enrollment_year"]}
+		self.assertEqual(years, {2020: 60.0, 2021: 80.0, 2025: 30.0})
+
+		for params in ({"group_by": "room"}, {"pass_mark": "nan"}, {"pass_mark": "inf"}):
+			res = self.client.get(f"/api/faculties/{self.cs.id}/analytics/", params)
+			self.assertEqual(res.status_code, 400, params)
+		out = io.StringIO()
+		call_command("grade_analytics", "CS", "--group-by", "subject", stdout=out)
+		self.assertIn("CS1", out.getvalue())
+		with self.assertRaisesMessage(CommandError, "pass_mark must be a finite number"):
+			call_command("grade_analytics", "CS", "--pass-mark", "inf", stdout=io.StringIO())
+
+	def test_instrumentation_headers_logs_and_budgets(self):
+		for i in range(3):
+			student = Student.objects.create(user=User.objects.create_user(username=f"n{i}"), faculty=self.cs)
+			Grade.objects.create(subject=self.subj, student=student, professor=self.prof, grade=50 + i)
+		token = self.jwt_for("adminu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		with self.assertLogs("university_app.instrumentation", "INFO") as logs:
+			res = self.client.get("/api/grades/")
+		timing = dict(re.findall(r"(\w+);dur=([\d.]+)", res["Server-Timing"]))
+		self.assertEqual(set(timing), {"db", "app", "render", "total"})
+		self.assertIn('desc="', res["Server-Timing"])
+		line = json.loads(logs.records[-1].getMessage())
+		self.assertEqual((line["endpoint"], line["status"], line["repeated"]), ("GradeViewSet.list", 200, []))
+		self.assertEqual(line["budget"], GradeViewSet.query_budgets["list"])
+
+		# A serializer lookup per row shows up as one repeated fingerprint
+		with override_settings(INSTRUMENTATION_REPEAT_THRESHOLD=3, QUERY_BUDGET_MODE="off"), self.assertLogs("university_app.instrumentation", "WARNING") as logs:
+			with mock.patch.object(GradeViewSet, "get_queryset", lambda view: Grade.objects.all()):
+				self.client.get("/api/grades/")
+		repeated = json.loads(logs.records[-1].getMessage())["repeated"]
+		self.assertEqual([r["count"] for r in repeated], [3, 3, 3])
+		self.assertTrue(any("FROM \"auth_user\"" in r["sql"] for r in repeated))
+
+		with mock.patch.dict(GradeViewSet.query_budgets, {"list": 1}):
+			with self.assertRaises(QueryBudgetExceeded), self.assertLogs("university_app.instrumentation", "WARNING"):
+				self.client.get("/api/grades/")
+			with override_settings(QUERY_BUDGET_MODE="warn"), self.assertLogs("university_app.instrumentation", "WARNING"):
+				self.assertEqual(self.client.get("/api/grades/").status_code, 200)
+
+	def test_sqlite_connections_are_tuned(self):
+		with connection.cursor() as cursor:
+			values = {}
+			for name in ("synchronous", "busy_timeout", "cache_size", "temp_store"):
+				cursor.execute(f"PRAGMA {name}")
+				values[name] = cursor.fetchone()[0]
+		self.assertEqual(values, {
+			"synchronous": 1,
+			"busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+			"cache_size": settings.SQLITE_PRAGMAS["cache_size"],
+			"temp_store": 2,
+		})
+		self.assertEqual(connection.settings_dict["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+
+	@override_settings(DB_REPLICA_SYNC="request")
+	def test_replica_routing_with_read_your_writes(self):
+		factory, router = RequestFactory(), PrimaryReplicaRouter()
+		prof, stu = (f"Bearer {self.jwt_for(name)}" for name in ("profu", "stuu"))
+
+		def routed(request, models=(Grade,)):
+			token = begin_request(request)
+			try:
+				with mock.patch.object(connection, "in_atomic_block", False):
+					return router.db_for_read(Subject), replica_may_lag(models)
+			finally:
+				end_request(token, request, HttpResponse())
+
+		def write(status, model=Grade):
+			request = factory.post("/api/grades/bulk/", HTTP_AUTHORIZATION=prof)
+			token = begin_request(request)
+			self.assertEqual(router.db_for_write(model), "default")
+			with mock.patch.object(connection, "in_atomic_block", False):
+				self.assertEqual(router.db_for_read(Grade), "default")
+			end_request(token, request, HttpResponse(status=status))
+
+		self.assertEqual(routed(factory.get("/api/subjects/", HTTP_AUTHORIZATION=prof)), ("default", False))
+		with mock.patch("university_app.routing.replica_configured", return_value=True), \
+				mock.patch("university_app.routing.replica_sync.schedule") as schedule:
+			self.assertEqual(routed(factory.get("/api/subjects/", HTTP_AUTHORIZATION=prof)), ("replica", False))
+			self.assertEqual(router.db_for_read(Subject), "default")
+
+			# Failed writes pin nobody and leave the replica alone
+			write(400)
+			self.assertEqual(routed(factory.get("/api/grades/", HTTP_AUTHORIZATION=prof)), ("replica", False))
+			schedule.assert_not_called()
+
+			write(201)
+			schedule.assert_called_once()
+			# The writer sticks to the primary; other users read a replica that may lag on what was written
+			self.assertEqual(routed(factory.get("/api/grades/", HTTP_AUTHORIZATION=prof)), ("default", False))
+			self.assertEqual(routed(factory.get("/api/grades/", HTTP_AUTHORIZATION=stu)), ("replica", True))
+			self.assertEqual(routed(factory.get("/api/faculties/", HTTP_AUTHORIZATION=stu), (Faculty,)), ("replica", False))
+
+			# Enrollments are written to the through table and count as writes to both ends
+			get_cache().clear()
+			write(200, Subject.students.through)
+			self.assertEqual(routed(factory.get("/api/subjects/", HTTP_AUTHORIZATION=stu), (Subject,)), ("replica", True))
+			self.assertFalse(router.allow_migrate("replica", "university_app"))
+
+	def test_async_read_views_match_sync(self):
+		other = Subject.objects.create(code="CS2", title="Algorithms", faculty=self.cs, professor=self.prof)
+		other.students.add(self.stu)
+		Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade=81)
+		fetch = async_to_sync(self.async_client.get)
+		paths = ("me/profile/", "subjects/", "subjects/?page_size=1", "subjects/?view=summary", "grades/")
+		tokens = [self.jwt_for(name) for name in ("adminu", "profu", "stuu")]
+		# Tokens without role claims take the database path
+		tokens.append(str(AccessToken.for_user(self.stu_user)))
+		for token in tokens:
+			self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+			for path in paths:
+				expected = self.client.get(f"/api/{path}")
+				res = fetch(f"/api/async/{path}", headers={"Authorization": f"Bearer {token}"})
+				self.assertEqual(res.status_code, 200, path)
+				self.assertIn("Server-Timing", res)
+				body = json.loads(res.content.decode().replace("/api/async/", "/api/"))
+				self.assertEqual(body, json.loads(expected.content), path)
+
+		# Bad parameters get DRF's error responses, not a 500
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens[0]}")
+		for path in ("grades/?ordering=grade", "grades/?subject=x", "subjects/?cursor=garbage"):
+			expected = self.client.get(f"/api/{path}")
+			res = fetch(f"/api/async/{path}", headers={"Authorization": f"Bearer {tokens[0]}"})
+			self.assertEqual((res.status_code, json.loads(res.content)), (expected.status_code, expected.json()), path)
+
+		# The ViewSet's permission and throttle checks apply to its async twin
+		class Closed(BaseThrottle):
+			def allow_request(self, request, view):
+				return False
+
+			def wait(self):
+				return 30
+
+		headers = {"Authorization": f"Bearer {tokens[2]}"}
+		with mock.patch.object(GradeViewSet, "permission_classes", [permissions.IsAdminUser]):
+			self.assertEqual(fetch("/api/async/grades/", headers=headers).status_code, 403)
+		with mock.patch.object(GradeViewSet, "throttle_classes", [Closed]):
+			res = fetch("/api/async/grades/", headers=headers)
+			self.assertEqual((res.status_code, res["Retry-After"]), (429, "30"))
+
+		res = fetch("/api/async/grades/")
+		self.assertEqual((res.status_code, res["WWW-Authenticate"]), (401, 'Bearer realm="api"'))
+		self.assertEqual(fetch("/api/async/grades/", headers={"Authorization": "Bearer nope"}).status_code, 401)
+
+	def test_cors_preflight_short_circuits_with_max_age(self):
+		preflight = {"HTTP_ORIGIN": "https://spa.example", "HTTP_ACCESS_CONTROL_REQUEST_METHOD": "GET"}
+		res = self.client.options("/api/grades/", **preflight)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res["Access-Control-Allow-Origin"], "*")
+		self.assertEqual(res["Access-Control-Max-Age"], str(settings.CORS_PREFLIGHT_MAX_AGE))
+		self.assertIn("authorization", res["Access-Control-Allow-Headers"])
+		# Answered before the instrumentation (and everything else) runs
+		self.assertFalse(res.has_header("Server-Timing"))
+		res = self.client.get("/api/faculties/", HTTP_ORIGIN="https://spa.example")
+		self.assertEqual(res["Access-Control-Allow-Origin"], "*")
+		self.assertFalse(res.has_header("Access-Control-Max-Age"))
+		self.assertFalse(self.client.get("/api/faculties/").has_header("Access-Control-Allow-Origin"))
+
+		with override_settings(CORS_ALLOW_ALL_ORIGINS=False, CORS_ALLOWED_ORIGINS=["https://spa.example"], CORS_ALLOW_CREDENTIALS=True):
+			client = self.client_class()
+			res = client.options("/api/grades/", **preflight)
+			self.assertEqual(res["Access-Control-Allow-Origin"], "https://spa.example")
+			self.assertEqual((res["Access-Control-Allow-Credentials"], res["Vary"]), ("true", "Origin"))
+			res = client.get("/api/faculties/", HTTP_ORIGIN="https://evil.example")
+			self.assertFalse(res.has_header("Access-Control-Allow-Origin"))
+
+	def test_login_rehashes_in_pool_and_sheds_load(self):
+		# A hash from a non-preferred hasher is upgraded on the next successful login
+		self.stu_user.password = make_password("pass", hasher="pbkdf2_sha1")
+		self.stu_user.save()
+		with mock.patch("university_app.backends.offload", wraps=offload) as offloaded:
+			self.jwt_for("stuu")
+		self.assertEqual(offloaded.call_args.args[0], verify)
+		self.stu_user.refresh_from_db()
+		self.assertEqual(identify_hasher(self.stu_user.password).algorithm, get_hasher().algorithm)
+		self.assertTrue(self.stu_user.check_password("pass"))
+		res = self.client.post(reverse("token_obtain_pair"), {"username": "stuu", "password": "wrong"}, format="json")
+		self.assertEqual(res.status_code, 401)
+
+		with override_settings(LOGIN_QUEUE_SIZE=1), login_queue.admit():
+			res = self.client.post(reverse("token_obtain_pair"), {"username": "stuu", "password": "pass"}, format="json")
+		self.assertEqual(res.status_code, 429)
+		self.assertGreaterEqual(int(res["Retry-After"]), 1)
+		self.assertEqual(login_queue.in_flight, 0)
+
+	def test_revoked_tokens_are_refused(self):
+		obtain, refresh_url = reverse("token_obtain_pair"), reverse("token_refresh")
+		login = self.client.post(obtain, {"username": "profu", "password": "pass"}, format="json").data
+		# Tokens that were never revoked are cleared by the Bloom filter alone
+		revocations.current()
+		with self.assertNumQueries(0):
+			self.assertFalse(revocations.is_revoked(AccessToken(login["access"]).payload))
+
+		# Revoking adds to this process's filter without forcing a rebuild everywhere
+		version = get_versions([model_label(RevokedToken)])
+		self.assertEqual(self.client.post(reverse("token_revoke"), {"refresh": login["refresh"]}, format="json").status_code, 200)
+		self.assertEqual(get_versions([model_label(RevokedToken)]), version)
+		self.assertEqual(self.client.post(refresh_url, {"refresh": login["refresh"]}, format="json").status_code, 401)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {login['access']}")
+		self.assertEqual(self.client.get("/api/me/profile/").status_code, 200)
+
+		# A rotated refresh token is spent
+		with mock.patch.object(api_settings, "ROTATE_REFRESH_TOKENS", True):
+			login = self.client.post(obtain, {"username": "profu", "password": "pass"}, format="json").data
+			rotated = self.client.post(refresh_url, {"refresh": login["refresh"]}, format="json").data
+			self.assertEqual(self.client.post(refresh_url, {"refresh": login["refresh"]}, format="json").status_code, 401)
+			self.assertEqual(self.client.post(refresh_url, {"refresh": rotated["refresh"]}, format="json").status_code, 200)
+
+		# Removing a student revokes all of their tokens in one statement
+		tokens = [self.jwt_for("stuu") for _ in range(3)]
+		with CaptureQueriesContext(connection) as queries:
+			self.stu.delete()
+		self.assertEqual(sum("usertokenrevocation" in q["sql"] for q in queries.captured_queries), 1)
+		for token in tokens:
+			self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+			self.assertEqual(self.client.get("/api/me/profile/").status_code, 401)
+		res = async_to_sync(self.async_client.get)("/api/async/me/profile/", headers={"Authorization": f"Bearer {tokens[0]}"})
+		self.assertEqual(res.status_code, 401)
+
+		# Revocations by other processes are pulled in once the filter is REVOCATION_BLOOM_MAX_AGE old
+		elsewhere = AccessToken(self.jwt_for("profu"))
+		RevokedToken.objects.create(jti=elsewhere["jti"], expires_at=timezone.now() + timedelta(minutes=5))
+		later = time.monotonic() + settings.REVOCATION_BLOOM_MAX_AGE
+		with mock.patch("university_app.revocation.time.monotonic", return_value=later):
+			self.assertTrue(revocations.is_revoked(elsewhere.payload))
+
+		# Deactivating a user cuts off their claim-carrying tokens too
+		token = self.jwt_for("profu")
+		self.prof_user.is_active = False
+		self.prof_user.save(update_fields=["is_active"])
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+		self.assertEqual(self.client.get("/api/me/profile/").status_code, 401)
+
+		RevokedToken.objects.create(jti="expired", expires_at=timezone.now() - timedelta(days=1))
+		out = io.StringIO()
+		call_command("compact_revocations", stdout=out)
+		self.assertIn("compacted 1 revoked tokens", out.getvalue())
+		self.assertFalse(RevokedToken.objects.filter(jti="expired").exists())
+
+	def test_student_dashboard_snapshot(self):
+		other = Subject.objects.create(code="CS0", title="Basics", faculty=self.cs, professor=self.prof)
+		grade = Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade=70)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jwt_for('stuu')}")
+		with self.assertNumQueries(3):
+			res = self.client.get("/api/me/dashboard/")
+		self.assertEqual(res["X-Cache"], "MISS")
+		self.assertEqual(res.data["profile"], self.client.get("/api/me/profile/").data["profile"])
+		self.assertEqual([s["code"] for s in res.data["subjects"]], ["CS1"])
+		self.assertEqual(res.data["subjects"][0]["professor"], {"id": self.prof.pk, "name": "profu"})
+		self.assertEqual([(g["subject"], g["grade"]) for g in res.data["grades"]], [(self.subj.pk, "70.00")])
+		with self.assertNumQueries(0):
+			self.assertEqual(self.client.get("/api/me/dashboard/")["X-Cache"], "HIT")
+
+		# The student's grades and enrollments drop the snapshot
+		grade.grade = 90
+		grade.save()
+		res = self.client.get("/api/me/dashboard/")
+		self.assertEqual((res["X-Cache"], res.data["grades"][0]["grade"]), ("MISS", "90.00"))
+		other.students.add(self.stu)
+		self.assertEqual([s["code"] for s in self.client.get("/api/me/dashboard/").data["subjects"]], ["CS0", "CS1"])
+		self.stu.subjects.clear()
+		self.assertEqual(self.client.get("/api/me/dashboard/").data["subjects"], [])
+		# So do their own profile and name, but not their logins
+		self.stu_user.first_name = "Stu"
+		self.stu_user.save()
+		self.assertEqual(self.client.get("/api/me/dashboard/").data["user"]["first_name"], "Stu")
+		self.stu_user.last_login = timezone.now()
+		self.stu_user.save(update_fields=["last_login"])
+		self.assertEqual(self.client.get("/api/me/dashboard/")["X-Cache"], "HIT")
+		self.stu.enrollment_year = 2024
+		self.stu.save()
+		self.assertEqual(self.client.get("/api/me/dashboard/").data["profile"]["enrollment_year"], 2024)
+		# and their professors' names
+		self.subj.students.add(self.stu)
+		self.client.get("/api/me/dashboard/")
+		self.prof_user.first_name, self.prof_user.last_name = "Grace", "Hopper"
+		self.prof_user.save()
+		res = self.client.get("/api/me/dashboard/")
+		self.assertEqual((res["X-Cache"], res.data["subjects"][0]["professor"]["name"]), ("MISS", "Grace Hopper"))
+
+		# Other students' changes do not
+		someone = Student.objects.create(user=User.objects.create_user(username="other"), faculty=self.cs)
+		other.students.add(someone)
+		someone.user.first_name = "Someone"
+		someone.user.save()
+		someone.save()
+		self.assertEqual(self.client.get("/api/me/dashboard/")["X-Cache"], "HIT")
+
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jwt_for('profu')}")
+		self.assertEqual(self.client.get("/api/me/dashboard/").status_code, 403)
+
+	def test_gradebook_columns(self):
+		late = Student.objects.create(user=User.objects.create_user(username="late", first_name="Ann", last_name="Bell"), faculty=self.cs)
+		self.subj.students.add(late)
+		Grade.objects.create(subject=self.subj, student=late, professor=self.prof, grade=64.5, notes="resit")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jwt_for('profu')}")
+		with self.assertNumQueries(3):
+			res = self.client.get("/api/grades/gradebook/", {"subject_id": self.subj.pk})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data, {
+			"subject": {"id": self.subj.pk, "code": "CS1", "title": "CS"},
+			"student_ids": [self.stu.pk, late.pk],
+			"usernames": ["stuu", "late"],
+			"names": ["stuu", "Ann Bell"],
+			"grades": [None, "64.50"],
+			"notes": [None, "resit"],
+		})
+
+		other = Subject.objects.create(code="EN1", title="English", faculty=self.cs)
+		self.assertEqual(self.client.get("/api/grades/gradebook/", {"subject_id": other.pk}).status_code, 404)
+		self.assertEqual(self.client.get("/api/grades/gradebook/", {"subject_id": "x"}).status_code, 400)
+		self.assertEqual(self.client.get("/api/grades/gradebook/", {"subject_id": "9" * 30}).status_code, 400)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jwt_for('stuu')}")
+		self.assertEqual(self.client.get("/api/grades/gradebook/", {"subject_id": self.subj.pk}).status_code, 403)
+
+	def test_filters_search_and_ordering(self):
+		law = Faculty.objects.create(name="Law")
+		ann = Student.objects.create(
+			user=User.objects.create_user(username="ann", first_name="Ann", last_name="Müller"), faculty=law, enrollment_year=2024,
+		)
+		Subject.objects.create(code="LAW101", title="Constitutional Law", faculty=law)
+		Subject.objects.create(code="CS20", title="Databases", faculty=self.cs)
+		Grade.objects.create(subject=self.subj, student=self.stu, professor=self.prof, grade=45)
+		token = self.jwt_for("adminu")
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+		def ids(path, **params):
+			res = self.client.get(path, params)
+			self.assertEqual(res.status_code, 200, res.data)
+			return [row["id"] for row in res.data]
+
+		self.assertEqual(ids("/api/students/", faculty=law.pk), [ann.pk])
+		self.assertEqual(ids("/api/students/", enrollment_year=2025), [self.stu.pk])
+		self.assertEqual(ids("/api/subjects/", code__startswith="CS"), [self.subj.pk, Subject.objects.get(code="CS20").pk])
+		self.assertEqual(ids("/api/grades/", grade__gte=40, grade__lte=50), ids("/api/grades/", subject=self.subj.pk))
+		self.assertEqual(ids("/api/grades/", grade__gte=50), [])
+		for params in ({"grade__gte": "high"}, {"grade__gte": "NaN"}, {"grade__lte": "-Infinity"}, {"subject": "9" * 23}):
+			self.assertEqual(self.client.get("/api/grades/", params).status_code, 400, params)
+
+		# Prefix search over user names and subject titles, diacritics folded
+		self.assertEqual(ids("/api/students/", search="mull"), [ann.pk])
+		self.assertEqual(ids("/api/students/", search="an mü"), [ann.pk])
+		self.assertEqual(ids("/api/subjects/", search="constitution"), [Subject.objects.get(code="LAW101").pk])
+		res = async_to_sync(self.async_client.get)("/api/async/subjects/", {"search": "constitution"}, headers={"Authorization": f"Bearer {token}"})
+		self.assertEqual([row["id"] for row in json.loads(res.content)], [Subject.objects.get(code="LAW101").pk])
+		ann.user.last_name = "Smith"
+		ann.user.save()
+		self.assertEqual(ids("/api/students/", search="muller"), [])
+		self.assertEqual(ids("/api/students/", search="smi"), [ann.pk])
+		Subject.objects.get(code="LAW101").delete()
+		self.assertEqual(ids("/api/subjects/", search="constitution"), [])
+
+		self.assertEqual(ids("/api/students/", ordering="-created"), [ann.pk, self.stu.pk])
+		self.assertEqual(ids("/api/subjects/", ordering="-code")[0], Subject.objects.get(code="CS20").pk)
+		res = self.client.get("/api/subjects/", {"ordering": "title"})
+		self.assertEqual(res.status_code, 400)
+		self.assertIn("code", res.data["error"])
+
+
+class ImportUniversityCommandTests(TestCase):
+	def write_csv(self, directory, name, header, rows):
+		path = os.path.join(directory, name)
+		with open(path, "w", newline="") as handle:
+			writer = csv.writer(handle)
+			writer.writerow(header)
+			writer.writerows(rows)
+		return path
+
+	def test_import_is_idempotent_and_resumable(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			files = {
+				"professors": self.write_csv(tmp, "p.csv", ["username", "first_name", "last_name", "email", "password", "faculty", "office"], [
+					["ada", "Ada", "Lovelace", "", "secret-pass", "Computer Science", "CS-1"],
+				]),
+				"students": self.write_csv(tmp, "s.csv", ["username", "first_name", "last_name", "email", "password", "faculty", "enrollment_year"], [
+					[f"s{i}", "", "", "", "" if i else "pw-123456", "Computer Science", "2025"] for i in range(5)
+				]),
+				"subjects": self.write_csv(tmp, "subj.csv", ["code", "title", "faculty", "professor"], [
+					["CS100", "Intro", "Computer Science", "ada"],
+					["EN100", "Essays", "English", ""],
+				]),
+				"enrollments": self.write_csv(tmp, "e.csv", ["subject", "student"], [
+					["CS100", f"s{i}"] for i in range(5)
+				] + [["EN100", "s0"], ["NOPE", "s1"]]),
+			}
+			checkpoint = os.path.join(tmp, "checkpoint.json")
+			out = io.StringIO()
+			call_command("import_university", batch_size=2, workers=1, checkpoint=checkpoint, stdout=out, stderr=io.StringIO(), **files)
+
+			self.assertEqual(Student.objects.count(), 5)
+			self.assertTrue(User.objects.get(username="s0").check_password("pw-123456"))
+			self.assertFalse(User.objects.get(username="s1").has_usable_password())
+			cs100 = Subject.objects.get(code="CS100")
+			self.assertEqual(cs100.professor.user.username, "ada")
+			self.assertEqual(cs100.students.count(), 5)
+			self.assertEqual(Subject.objects.get(code="EN100").faculty.name, "English")
+			with open(checkpoint) as handle:
+				self.assertEqual(json.load(handle)["enrollments"], 7)
+
+			# Re-running resumes from the checkpoint; without it, existing rows are skipped
+			call_command("import_university", workers=0, checkpoint=checkpoint, stdout=out, **files)
+			call_command("import_university", workers=0, stdout=out, stderr=io.StringIO(), **files)
+			self.assertEqual(User.objects.count(), 6)
+			self.assertEqual(Subject.students.through.objects.count(), 6)
+			self.assertIn("rows/s", out.getvalue())
+
+
+class SyntheticDataTests(TestCase):
+	def test_generator_is_deterministic_and_benchmark_writes_json(self):
+		def snapshot(prefix):
+			dataset = generate(faculties=2, subjects=6, students=20, students_per_subject=5, grade_rate=0.5, seed=7, prefix=prefix)
+			grades = Grade.objects.filter(subject__code__startswith=prefix.upper()).order_by("subject__code", "student__user__username")
+			return dataset, [(g.subject.code[len(prefix):], g.student.user.username[len(prefix):], g.grade) for g in grades]
+
+		first, rows = snapshot("one")
+		second, again = snapshot("two")
+		self.assertEqual(rows, again)
+		self.assertEqual((first.subjects, first.enrollments, first.grades), (6, 30, len(rows)))
+		self.assertTrue(first.admin.is_superuser)
+		self.assertTrue(first.student.check_password("synthetic"))
+		self.assertEqual(SubjectGradeStats.objects.filter(subject__code__startswith="ONE").aggregate(n=Sum("count"))["n"], len(rows))
+
+		with tempfile.TemporaryDirectory() as tmp:
+			output = os.path.join(tmp, "bench.json")
+			args = ["--requests", "2", "--warmup", "0", "--subjects", "4", "--students", "12", "--students-per-subject", "3"]
+			call_command("benchmark_api", *args, "--output", output, stdout=io.StringIO())
+			with open(output) as handle:
+				report = json.load(handle)
+			measured = {(r["role"], r["route"]): r for r in report["results"] if "skipped" not in r}
+			self.assertEqual(measured[("student", "me-profile")]["status"], 200)
+			self.assertEqual(measured[("admin", "cache-stats")]["status"], 200)
+			self.assertGreater(measured[("professor", "grade-list")]["queries"], 0)
+			self.assertIn(("admin", "subject-detail"), measured)
+			self.assertEqual(measured[("admin", "grade-gradebook")]["status"], 200)
+			for key in (("professor", "grade-detail PATCH"), ("professor", "grade-bulk POST"), ("student", "subject-enroll POST")):
+				self.assertEqual(measured[key]["status"], 200, key)
+			out = io.StringIO()
+			call_command("benchmark_api", *args, "--output", os.path.join(tmp, "next.json"), "--baseline", output, stdout=out)
+			self.assertIn("regressions", out.getvalue())
+		self.assertFalse(User.objects.filter(username__startswith="bench").exists())
+
+
+class QueryPlanTests(TestCase):
+	"""EXPLAIN every ViewSet list queryset on a seeded dataset and reject full scans / sorts"""
+
+	@classmethod
+	def setUpTestData(cls):
+		faculties = Faculty.objects.bulk_create([Faculty(name=f"F{i}") for i in range(5)])
+		users = User.objects.bulk_create([User(username=f"u{i}") for i in range(2400)])
+		admins = Administrator.objects.bulk_create([Administrator(user=u, faculty=faculties[i % 5]) for i, u in enumerate(users[:200])])
+		profs = Professor.objects.bulk_create([Professor(user=u, faculty=faculties[i % 5]) for i, u in enumerate(users[200:400])])
+		students = Student.objects.bulk_create([Student(user=u, faculty=faculties[i % 5], enrollment_year=2020 + i % 5) for i, u in enumerate(users[400:])])
+		cls.admin_user = admins[0].user
+		subjects = Subject.objects.bulk_create([
+			Subject(code=f"S{i:04d}", title=f"Subject {i}", faculty=faculties[i % 5], professor=profs[i % len(profs)])
+			for i in range(400)
+		])
+		Enrollment = Subject.students.through
+		Enrollment.objects.bulk_create([
+			Enrollment(subject=subjects[(i * 7 + k) % len(subjects)], student=stu)
+			for i, stu in enumerate(students) for k in range(5)
+		])
+		Grade.objects.bulk_create([
+			Grade(subject=subjects[(i * 7 + k) % len(subjects)], student=stu, professor=subjects[(i * 7 + k) % len(subjects)].professor, grade=50 + (i + k) % 50)
+			for i, stu in enumerate(students) for k in range(5)
+		])
+		cls.prof_user = profs[0].user
+		cls.stu_user = students[0].user
+		cls.faculty = faculties[0]
+		cls.subject = subjects[0]
+		rebuild_search_indexes()
+		with connection.cursor() as cursor:
+			cursor.execute("ANALYZE")
+
+	def querysets(self, viewset, user, **params):
+		view = viewset()
+		view.action = "list"
+		view.format_kwarg = None
+		view.request = Request(APIRequestFactory().get("/", params))
+		view.request.user = User.objects.get(pk=user.pk)
+		ordering = KeysetPagination().get_ordering(view)
+		qs = view.filter_queryset(view.get_queryset()).order_by(*ordering)
+		last = qs.last()
+		values = [getattr(last, f.lstrip("-")) for f in ordering] if last else [0] * len(ordering)
+		deep = qs.filter(KeysetPagination().seek_filter(ordering, values))
+		return qs[:51], deep[:51]
+
+	def assertIndexed(self, qs):
+		plan = qs.explain()
+		full_scan = re.search(r"SCAN (\w+)\s*$", plan, re.MULTILINE)
+		self.assertIsNone(full_scan, f"full table scan:\n{plan}")
+		self.assertNotIn("TEMP B-TREE FOR ORDER BY", plan, f"sort without index:\n{plan}")
+
+	def test_list_querysets_use_indexes(self):
+		cases = [
+			(FacultyViewSet, self.admin_user, {}),
+			(ProfessorViewSet, self.admin_user, {}),
+			(StudentViewSet, self.admin_user, {}),
+			(AdministratorViewSet, self.admin_user, {}),
+		]
+		for user in (self.admin_user, self.prof_user, self.stu_user):
+			cases += [
+				(SubjectViewSet, user, {}),
+				(SubjectViewSet, user, {"view": "summary"}),
+				(GradeViewSet, user, {}),
+			]
+		# Every declared filter and ordering option must be served by an index too
+		cases += [
+			(FacultyViewSet, self.admin_user, {"name__startswith": "F1"}),
+			(FacultyViewSet, self.admin_user, {"ordering": "-name"}),
+			(StudentViewSet, self.admin_user, {"faculty": self.faculty.pk}),
+			(StudentViewSet, self.admin_user, {"enrollment_year": 2021}),
+			(StudentViewSet, self.admin_user, {"ordering": "-created"}),
+			(ProfessorViewSet, self.admin_user, {"faculty": self.faculty.pk}),
+			(AdministratorViewSet, self.admin_user, {"faculty": self.faculty.pk}),
+			(SubjectViewSet, self.admin_user, {"faculty": self.faculty.pk}),
+			(SubjectViewSet, self.admin_user, {"code__startswith": "S01"}),
+			(SubjectViewSet, self.admin_user, {"ordering": "-code"}),
+			(SubjectViewSet, self.prof_user, {"code__startswith": "S0"}),
+			(GradeViewSet, self.admin_user, {"subject": self.subject.pk}),
+			(GradeViewSet, self.admin_user, {"grade__gte": 90, "ordering": "-created"}),
+			(GradeViewSet, self.prof_user, {"subject": self.subject.pk, "grade__lte": 60}),
+		]
+		for viewset, user, params in cases:
+			for qs in self.querysets(viewset, user, **params):
+				with self.subTest(viewset=viewset.__name__, user=user.username, params=params):
+					self.assertIndexed(qs)
+
+		# Searches start from the FTS5 matches and sort only those
+		for viewset, params in ((StudentViewSet, {"search": "u12"}), (SubjectViewSet, {"search": "subject 1"})):
+			for qs in self.querysets(viewset, self.admin_user, **params):
+				plan = qs.explain()
+				self.assertRegex(plan, r"SCAN university_\w+_search VIRTUAL TABLE")
+				self.assertIsNone(re.search(r"SCAN (\w+)\s*$", plan, re.MULTILINE), plan)
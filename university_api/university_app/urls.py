@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import GradeListView, ProfileView, SubjectListView
 from .views import (
     FacultyViewSet,
     SubjectViewSet,
@@ -8,6 +9,7 @@ from .views import (
     AdministratorViewSet,
     GradeViewSet,
     MeViewSet,
+    CacheViewSet,
 )
 
 router = DefaultRouter()
@@ -18,7 +20,12 @@ router.register(r'students', StudentViewSet)
 router.register(r'administrators', AdministratorViewSet)
 router.register(r'grades', GradeViewSet, basename='grade')
 router.register(r'me', MeViewSet, basename='me')
+router.register(r'cache', CacheViewSet, basename='cache')
 
 urlpatterns = [
+    # Async variants of the hottest reads, for the ASGI server
+    path('async/me/profile/', ProfileView.as_view(), name='async-me-profile'),
+    path('async/subjects/', SubjectListView.as_view(), name='async-subject-list'),
+    path('async/grades/', GradeListView.as_view(), name='async-grade-list'),
     path('', include(router.urls)),
 ]
@@ -1,59 +1,197 @@
+import csv
+import io
+
 from rest_framework import viewsets, permissions, response, decorators
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.models import User
-from .models import Faculty, Administrator, Professor, Student, Subject, Grade
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.signals import m2m_changed
+from django.db.models.functions import Coalesce
+from .models import Faculty, Administrator, Professor, Student, Subject, Grade, StudentGradeStats, SubjectGradeStats
 from .serializer import (
 	FacultySerializer,
 	AdministratorSerializer,
 	ProfessorSerializer,
 	StudentSerializer,
 	SubjectSerializer,
+	SubjectSummarySerializer,
 	GradeSerializer,
+	BulkGradeRowSerializer,
 	UserSerializer,
 )
+from .analytics import faculty_analytics, parse_group_by, parse_pass_mark, parse_percentiles
+from .backends import login_queue
+from .caching import CachedListMixin, cache_stats
+from .conditional import ConditionalGetMixin
+from .dashboard import invalidate_dashboards, student_dashboard
+from .exports import GRADE_COLUMNS, ROSTER_COLUMNS, export_format, stream_export
+from .filters import Filter, PrefixFilter, decimal, integer
+from .grade_stats import GradeChange, apply_changes, summarize
+from .gradebook import gradebook_columns
 from .permissions import IsAdminOrReadOnly, IsAuthenticatedReadOnly
+from .roles import ADMINISTRATOR, PROFESSOR, STUDENT, resolve_role, role_profile
+from .search import SUBJECT_SEARCH, USER_SEARCH
+
+
+PROFILE_SERIALIZERS = {
+	ADMINISTRATOR: AdministratorSerializer,
+	PROFESSOR: ProfessorSerializer,
+	STUDENT: StudentSerializer,
+}
 
 
 def get_user_role(user: User):
-	if hasattr(user, "administrator_profile"):
-		return "administrator"
-	if hasattr(user, "professor_profile"):
-		return "professor"
-	if hasattr(user, "student_profile"):
-		return "student"
-	return "user"
+	return resolve_role(user).role
 
 
-class FacultyViewSet(viewsets.ModelViewSet):
+def profile_payload(user, role, profile):
+	"""Body of me/profile for a loaded user and profile (shared with the async view)"""
+	data = {"user": UserSerializer(user).data, "role": role.role}
+	serializer_class = PROFILE_SERIALIZERS.get(role.role)
+	if serializer_class is not None:
+		try:
+			data["profile"] = serializer_class(profile).data
+		except Exception:
+			data["profile"] = None
+	return data
+
+
+class FacultyViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
 	queryset = Faculty.objects.all()
 	serializer_class = FacultySerializer
 	permission_classes = [IsAdminOrReadOnly]
+	keyset_ordering = ("name", "id")
+	ordering_options = {"name": ("name", "id")}
+	query_filters = {"name__startswith": PrefixFilter("name")}
+	cache_dependencies = (Faculty,)
+	query_budgets = {"list": 3, "retrieve": 4, "analytics": 6}
+
+	@decorators.action(detail=True, methods=["get"])
+	def analytics(self, request, pk=None):
+		"""Faculty-wide grade distribution by subject, professor and enrollment year (admin only)
+
+		Query params: group_by (comma list), percentiles (comma list), pass_mark
+		"""
+		if not resolve_role(request.user).is_admin:
+			return response.Response({"error": "Admin only"}, status=403)
+		faculty = self.get_object()
+		params = request.query_params
+		try:
+			options = {
+				"group_by": parse_group_by(params.get("group_by")),
+				"percentiles": parse_percentiles(params.get("percentiles")),
+				"pass_mark": parse_pass_mark(params.get("pass_mark")),
+			}
+		except ValueError as exc:
+			return response.Response({"error": str(exc)}, status=400)
+		return response.Response(faculty_analytics(faculty, **options))
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
 	serializer_class = SubjectSerializer
 	permission_classes = [IsAdminOrReadOnly]
+	keyset_ordering = ("code", "id")
+	ordering_options = {"code": ("code", "id")}
+	query_filters = {
+		"faculty": Filter("faculty_id"),
+		"professor": Filter("professor_id"),
+		"code": Filter("code", str),
+		"code__startswith": PrefixFilter("code"),
+	}
+	search_index, search_field = SUBJECT_SEARCH, "pk"
+	cache_dependencies = (Subject, Professor, Student, User, Faculty)
+	query_budgets = {"list": 7, "retrieve": 7, "students": 5, "stats": 5, "roster_export": 4}
+	# Actions whose response embeds the full nested roster
+	roster_actions = ("list", "retrieve", "create", "update", "partial_update")
+	bulk_max_students = 5000
+
+	def cache_role(self, request):
+		# Professor and student lists are per-user (own subjects, enrolled flags): only the admin view is shared
+		return ADMINISTRATOR if resolve_role(request.user).is_admin else None
+
+	def is_summary(self):
+		return self.action == "list" and self.request.query_params.get("view") == "summary"
+
+	def get_serializer_class(self):
+		if self.action == "students":
+			return StudentSerializer
+		if self.is_summary():
+			return SubjectSummarySerializer
+		return SubjectSerializer
+
+	def get_keyset_ordering(self):
+		if self.action == "students":
+			return ("created_at", "id")
+		return self.keyset_ordering
 
 	def get_queryset(self):
-		user = self.request.user
-		role = get_user_role(user)
-		qs = Subject.objects.select_related("faculty", "professor").prefetch_related("students")
-		if role == "administrator":
+		role = resolve_role(self.request.user)
+		# Faculty is prefetched: joining the tiny faculty table makes SQLite drive from it and sort every subject
+		qs = Subject.objects.select_related("professor__user", "professor__faculty").prefetch_related("faculty")
+		if self.is_summary():
+			qs = qs.annotate(student_count=Coalesce(Subquery(
+				Subject.students.through.objects.filter(subject=OuterRef("pk"))
+				.values("subject").annotate(count=Count("*")).values("count")
+			), 0))
+		elif self.action in self.roster_actions:
+			qs = qs.prefetch_related(Prefetch("students", queryset=Student.objects.select_related("user", "faculty")))
+		if role.role == ADMINISTRATOR:
 			return qs
-		if role == "professor":
-			try:
-				prof = user.professor_profile
-				return qs.filter(professor=prof)
-			except Professor.DoesNotExist:
-				return Subject.objects.none()
-		if role == "student":
+		if role.role == PROFESSOR:
+			return qs.filter(professor=role.profile)
+		if role.role == STUDENT:
 			# Students should see all subjects, with an 'enrolled' flag in the serializer
 			return qs
 		return Subject.objects.none()
 
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		role = resolve_role(self.request.user)
+		if self.action != "students" and role.role == STUDENT:
+			# One query for the whole page instead of an EXISTS per subject
+			context["enrolled_subject_ids"] = set(
+				Subject.students.through.objects.filter(student=role.profile).values_list("subject_id", flat=True)
+			)
+		return context
+
+	@decorators.action(detail=True, methods=["get"])
+	def students(self, request, pk=None):
+		"""Paginated roster of this subject"""
+		subject = self.get_object()
+		roster = Student.objects.filter(subjects=subject).select_related("user", "faculty")
+		page = self.paginate_queryset(roster)
+		serializer = self.get_serializer(page, many=True)
+		return self.get_paginated_response(serializer.data)
+
+	@decorators.action(detail=True, methods=["get"])
+	def stats(self, request, pk=None):
+		"""Precomputed grade statistics of this subject"""
+		subject = self.get_object()
+		stats = SubjectGradeStats.objects.filter(subject=subject).first()
+		return response.Response({"subject_id": subject.pk, **summarize(stats)})
+
+	@decorators.action(detail=True, methods=["get"])
+	def roster_export(self, request, pk=None):
+		"""Stream this subject's roster as CSV or NDJSON (professor of the subject or admin)"""
+		if not resolve_role(request.user).is_staff_role:
+			return response.Response({"error": "Professor or admin only"}, status=403)
+		output = export_format(request)
+		if output is None:
+			return response.Response({"error": "output must be csv or ndjson"}, status=400)
+		try:
+			subject_id = integer(pk)
+		except ValueError:
+			return response.Response({"error": f"Invalid subject id: {pk}"}, status=400)
+		subject = self.get_object()
+		roster = Student.objects.filter(subjects=subject).order_by("id")
+		# From the parsed id: the code is free text and would end up in a header
+		return stream_export(roster, ROSTER_COLUMNS, output, f"roster-subject-{subject_id}")
+
 	@decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
 	def add_student(self, request, pk=None):
 		"""Add a student to this subject (admin only)"""
-		if not (request.user.is_superuser or hasattr(request.user, "administrator_profile")):
+		if not resolve_role(request.user).is_admin:
 			return response.Response({"error": "Admin only"}, status=403)
 		subject = self.get_object()
 		student_id = request.data.get("student_id")
@@ -67,7 +205,7 @@ class SubjectViewSet(viewsets.ModelViewSet):
 	@decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
 	def remove_student(self, request, pk=None):
 		"""Remove a student from this subject (admin only)"""
-		if not (request.user.is_superuser or hasattr(request.user, "administrator_profile")):
+		if not resolve_role(request.user).is_admin:
 			return response.Response({"error": "Admin only"}, status=403)
 		subject = self.get_object()
 		student_id = request.data.get("student_id")
@@ -78,113 +216,365 @@ class SubjectViewSet(viewsets.ModelViewSet):
 		except Student.DoesNotExist:
 			return response.Response({"error": "Student not found"}, status=404)
 
+	@decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+	def bulk_add_students(self, request, pk=None):
+		"""Enroll many students at once from `student_ids` or an uploaded CSV (admin only)"""
+		if not resolve_role(request.user).is_admin:
+			return response.Response({"error": "Admin only"}, status=403)
+		student_ids, error = self.read_student_ids(request)
+		if error:
+			return response.Response({"error": error}, status=400)
+		subject = self.get_object()
+		Enrollment = Subject.students.through
+		existing = set(Student.objects.filter(pk__in=student_ids).values_list("pk", flat=True))
+		present = set(Enrollment.objects.filter(subject=subject, student_id__in=existing).values_list("student_id", flat=True))
+		added = sorted(existing - present)
+		with transaction.atomic():
+			Enrollment.objects.bulk_create(
+				[Enrollment(subject=subject, student_id=student_id) for student_id in added], ignore_conflicts=True
+			)
+			# bulk_create bypasses the related manager, so announce the change like .add() would
+			if added:
+				m2m_changed.send(
+					sender=Enrollment, instance=subject, action="post_add", reverse=False,
+					model=Student, pk_set=set(added), using=subject._state.db,
+				)
+		return response.Response({
+			"added": added,
+			"already_present": sorted(present),
+			"missing": sorted(set(student_ids) - existing),
+		})
+
+	@decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+	def bulk_remove_students(self, request, pk=None):
+		"""Unenroll many students at once from `student_ids` or an uploaded CSV (admin only)"""
+		if not resolve_role(request.user).is_admin:
+			return response.Response({"error": "Admin only"}, status=403)
+		student_ids, error = self.read_student_ids(request)
+		if error:
+			return response.Response({"error": error}, status=400)
+		subject = self.get_object()
+		Enrollment = Subject.students.through
+		existing = set(Student.objects.filter(pk__in=student_ids).values_list("pk", flat=True))
+		enrolled = Enrollment.objects.filter(subject=subject, student_id__in=existing)
+		removed = sorted(enrolled.values_list("student_id", flat=True))
+		with transaction.atomic():
+			enrolled.delete()
+			if removed:
+				m2m_changed.send(
+					sender=Enrollment, instance=subject, action="post_remove", reverse=False,
+					model=Student, pk_set=set(removed), using=subject._state.db,
+				)
+		return response.Response({
+			"removed": removed,
+			"not_enrolled": sorted(existing - set(removed)),
+			"missing": sorted(set(student_ids) - existing),
+		})
+
+	def read_student_ids(self, request):
+		"""Student ids from a JSON `student_ids` list or a CSV `file` (first column or `student_id` column)"""
+		upload = request.FILES.get("file")
+		if upload is not None:
+			try:
+				rows = [row for row in csv.reader(io.TextIOWrapper(upload, encoding="utf-8-sig")) if row]
+			except (UnicodeDecodeError, csv.Error):
+				return None, "file must be a UTF-8 CSV"
+			column = 0
+			if rows and not rows[0][0].strip().isdigit():
+				header = [cell.strip() for cell in rows.pop(0)]
+				column = header.index("student_id") if "student_id" in header else 0
+			raw = [row[column] for row in rows if len(row) > column]
+		else:
+			raw = request.data.get("student_ids")
+			if not isinstance(raw, list):
+				return None, "student_ids list or CSV file required"
+		if len(raw) > self.bulk_max_students:
+			return None, f"At most {self.bulk_max_students} students per request"
+		try:
+			return [int(str(value).strip()) for value in raw], None
+		except ValueError:
+			return None, "student ids must be integers"
+
 	@decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
 	def enroll(self, request, pk=None):
 		"""Allow the current student to enroll in this subject"""
-		if not hasattr(request.user, "student_profile"):
+		student = role_profile(request.user, STUDENT)
+		if student is None:
 			return response.Response({"error": "Student only"}, status=403)
 		subject = self.get_object()
-		student = request.user.student_profile
 		subject.students.add(student)
 		return response.Response({"success": True, "enrolled": True})
 
 	@decorators.action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
 	def unenroll(self, request, pk=None):
 		"""Allow the current student to unenroll from this subject"""
-		if not hasattr(request.user, "student_profile"):
+		student = role_profile(request.user, STUDENT)
+		if student is None:
 			return response.Response({"error": "Student only"}, status=403)
 		subject = self.get_object()
-		student = request.user.student_profile
 		subject.students.remove(student)
 		return response.Response({"success": True, "enrolled": False})
 
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
 	serializer_class = GradeSerializer
 	permission_classes = [permissions.IsAuthenticated]
+	keyset_ordering = ("created_at", "id")
+	ordering_options = {"created": ("created_at", "id")}
+	query_filters = {
+		"subject": Filter("subject_id"),
+		"student": Filter("student_id"),
+		"grade__gte": Filter("grade__gte", decimal),
+		"grade__lte": Filter("grade__lte", decimal),
+	}
+	cache_dependencies = (Student, User, Faculty)
+	query_budgets = {"list": 6, "retrieve": 6, "by_subject": 4, "gradebook": 5}
+	bulk_max_rows = 2000
 
 	def get_queryset(self):
-		user = self.request.user
-		role = get_user_role(user)
-		if role == "administrator" or user.is_superuser:
-			return Grade.objects.select_related("student", "subject", "professor")
-		if role == "professor":
-			try:
-				prof = user.professor_profile
-				return Grade.objects.filter(professor=prof).select_related("student", "subject", "professor")
-			except Professor.DoesNotExist:
-				return Grade.objects.none()
-		if role == "student":
-			try:
-				stu = user.student_profile
-				return Grade.objects.filter(student=stu).select_related("student", "subject", "professor")
-			except Student.DoesNotExist:
-				return Grade.objects.none()
+		role = resolve_role(self.request.user)
+		# GradeSerializer nests the student with its user and faculty. Those are prefetched:
+		# joining them makes SQLite drive the admin list from the student table and sort
+		grades = Grade.objects.select_related("student").prefetch_related("student__user", "student__faculty")
+		if role.is_admin:
+			return grades
+		if role.role == PROFESSOR:
+			return grades.filter(professor=role.profile)
+		if role.role == STUDENT:
+			return grades.filter(student=role.profile)
 		return Grade.objects.none()
 
 	def create(self, request, *args, **kwargs):
 		"""Only professor/admin can create grades"""
-		if not (hasattr(request.user, "professor_profile") or request.user.is_superuser or hasattr(request.user, "administrator_profile")):
+		if not resolve_role(request.user).is_staff_role:
 			return response.Response({"error": "Professor or admin only"}, status=403)
 		return super().create(request, *args, **kwargs)
 
 	def update(self, request, *args, **kwargs):
 		"""Only professor/admin can update grades"""
-		if not (hasattr(request.user, "professor_profile") or request.user.is_superuser or hasattr(request.user, "administrator_profile")):
+		if not resolve_role(request.user).is_staff_role:
 			return response.Response({"error": "Professor or admin only"}, status=403)
 		return super().update(request, *args, **kwargs)
 
+	@decorators.action(detail=False, methods=["get"])
+	def export(self, request):
+		"""Stream visible grades as CSV or NDJSON, optionally narrowed by subject_id / faculty_id"""
+		output = export_format(request)
+		if output is None:
+			return response.Response({"error": "output must be csv or ndjson"}, status=400)
+		ids = {}
+		for name in ("subject_id", "faculty_id"):
+			raw = request.query_params.get(name)
+			if raw:
+				try:
+					ids[name] = integer(raw)
+				except ValueError:
+					return response.Response({"error": f"Invalid {name}: {raw}"}, status=400)
+		grades = self.get_queryset()
+		filename = "grades"
+		if "subject_id" in ids:
+			grades = grades.filter(subject_id=ids["subject_id"])
+			filename += f"-subject-{ids['subject_id']}"
+		if "faculty_id" in ids:
+			grades = grades.filter(subject__faculty_id=ids["faculty_id"])
+			filename += f"-faculty-{ids['faculty_id']}"
+		return stream_export(grades.order_by("id"), GRADE_COLUMNS, output, filename)
+
+	@decorators.action(detail=False, methods=["post"])
+	def bulk(self, request):
+		"""Upsert many grades of one subject in a single transaction (professor of the subject or admin)"""
+		role = resolve_role(request.user)
+		if not role.is_staff_role:
+			return response.Response({"error": "Professor or admin only"}, status=403)
+		subject_id = request.data.get("subject_id")
+		rows = request.data.get("grades")
+		if not subject_id or not isinstance(rows, list):
+			return response.Response({"error": "subject_id and a grades list are required"}, status=400)
+		if len(rows) > self.bulk_max_rows:
+			return response.Response({"error": f"At most {self.bulk_max_rows} grades per request"}, status=400)
+		try:
+			subject_id = integer(subject_id)
+		except (TypeError, ValueError):
+			return response.Response({"error": f"Invalid subject_id: {subject_id}"}, status=400)
+		subjects = Subject.objects.filter(pk=subject_id)
+		if not role.is_admin:
+			subjects = subjects.filter(professor=role.profile)
+		subject = subjects.first()
+		if subject is None:
+			return response.Response({"error": "Subject not found or not your subject"}, status=404)
+
+		errors, valid = [], {}
+		for index, row in enumerate(rows):
+			if not isinstance(row, dict):
+				errors.append({"index": index, "student_id": None, "errors": {"non_field_errors": ["Expected an object"]}})
+				continue
+			row_serializer = BulkGradeRowSerializer(data=row)
+			if not row_serializer.is_valid():
+				errors.append({"index": index, "student_id": row.get("student_id"), "errors": row_serializer.errors})
+				continue
+			data = row_serializer.validated_data
+			if data["student_id"] in valid:
+				errors.append({"index": index, "student_id": data["student_id"], "errors": {"student_id": ["Duplicate student in this upload"]}})
+				continue
+			valid[data["student_id"]] = (index, data)
+
+		enrolled = set(
+			Subject.students.through.objects.filter(subject=subject, student_id__in=valid).values_list("student_id", flat=True)
+		)
+		grades = []
+		for student_id, (index, data) in valid.items():
+			if student_id not in enrolled:
+				errors.append({"index": index, "student_id": student_id, "errors": {"student_id": ["Student is not enrolled in this subject"]}})
+				continue
+			grades.append(Grade(
+				subject=subject, student_id=student_id, professor_id=subject.professor_id,
+				grade=data["grade"], notes=data["notes"],
+			))
+
+		with transaction.atomic():
+			previous = dict(
+				Grade.objects.filter(subject=subject, student_id__in=[g.student_id for g in grades])
+				.values_list("student_id", "grade")
+			)
+			Grade.objects.bulk_create(
+				grades,
+				update_conflicts=True,
+				unique_fields=["subject", "student"],
+				update_fields=["grade", "notes", "professor", "updated_at"],
+			)
+			# bulk_create sends no signals: maintain grade statistics for the whole batch here
+			apply_changes([GradeChange(subject.pk, g.student_id, previous.get(g.student_id), g.grade) for g in grades])
+			invalidate_dashboards(g.student_id for g in grades)
+		errors.sort(key=lambda e: e["index"])
+		return response.Response({"saved": [g.student_id for g in grades], "errors": errors})
+
 	@decorators.action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
 	def by_subject(self, request):
-		"""Get grades for a specific subject (professor view)"""
-		subject_id = request.query_params.get("subject_id")
-		if not subject_id:
+		"""Get grades for a specific subject (professor of the subject or admin)"""
+		try:
+			subject_id = integer(request.query_params["subject_id"])
+		except (KeyError, ValueError):
 			return response.Response({"error": "subject_id required"}, status=400)
-		if not hasattr(request.user, "professor_profile"):
-			return response.Response({"error": "Professor only"}, status=403)
-		prof = request.user.professor_profile
+		role = resolve_role(request.user)
+		if not role.is_staff_role:
+			return response.Response({"error": "Professor or admin only"}, status=403)
+		subjects = Subject.objects.filter(pk=subject_id)
+		if not role.is_admin:
+			subjects = subjects.filter(professor=role.profile)
+		subject = subjects.first()
+		if subject is None:
+			return response.Response({"error": "Subject not found or not your subject"}, status=404)
+		grades = Grade.objects.filter(subject=subject).select_related("student__user", "student__faculty")
+		serializer = self.get_serializer(grades, many=True)
+		return response.Response(serializer.data)
+
+	@decorators.action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+	def gradebook(self, request):
+		"""Whole roster of a subject with aligned grade and notes columns (professor of the subject or admin)"""
 		try:
-			subject = Subject.objects.get(pk=subject_id, professor=prof)
-			grades = Grade.objects.filter(subject=subject).select_related("student", "subject", "professor")
-			serializer = self.get_serializer(grades, many=True)
-			return response.Response(serializer.data)
-		except Subject.DoesNotExist:
+			subject_id = integer(request.query_params["subject_id"])
+		except (KeyError, TypeError, ValueError):
+			return response.Response({"error": "subject_id required"}, status=400)
+		role = resolve_role(request.user)
+		if not role.is_staff_role:
+			return response.Response({"error": "Professor or admin only"}, status=403)
+		subjects = Subject.objects.filter(pk=subject_id)
+		if not role.is_admin:
+			subjects = subjects.filter(professor=role.profile)
+		subject = subjects.values("id", "code", "title").first()
+		if subject is None:
 			return response.Response({"error": "Subject not found or not your subject"}, status=404)
+		return response.Response(gradebook_columns(subject))
 
 
-class ProfessorViewSet(viewsets.ModelViewSet):
+class ProfessorViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     queryset = Professor.objects.select_related("user", "faculty")
     serializer_class = ProfessorSerializer
     permission_classes = [IsAdminOrReadOnly]
+    keyset_ordering = ("created_at", "id")
+    ordering_options = {"created": ("created_at", "id")}
+    query_filters = {"faculty": Filter("faculty_id")}
+    search_index, search_field = USER_SEARCH, "user_id"
+    cache_dependencies = (Professor, User, Faculty)
+    query_budgets = {"list": 3, "retrieve": 4}
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Student.objects.select_related("user", "faculty")
     serializer_class = StudentSerializer
     permission_classes = [IsAdminOrReadOnly]
+    keyset_ordering = ("created_at", "id")
+    ordering_options = {"created": ("created_at", "id")}
+    query_filters = {"faculty": Filter("faculty_id"), "enrollment_year": Filter("enrollment_year")}
+    search_index, search_field = USER_SEARCH, "user_id"
+    cache_dependencies = (User, Faculty)
+    query_budgets = {"list": 4, "retrieve": 4, "transcript_summary": 4}
+
+    @decorators.action(detail=True, methods=["get"], url_path="transcript-summary")
+    def transcript_summary(self, request, pk=None):
+        """Precomputed grade statistics of this student (admin or the student themself)"""
+        role = resolve_role(request.user)
+        if not role.is_admin and not (role.role == STUDENT and str(role.profile.pk) == str(pk)):
+            return response.Response({"error": "Admin or the student only"}, status=403)
+        student = self.get_object()
+        stats = StudentGradeStats.objects.filter(student=student).first()
+        return response.Response({"student_id": student.pk, **summarize(stats)})
 
 
-class AdministratorViewSet(viewsets.ModelViewSet):
+class AdministratorViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Administrator.objects.select_related("user", "faculty")
     serializer_class = AdministratorSerializer
     permission_classes = [IsAdminOrReadOnly]
+    keyset_ordering = ("created_at", "id")
+    ordering_options = {"created": ("created_at", "id")}
+    query_filters = {"faculty": Filter("faculty_id")}
+    search_index, search_field = USER_SEARCH, "user_id"
+    cache_dependencies = (User, Faculty)
+    query_budgets = {"list": 4, "retrieve": 4}
 
 
 class MeViewSet(viewsets.ViewSet):
 	permission_classes = [permissions.IsAuthenticated]
+	query_budgets = {"profile": 3, "dashboard": 5}
 
 	@decorators.action(detail=False, methods=["get"])
 	def profile(self, request):
 		user = request.user
-		role = get_user_role(user)
-		data = {"user": UserSerializer(user).data, "role": role}
-		try:
-			if role == "administrator":
-				data["profile"] = AdministratorSerializer(user.administrator_profile).data
-			elif role == "professor":
-				data["profile"] = ProfessorSerializer(user.professor_profile).data
-			elif role == "student":
-				data["profile"] = StudentSerializer(user.student_profile).data
-		except Exception:
-			data["profile"] = None
-		return response.Response(data)
+		role = resolve_role(user)
+		profile = role.profile
+		if profile is not None and profile.get_deferred_fields():
+			# Built from token claims: load the full row once
+			profile = type(profile).objects.select_related("user", "faculty").filter(pk=profile.pk).first()
+		if profile is not None:
+			user = profile.user
+		elif not isinstance(user, User):
+			user = User.objects.get(pk=user.pk)
+		return response.Response(profile_payload(user, role, profile))
+
+	@decorators.action(detail=False, methods=["get"])
+	def dashboard(self, request):
+		"""Profile, enrolled subjects and grades of the current student in one cached snapshot"""
+		role = resolve_role(request.user)
+		if role.role != STUDENT:
+			return response.Response({"error": "Student only"}, status=403)
+		data, hit = student_dashboard(role.profile)
+		return response.Response(data, headers={"X-Cache": "HIT" if hit else "MISS"})
+
+
+class CacheViewSet(viewsets.ViewSet):
+	permission_classes = [permissions.IsAuthenticated]
+
+	@decorators.action(detail=False, methods=["get"])
+	def stats(self, request):
+		"""Response cache hit/miss counters per cached ViewSet (admin only)"""
+		if not resolve_role(request.user).is_admin:
+			return response.Response({"error": "Admin only"}, status=403)
+		return response.Response(cache_stats([FacultyViewSet, ProfessorViewSet, SubjectViewSet]))
+
+
+class TokenObtainView(TokenObtainPairView):
+	"""JWT login behind the login queue: 429 with Retry-After while it is full"""
+
+	def post(self, request, *args, **kwargs):
+		with login_queue.admit():
+			return super().post(request, *args, **kwargs)